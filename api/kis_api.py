@@ -1,6 +1,93 @@
 from pykis import PyKis, KisAuth
+import bisect
+import functools
 import logging
-from datetime import datetime, date
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, date, timedelta
+
+from api.rate_limiter import RateLimiter
+from common.metrics import metrics
+
+# KIS 초당 호출 한도 (실전: 20건, 모의: 2건). 여유분을 두고 설정합니다.
+DEFAULT_REQUESTS_PER_SECOND = {False: 18.0, True: 2.0}
+
+# 주식일별분봉조회: 과거 날짜의 분봉을 지정 시각 이전 최대 120건씩 조회 (실전투자 전용, 최대 1년 보관)
+MINUTE_HISTORY_PATH = "/uapi/domestic-stock/v1/quotations/inquire-time-dailychartprice"
+MINUTE_HISTORY_TR_ID = "FHKST03010230"
+
+# 관심종목(멀티종목) 시세조회: 국내 주식 최대 30종목의 현재가를 한 번에 조회 (실전투자 전용)
+MULTI_QUOTE_PATH = "/uapi/domestic-stock/v1/quotations/intstock-multprice"
+MULTI_QUOTE_TR_ID = "FHKST11300006"
+MULTI_QUOTE_LIMIT = 30
+
+
+def _instrumented(method):
+    """API 메서드의 소요 시간(호출 제한 대기 포함)과 실패 건수(None 반환)를 지표로 기록합니다."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with metrics.timer('kis_api_request_seconds', method=name):
+            result = method(self, *args, **kwargs)
+        if result is None:
+            metrics.inc('kis_api_errors_total', method=name)
+        return result
+    return wrapper
+
+
+class _Chart:
+    """캐시에서 돌려주는 차트 (pykis 차트처럼 bars 속성만 제공)"""
+    __slots__ = ('bars',)
+
+    def __init__(self, bars):
+        self.bars = bars
+
+
+class _ChartCache:
+    """
+    종목별로 최근에 받은 차트 봉을 보관하는 캐시.
+    받은 차트를 조회 시작 시간(since, 처음부터 받았으면 None)과 함께 저장하고, 이후 받은 증분 결과를 이어 붙여
+    최신 상태를 유지합니다. 따라서 수집기의 증분 조회만으로도 캐시가 채워지며, since 이후 구간의 요청만 캐시에서 반환합니다.
+    bar_key(bar)는 봉의 시간을 start와 비교할 수 있는 값으로 바꾸며, 증분 결과의 start가 마지막 봉보다
+    gap 이상 뒤이면(중간이 비면) 이어 붙이지 않고 새 결과로 항목을 바꿉니다. 날짜가 바뀌면 항목은 무효가 됩니다.
+    """
+
+    def __init__(self, bar_key, gap):
+        self.bar_key = bar_key
+        self.gap = gap
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker, start, max_age):
+        """max_age초 안에 갱신되었고 start 이후 구간을 모두 담은 항목이 있으면 해당 봉의 차트를, 없으면 None을 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(ticker)
+        if entry is None:
+            return None
+        updated, day, bars, keys, since = entry
+        if day != date.today() or time.monotonic() - updated > max_age:
+            return None
+        if since is not None and (start is None or start < since):
+            return None
+        if start is None:
+            return _Chart(bars)
+        return _Chart(bars[bisect.bisect_left(keys, start):])
+
+    def put(self, ticker, start, bars):
+        bars = sorted(bars, key=self.bar_key)
+        keys = [self.bar_key(b) for b in bars]
+        since = start
+        with self._lock:
+            if start is not None:
+                entry = self._entries.get(ticker)
+                if entry is not None and entry[1] == date.today() and entry[3] and start <= entry[3][-1] + self.gap:
+                    cut = bisect.bisect_left(entry[3], start)
+                    bars, keys = entry[2][:cut] + bars, entry[3][:cut] + keys
+                    if entry[4] is None or entry[4] <= start:
+                        since = entry[4]
+            self._entries[ticker] = (time.monotonic(), date.today(), bars, keys, since)
 
 
 class KISApi:
@@ -21,45 +108,235 @@ class KISApi:
             self.logger.critical(f"KIS API 인증 실패: {e}")
             raise
 
-    def get_daily_chart(self, ticker, start_date=None, end_date=None):
-        """일봉 데이터를 가져옵니다."""
+        virtual = config.getboolean('virtual_trade')
+        rate = config.getfloat('requests_per_second', DEFAULT_REQUESTS_PER_SECOND[virtual])
+        self.rate_limiter = RateLimiter(rate)
+        self.logger.info(f"KIS API 호출 제한: 초당 {rate}건")
+
+        # 종목 핸들 캐시 (호출마다 종목 정보를 다시 조회하지 않도록 stock_cache_seconds 동안 재사용)
+        self.stock_ttl = config.getfloat('stock_cache_seconds', 3600)
+        self._stocks = {}
+        self._stocks_lock = threading.Lock()
+
+        # 최근 차트 캐시 (수집기가 받은 차트를 매매 분석에서 재사용) / 진행 중인 동일 요청
+        self._day_charts = _ChartCache(lambda b: b.time.replace(tzinfo=None), timedelta(0))
+        self._daily_charts = _ChartCache(lambda b: b.time.date(), timedelta(days=1))
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _acquire(self):
+        """호출 제한기에서 호출 권한을 얻습니다. 대기 시간은 지표로 기록합니다."""
+        with metrics.timer('kis_api_throttle_seconds'):
+            self.rate_limiter.acquire()
+
+    def _coalesce(self, key, fetch):
+        """
+        같은 key의 요청이 이미 진행 중이면 API를 다시 호출하지 않고 그 결과를 함께 받습니다.
+        (여러 스레드가 같은 차트를 동시에 요청하는 경우)
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            metrics.inc('kis_api_coalesced_total', method=key[0])
+            return future.result()
         try:
-            stock = self.kis.stock(ticker)
-            return stock.daily_chart(start=start_date, end=end_date)
+            result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _cached_chart(self, cache, method, ticker, start, max_age):
+        chart = cache.get(ticker, start, max_age) if max_age else None
+        if chart is not None:
+            metrics.inc('kis_api_cache_hits_total', method=method)
+        return chart
+
+    def get_daily_chart(self, ticker, start_date=None, end_date=None, max_age=None):
+        """
+        일봉 데이터를 가져옵니다.
+        max_age(초)를 지정하면 그 시간 안에 받은 차트가 있을 때 API를 호출하지 않고 캐시에서 반환합니다.
+        """
+        if end_date is None:
+            chart = self._cached_chart(self._daily_charts, 'get_daily_chart', ticker, start_date, max_age)
+            if chart is not None:
+                return chart
+        return self._coalesce(('get_daily_chart', ticker, start_date, end_date),
+                              lambda: self._fetch_daily_chart(ticker, start_date, end_date))
+
+    @_instrumented
+    def _fetch_daily_chart(self, ticker, start_date, end_date):
+        try:
+            stock = self.stock(ticker)
+            self._acquire()
+            chart = stock.daily_chart(start=start_date, end=end_date)
         except Exception as e:
             self.logger.error(f"'{ticker}' 일봉 데이터 조회 실패: {e}")
             return None
+        if chart is not None and end_date is None:
+            self._daily_charts.put(ticker, start_date, chart.bars)
+        return chart
 
-    def get_day_chart(self, ticker, start=None):
+    def get_day_chart(self, ticker, start=None, max_age=None):
         """
         '오늘'의 분봉 데이터를 가져옵니다.
         start가 지정되면 해당 시간부터 조회합니다. (과거 날짜 조회 불가)
+        max_age(초)를 지정하면 그 시간 안에 받은 차트가 있을 때 API를 호출하지 않고 캐시에서 반환합니다.
         """
-        try:
-            stock = self.kis.stock(ticker)
-            param_to_pass = start
+        if start is not None and not isinstance(start, datetime):
+            start = datetime.combine(date.today(), start)
+        chart = self._cached_chart(self._day_charts, 'get_day_chart', ticker, start, max_age)
+        if chart is not None:
+            return chart
+        return self._coalesce(('get_day_chart', ticker, start), lambda: self._fetch_day_chart(ticker, start))
 
+    @_instrumented
+    def _fetch_day_chart(self, ticker, start):
+        try:
+            stock = self.stock(ticker)
+            self._acquire()
             # pykis의 day_chart는 'time' 객체만 인자로 받으므로 변환
-            if start and isinstance(start, datetime):
-                param_to_pass = start.time()
-
-            return stock.day_chart(start=param_to_pass)
+            chart = stock.day_chart(start=start.time() if start else None)
         except Exception as e:
             self.logger.error(f"'{ticker}' 분봉 데이터 조회 실패: {e}")
             return None
+        if chart is not None:
+            self._day_charts.put(ticker, start, chart.bars)
+        return chart
+
+    def get_quotes(self, tickers):
+        """
+        종목들의 현재가를 {종목: {'price', 'open', 'high', 'low', 'volume', 'trading_value'}}로 반환합니다.
+        국내 주식은 실전투자에서 멀티종목 시세조회로 최대 30종목씩 한 번에 조회하고, 나머지는 종목별로 조회합니다.
+        멀티종목 조회가 실패했거나 응답에 빠진 종목은 종목별 조회로 다시 받으며, 그래도 실패한 종목은 결과에서 빠집니다.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        batched = [] if self.config.getboolean('virtual_trade') else [t for t in tickers if t.isdigit()]
+        quotes = {}
+        for i in range(0, len(batched), MULTI_QUOTE_LIMIT):
+            chunk = tuple(batched[i:i + MULTI_QUOTE_LIMIT])
+            result = self._coalesce(('get_quotes', chunk), lambda: self._fetch_multi_quote(chunk)) or {}
+            # 응답의 종목 코드가 요청과 같은 종목만 사용합니다.
+            quotes.update((ticker, result[ticker]) for ticker in chunk if ticker in result)
+        missing = len(batched) - len(quotes)
+        if missing:
+            self.logger.warning(f"멀티종목 시세 조회에서 {missing}종목이 빠져 종목별로 다시 조회합니다.")
+        # 멀티종목 조회 대상이 아니거나 조회에서 빠진 종목은 종목별로 조회합니다. (quotes는 dict이므로 조회 비용은 종목 수와 무관)
+        for ticker in tickers:
+            if ticker not in quotes:
+                quote = self._coalesce(('get_quote', ticker), lambda: self._fetch_quote(ticker))
+                if quote is not None:
+                    quotes[ticker] = quote
+        return quotes
+
+    @_instrumented
+    def _fetch_multi_quote(self, tickers):
+        params = {}
+        for i in range(MULTI_QUOTE_LIMIT):
+            ticker = tickers[i] if i < len(tickers) else ""
+            params[f"FID_COND_MRKT_DIV_CODE_{i + 1}"] = "J" if ticker else ""
+            params[f"FID_INPUT_ISCD_{i + 1}"] = ticker
+        try:
+            self._acquire()
+            response = self.kis.fetch(path=MULTI_QUOTE_PATH, api=MULTI_QUOTE_TR_ID, params=params)
+            rows = response.__data__.get('output') or []
+            return {row['inter_shrn_iscd']: {
+                'price': float(row['inter2_prpr']), 'open': float(row['inter2_oprc']),
+                'high': float(row['inter2_hgpr']), 'low': float(row['inter2_lwpr']),
+                'volume': float(row['acml_vol']), 'trading_value': float(row['acml_tr_pbmn']),
+            } for row in rows if row.get('inter_shrn_iscd')}
+        except Exception as e:
+            self.logger.error(f"멀티종목 시세 조회 실패 ({len(tickers)}종목): {e}")
+            return None
+
+    @_instrumented
+    def _fetch_quote(self, ticker):
+        try:
+            stock = self.stock(ticker)
+            self._acquire()
+            quote = stock.quote()
+            return {'price': float(quote.price), 'open': float(quote.open), 'high': float(quote.high),
+                    'low': float(quote.low), 'volume': float(quote.volume), 'trading_value': float(quote.amount)}
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 시세 조회 실패: {e}")
+            return None
+
+    @_instrumented
+    def get_minute_chart_page(self, ticker, day, hour):
+        """
+        국내 주식의 과거 분봉을 day(YYYYMMDD) hour(HHMMSS) 이전부터 최대 120건 조회합니다.
+        반환값: 응답의 output2 행(dict) 목록, 실패 시 None
+        """
+        try:
+            self._acquire()
+            response = self.kis.fetch(
+                path=MINUTE_HISTORY_PATH,
+                api=MINUTE_HISTORY_TR_ID,
+                params={
+                    "FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": ticker,
+                    "FID_INPUT_HOUR_1": hour, "FID_INPUT_DATE_1": day,
+                    "FID_PW_DATA_INCU_YN": "N", "FID_FAKE_TICK_INCU_YN": ""
+                }
+            )
+            return response.__data__.get('output2') or []
+        except Exception as e:
+            self.logger.error(f"'{ticker}' {day} {hour} 과거 분봉 조회 실패: {e}")
+            return None
+
+    def stock(self, ticker):
+        """종목 핸들을 반환합니다. 한 번 만든 핸들은 stock_cache_seconds 동안 재사용합니다."""
+        with self._stocks_lock:
+            cached = self._stocks.get(ticker)
+        if cached is not None and time.monotonic() - cached[0] < self.stock_ttl:
+            return cached[1]
+        stock = self._coalesce(('stock', ticker), lambda: self._resolve_stock(ticker))
+        with self._stocks_lock:
+            self._stocks[ticker] = (time.monotonic(), stock)
+        return stock
+
+    def _resolve_stock(self, ticker):
+        self._acquire()
+        return self.kis.stock(ticker)
+
+    def prepare_stocks(self, tickers):
+        """주문할 종목들의 핸들을 미리 만들어 둡니다."""
+        for ticker in tickers:
+            try:
+                self.stock(ticker)
+            except Exception as e:
+                self.logger.error(f"'{ticker}' 종목 정보 조회 실패: {e}")
+
+    def subscribe_executions(self, callback):
+        """계좌의 실시간 체결 통보를 구독합니다. callback(체결 응답)은 웹소켓 수신 스레드에서 호출됩니다."""
+        try:
+            return self.kis.account().on('execution', lambda sender, e: callback(e.response))
+        except Exception as e:
+            self.logger.error(f"실시간 체결 통보 구독 실패: {e}")
+            return None
 
+    @_instrumented
     def get_balance(self):
         """계좌 잔고를 조회합니다."""
         try:
+            self._acquire()
             return self.kis.account().balance()
         except Exception as e:
             self.logger.error(f"잔고 조회 실패: {e}")
             return None
 
+    @_instrumented
     def place_order(self, ticker, order_type, quantity, price=None, condition=None):
         """매수/매도 주문을 실행합니다."""
         try:
-            stock = self.kis.stock(ticker)
+            stock = self.stock(ticker)
+            self._acquire()
             if order_type.lower() == 'buy':
                 return stock.buy(qty=quantity, price=price, condition=condition)
             elif order_type.lower() == 'sell':
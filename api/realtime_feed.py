@@ -0,0 +1,114 @@
+import logging
+import threading
+
+import pandas as pd
+
+from common.bar_aggregator import Tick
+
+# KIS 웹소켓 세션당 최대 실시간 등록 건수
+MAX_REALTIME_SUBSCRIPTIONS = 41
+
+
+class KisRealtimeFeed:
+    """
+    pykis 웹소켓으로 종목별 실시간 체결가를 구독하여 Tick으로 전달하는 피드.
+    체결가 이벤트의 누적 거래량/거래대금 차이로 체결 한 건의 거래량/거래대금을 계산합니다.
+    """
+
+    def __init__(self, kis_api, tickers):
+        self.kis_api = kis_api
+        self.logger = logging.getLogger(__name__)
+        if len(tickers) > MAX_REALTIME_SUBSCRIPTIONS:
+            self.logger.warning(f"실시간 구독은 최대 {MAX_REALTIME_SUBSCRIPTIONS}개 종목까지 가능합니다. "
+                                f"{len(tickers) - MAX_REALTIME_SUBSCRIPTIONS}개 종목은 제외합니다.")
+        self.tickers = list(tickers)[:MAX_REALTIME_SUBSCRIPTIONS]
+        self._tickets = []
+        self._cumulative = {}
+        self._on_tick = None
+
+    def start(self, on_tick):
+        """실시간 체결가 구독을 시작합니다. on_tick(Tick)은 웹소켓 수신 스레드에서 호출됩니다."""
+        self._on_tick = on_tick
+        for ticker in self.tickers:
+            try:
+                stock = self.kis_api.kis.stock(ticker)
+                self._tickets.append(stock.on('price', lambda sender, e, t=ticker: self._handle(t, e.response)))
+                self.logger.info(f"'{ticker}' 실시간 체결가 구독 시작")
+            except Exception as e:
+                self.logger.error(f"'{ticker}' 실시간 체결가 구독 실패: {e}")
+        return self
+
+    def stop(self):
+        """모든 구독을 해제합니다."""
+        for ticket in self._tickets:
+            try:
+                ticket.unsubscribe()
+            except Exception as e:
+                self.logger.warning(f"실시간 구독 해제 실패: {e}")
+        self._tickets = []
+
+    def _handle(self, ticker, price):
+        try:
+            volume = float(price.volume)
+            amount = float(price.amount)
+            prev_volume, prev_amount = self._cumulative.get(ticker, (None, None))
+            self._cumulative[ticker] = (volume, amount)
+            # 첫 체결은 직전 누적값이 없으므로 거래량 없이 가격만 반영하고, 누적값이 줄면(새 거래일) 그대로 사용합니다.
+            if prev_volume is None:
+                volume_delta, amount_delta = 0.0, 0.0
+            elif volume < prev_volume:
+                volume_delta, amount_delta = volume, amount
+            else:
+                volume_delta, amount_delta = volume - prev_volume, amount - prev_amount
+            self._on_tick(Tick(ticker, price.time, price.price, volume_delta, amount_delta))
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 실시간 체결 처리 실패: {e}", exc_info=True)
+
+
+class ReplayFeed:
+    """
+    저장된 체결 데이터(ticker, timestamp, price, volume[, trading_value] 컬럼)를 시간순으로 재생하는 피드.
+    KisRealtimeFeed 대신 사용하여 웹소켓 없이 스트리밍 수집을 시험할 수 있습니다.
+    speed가 0이면 최대한 빠르게, 1이면 실제 체결 간격대로 재생합니다.
+    """
+
+    def __init__(self, ticks, speed=0.0):
+        if isinstance(ticks, pd.DataFrame):
+            ticks = ticks.sort_values('timestamp', kind='stable')
+            has_value = 'trading_value' in ticks.columns
+            ticks = [Tick(row.ticker, row.timestamp.to_pydatetime(warn=False), row.price, row.volume,
+                          row.trading_value if has_value else None)
+                     for row in ticks.itertuples(index=False)]
+        self.ticks = list(ticks)
+        self.speed = float(speed)
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, on_tick):
+        """별도 스레드에서 재생을 시작합니다."""
+        self._thread = threading.Thread(target=self._run, args=(on_tick,), name='replay-feed', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, on_tick):
+        previous = None
+        for tick in self.ticks:
+            if self._stop.is_set():
+                break
+            if self.speed > 0 and previous is not None:
+                gap = (pd.Timestamp(tick.timestamp) - pd.Timestamp(previous)).total_seconds() / self.speed
+                if gap > 0:
+                    self._stop.wait(gap)
+            previous = tick.timestamp
+            on_tick(tick)
+        self.logger.info(f"체결 데이터 재생 종료 ({len(self.ticks)}건)")
+
+    def join(self, timeout=None):
+        """재생이 끝날 때까지 기다립니다."""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stop(self):
+        self._stop.set()
+        self.join()
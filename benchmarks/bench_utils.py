@@ -0,0 +1,58 @@
+"""벤치마크 결과 저장/비교 공통 함수"""
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def time_call(fn, repeat=3, setup=None):
+    """fn을 repeat번 실행한 시간(초)의 중앙값을 반환합니다. setup은 매 실행 전에 호출되며 시간에 포함되지 않습니다."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def load_results(path):
+    """이전 결과 파일의 항목별 측정값을 반환합니다. (파일이 없으면 빈 dict)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'python': sys.version.split()[0], 'results': results},
+                  f, indent=2)
+
+
+def find_regressions(previous, current, tolerance):
+    """이전 결과 대비 tolerance 비율 이상 증가한 항목을 반환합니다."""
+    regressions = []
+    for name, metrics in current.items():
+        for key, value in metrics.items():
+            old = previous.get(name, {}).get(key)
+            if old and value > old * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {old:.4f} -> {value:.4f}")
+    return regressions
+
+
+def report(path, results, tolerance, baseline=None):
+    """결과를 저장하고 이전 결과(또는 baseline 파일)와 비교해 회귀 항목을 출력합니다. 회귀가 있으면 1을 반환합니다."""
+    previous = load_results(baseline or path)
+    regressions = find_regressions(previous, results, tolerance)
+    for regression in regressions:
+        print(f"회귀 감지: {regression}")
+    save_results(path, results)
+    return 1 if regressions else 0
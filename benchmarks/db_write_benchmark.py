@@ -0,0 +1,121 @@
+"""
+시세 저장 경로의 처리량 벤치마크 (로컬 MySQL 필요).
+
+설정 파일의 [DATABASE]에 연결해 임시 테이블(bench_write)을 만들고, 같은 합성 분봉으로 다음을 측정한 뒤 테이블을 삭제합니다.
+  - to_sql/<행 수>         : DBHandler.append_data (pandas to_sql, 빈 테이블에 추가)
+  - upsert/<행 수>/fresh   : DBHandler.upsert_data (빈 테이블에 저장)
+  - upsert/<행 수>/overlap : DBHandler.upsert_data (절반은 값이 바뀐 기존 행, 절반은 신규 행 - 백필 재저장과 같은 형태)
+측정과 함께 저장된 행 수와 upsert_data가 반환한 (신규, 갱신) 건수를 확인하며, 맞지 않으면 오류로 종료합니다.
+결과는 benchmarks/results/db_write.json에 저장되며, 이전 결과 대비 --tolerance 이상 느려진 항목이 있으면 1로 종료합니다.
+
+사용법: python benchmarks/db_write_benchmark.py [--config config.ini] [--rows 1000,10000] [--repeat 3]
+"""
+import argparse
+import configparser
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import ROOT, RESULTS_DIR, time_call, report
+
+sys.path.insert(0, ROOT)
+
+from common.indicator_engine import INDICATOR_COLUMNS  # noqa: E402
+from database.db_handler import DBHandler  # noqa: E402
+from database.schema import SchemaManager  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'db_write.json')
+TABLE_NAME = 'bench_write'
+
+
+def _bars(rows, offset=0, bump=0.0):
+    """DB 저장 형식의 합성 분봉 (offset분부터 rows개, bump만큼 가격을 올려 기존 행의 값을 바꿀 때 사용)"""
+    rng = np.random.default_rng(0)
+    close = 10000 + np.cumsum(rng.normal(0, 20, offset + rows))[offset:] + bump
+    df = pd.DataFrame({
+        'ticker': '000000',
+        'timestamp': pd.date_range('2020-01-01 09:00', periods=offset + rows, freq='min')[offset:],
+        'open': close - 5, 'high': close + 10, 'low': close - 10, 'close': close,
+        'volume': rng.integers(1, 10000, offset + rows)[offset:],
+        'trading_value': close * 1000,
+    })
+    for col in INDICATOR_COLUMNS:
+        df[col] = close
+    return df
+
+
+def _count(schema):
+    return schema._execute(f"SELECT COUNT(*) AS cnt FROM {TABLE_NAME}")[0]['cnt']
+
+
+def measure(db, schema, rows, repeat):
+    """rows행에 대해 to_sql과 upsert_data(신규/일부 중복)의 소요 시간을 측정합니다."""
+    fresh = _bars(rows)
+    half = rows // 2
+    base = _bars(half)
+    overlap = _bars(rows, offset=half // 2, bump=1.0)
+    # overlap 중 base와 키가 겹치는 행 수
+    existing = half - half // 2
+
+    def truncate():
+        schema._execute(f"TRUNCATE TABLE {TABLE_NAME}")
+
+    def seed():
+        truncate()
+        db.upsert_data(base, TABLE_NAME)
+
+    results = {}
+    results[f"to_sql/{rows}"] = {'seconds': time_call(lambda: db.append_data(fresh, TABLE_NAME), repeat, truncate)}
+    if _count(schema) != rows:
+        raise RuntimeError(f"to_sql 저장 행 수 불일치: {_count(schema)} != {rows}")
+
+    counts = []
+    results[f"upsert/{rows}/fresh"] = {
+        'seconds': time_call(lambda: counts.append(db.upsert_data(fresh, TABLE_NAME)), repeat, truncate)}
+    if counts[-1] != (rows, 0) or _count(schema) != rows:
+        raise RuntimeError(f"upsert(신규) 건수 불일치: {counts[-1]}, 저장 {_count(schema)}행")
+
+    counts = []
+    results[f"upsert/{rows}/overlap"] = {
+        'seconds': time_call(lambda: counts.append(db.upsert_data(overlap, TABLE_NAME)), repeat, seed)}
+    if counts[-1] != (rows - existing, existing) or _count(schema) != half + rows - existing:
+        raise RuntimeError(f"upsert(중복) 건수 불일치: {counts[-1]}, 저장 {_count(schema)}행")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="시세 저장 경로(to_sql / upsert) 처리량 벤치마크 (로컬 MySQL 필요)")
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.ini'), help="설정 파일 경로 ([DATABASE] 사용)")
+    parser.add_argument('--rows', default='1000,10000', help="측정할 행 수 (쉼표로 구분)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 판단할 증가 비율")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    config = configparser.ConfigParser()
+    config.read(args.config, encoding='utf-8')
+    db = DBHandler(config['DATABASE'])
+    schema = SchemaManager(db, config['DATABASE'])
+    schema._execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+    schema.create_table(TABLE_NAME, partitioned=False)
+
+    results = {}
+    try:
+        for rows in [int(r) for r in args.rows.split(',') if r.strip()]:
+            results.update(measure(db, schema, rows, args.repeat))
+    finally:
+        schema._execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+        db.conn.close()
+
+    for name, values in results.items():
+        rows = int(name.split('/')[1])
+        print(f"{name:28s} {values['seconds'] * 1000:9.1f} ms  ({rows / values['seconds']:,.0f} rows/s)")
+    return report(args.output, results, args.tolerance)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+자동 주문 실행기(ExecutionEngine)의 동작 점검.
+
+FakeBroker(주문 즉시 체결, 체결 통보 전송)에 대해 다음을 확인하고, 하나라도 어긋나면 내용을 출력한 뒤 1로 종료합니다.
+  - 매수/매도 후 잔고 캐시의 예수금/보유 수량이 브로커 잔고와 같은지 (주문마다 잔고를 다시 조회하지 않는지)
+  - 수량 계산에 쓴 현재가와 체결가가 달라 생긴 차이가 캐시 만료 후 잔고 재조회로 맞춰지는지
+  - 접수 거부: 현재가가 없거나 0인 매수, 예수금 부족, 보유 수량 없는 매도, 같은 종목의 접수 중 주문
+  - 브로커가 주문을 거부하면 예약한 예수금이 잔고 재조회로 되돌려지는지
+  - close() 후 주문 작업 스레드와 체결 통보 구독이 정리되는지
+
+사용법: python benchmarks/execution_check.py
+"""
+import logging
+import sys
+import threading
+import time
+
+from bench_utils import ROOT
+
+sys.path.insert(0, ROOT)
+
+from fakes import FakeBroker  # noqa: E402
+from core.execution import ExecutionEngine  # noqa: E402
+
+PRICE = 10000.0
+
+
+class Checker:
+    def __init__(self):
+        self.problems = []
+
+    def expect(self, name, actual, expected):
+        ok = actual == expected
+        print(f"[{'OK' if ok else 'FAIL'}] {name}: {actual!r}" + ('' if ok else f" (기대값 {expected!r})"))
+        if not ok:
+            self.problems.append(name)
+
+
+def _engine(broker, **config):
+    config = {'order_amount': '100000', 'order_workers': '4', 'account_cache_ttl_seconds': '3600', **config}
+    return ExecutionEngine(broker, config).start(list(broker.positions))
+
+
+def check_fills(check):
+    """매수/매도 체결이 잔고 캐시에 반영되어 브로커 잔고와 같아지는지 확인합니다."""
+    broker = FakeBroker(cash=1000000.0, positions={'000002': 7}, latency=0.01, price=PRICE)
+    engine = _engine(broker)
+    for ticker in ('000000', '000001'):
+        engine.submit(ticker, 'buy', PRICE)
+    engine.submit('000002', 'sell', PRICE)
+    orders = engine.wait()
+    check.expect("접수된 주문 수", sorted((o.ticker, o.side, o.quantity) for o in orders),
+                 [('000000', 'buy', 10), ('000001', 'buy', 10), ('000002', 'sell', 7)])
+    check.expect("예수금 (캐시 = 브로커)", engine.account.cash, broker.cash)
+    check.expect("보유 수량 (캐시 = 브로커)", {t: q for t, q in engine.account.positions.items() if q},
+                 {t: q for t, q in broker.positions.items() if q})
+    check.expect("잔고 조회 횟수 (시작 시 1회)", broker.balance_calls, 1)
+    engine.close()
+
+
+def check_reconcile(check):
+    """현재가와 체결가가 다를 때 생긴 예수금 차이가 캐시 만료 후 재조회로 맞춰지는지 확인합니다."""
+    broker = FakeBroker(cash=1000000.0, latency=0.0, price=PRICE)
+    engine = _engine(broker, account_cache_ttl_seconds='0.2')
+    engine.submit('000000', 'buy', PRICE * 0.9)  # 11주를 9000원으로 예약, 10000원에 체결
+    engine.wait()
+    check.expect("체결 직후 예수금 차이 (예약가 기준)", engine.account.cash['KRW'] - broker.cash['KRW'], 11 * PRICE * 0.1)
+    time.sleep(0.25)
+    engine.submit('000001', 'buy', PRICE)
+    engine.wait()
+    check.expect("캐시 만료 후 예수금 (캐시 = 브로커)", engine.account.cash, broker.cash)
+    check.expect("캐시 만료 후 보유 수량 (캐시 = 브로커)", engine.account.positions, broker.positions)
+    engine.close()
+
+
+def check_rejections(check):
+    """접수하지 않아야 하는 주문이 브로커로 가지 않고, 이후 정상 주문은 접수되는지 확인합니다."""
+    broker = FakeBroker(cash=150000.0, latency=0.05, price=PRICE)
+    # 매도 수량을 지정해 두어, 현재가 없는 매수가 매도 수량으로 계산되면 드러나도록 합니다.
+    engine = _engine(broker, sell_quantity='5')
+    check.expect("현재가 0인 매수", engine.submit('000000', 'buy', 0), None)
+    check.expect("현재가 없는 매수", engine.submit('000000', 'buy', None), None)
+    check.expect("보유 수량 없는 매도", engine.submit('000000', 'sell', PRICE), None)
+    check.expect("알 수 없는 주문 종류", engine.submit('000000', 'hold', PRICE), None)
+    first = engine.submit('000000', 'buy', PRICE)
+    check.expect("같은 종목의 접수 중 주문", engine.submit('000000', 'buy', PRICE), None)
+    check.expect("예수금 부족 (10만원 주문 후 잔액 5만원)", engine.submit('000001', 'buy', PRICE), None)
+    engine.wait()
+    check.expect("첫 주문 접수", first.result().accepted, True)
+    check.expect("브로커가 받은 주문", broker.orders, [('000000', 'buy', 10)])
+    engine.close()
+
+
+def check_broker_reject(check):
+    """브로커가 거부한 주문의 예약 예수금이 다음 주문 전 잔고 재조회로 복구되는지 확인합니다."""
+    broker = FakeBroker(cash=100000.0, latency=0.0, price=PRICE, reject_tickers={'000000'})
+    engine = _engine(broker)
+    engine.submit('000000', 'buy', PRICE)
+    orders = engine.wait()
+    check.expect("거부된 주문", [o.accepted for o in orders], [False])
+    second = engine.submit('000001', 'buy', PRICE)
+    engine.wait()
+    check.expect("거부 후 예수금 복구로 다음 주문 접수", second is not None and second.result().accepted, True)
+    check.expect("예수금 (캐시 = 브로커)", engine.account.cash, broker.cash)
+    engine.close()
+
+
+def check_close(check):
+    """close()가 주문 작업 스레드를 종료하고 체결 통보 구독을 해제하는지 확인합니다."""
+    broker = FakeBroker(cash=1000000.0, latency=0.01, price=PRICE)
+    engine = _engine(broker)
+    engine.submit('000000', 'buy', PRICE)
+    engine.close()
+    check.expect("close() 전 제출한 주문 완료", broker.orders, [('000000', 'buy', 10)])
+    check.expect("체결 통보 구독 해제", broker._subscribers, [])
+    check.expect("남은 주문 작업 스레드", [t.name for t in threading.enumerate() if t.name.startswith('order')], [])
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    check = Checker()
+    for fn in (check_fills, check_reconcile, check_rejections, check_broker_reject, check_close):
+        print(f"--- {fn.__doc__}")
+        fn(check)
+    if check.problems:
+        print(f"실패 {len(check.problems)}건: {', '.join(check.problems)}")
+        return 1
+    print("모든 점검 통과")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+벤치마크용 대역 객체.
+
+FakeKISApi는 종목별로 재현 가능한 합성 분봉/일봉을 반환하고(advance()로 새 분봉 추가),
+FakeBroker는 주문 접수 지연과 즉시 체결을 흉내 내는 로컬 증권사 대역(KISApi의 잔고/주문/체결 통보 메서드)이며,
+SQLiteDBHandler는 DBHandler와 같은 메서드를 SQLite(메모리)로 구현합니다.
+"""
+import sqlite3
+import threading
+import time as time_module
+import zlib
+from types import SimpleNamespace
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common.indicator_engine import INDICATOR_COLUMNS
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trading_value']
+TABLE_COLUMNS = ['ticker', 'timestamp'] + PRICE_COLUMNS + INDICATOR_COLUMNS
+
+
+class FakeBar:
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume', 'amount')
+
+    def __init__(self, time, open, high, low, close, volume, amount):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.amount = amount
+
+
+class FakeChart:
+    def __init__(self, bars):
+        self.bars = bars
+
+
+def _synthetic_bars(ticker, times):
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    close = 10000 + np.cumsum(rng.normal(0, 20, len(times)))
+    volume = rng.integers(1, 10000, len(times))
+    return [FakeBar(t, c - 5, c + 10, c - 10, c, int(v), c * v) for t, c, v in zip(times, close, volume)]
+
+
+class FakeKISApi:
+    """KISApi 대역. 오늘 09:00부터 minutes개 분봉과 최근 days개 일봉을 가진 것처럼 동작합니다."""
+
+    def __init__(self, minutes=390, days=250):
+        self.minutes = minutes
+        self.days = days
+        self._lock = threading.Lock()
+        self._day_bars = {}
+        self._daily_bars = {}
+
+    def advance(self, minutes=1):
+        """모든 종목에 새 분봉을 추가합니다. (다음 수집 주기 재현)"""
+        with self._lock:
+            self.minutes += minutes
+            self._day_bars.clear()
+
+    def _bars(self, cache, ticker, times):
+        with self._lock:
+            bars = cache.get(ticker)
+            if bars is None:
+                bars = cache[ticker] = _synthetic_bars(ticker, times)
+            return bars
+
+    def get_day_chart(self, ticker, start=None, max_age=None):
+        opening = datetime.combine(date.today(), time(9, 0))
+        times = [opening + timedelta(minutes=i) for i in range(self.minutes)]
+        bars = self._bars(self._day_bars, ticker, times)
+        if start:
+            start_time = start.time() if isinstance(start, datetime) else start
+            bars = [b for b in bars if b.time.time() >= start_time]
+        return FakeChart(bars)
+
+    def get_daily_chart(self, ticker, start_date=None, end_date=None, max_age=None):
+        today = datetime.combine(date.today(), time(0, 0))
+        times = [today - timedelta(days=self.days - 1 - i) for i in range(self.days)]
+        bars = self._bars(self._daily_bars, ticker, times)
+        if start_date:
+            bars = [b for b in bars if b.time.date() >= start_date]
+        return FakeChart(bars)
+
+
+class FakeBroker:
+    """
+    KISApi 주문 관련 메서드의 대역. 주문은 latency초(종목별로 다르게 하려면 {종목: 초}) 뒤에 접수되고
+    price(기본 10000)에 바로 체결되어 구독자에게 체결 통보를 보냅니다. 잔고 조회 횟수는 balance_calls에 기록됩니다.
+    reject_tickers의 주문은 KISApi.place_order의 실패와 같이 None을 반환하고 체결되지 않습니다.
+    """
+
+    def __init__(self, cash=100000000.0, positions=None, latency=0.05, price=10000.0, currency='KRW',
+                 reject_tickers=()):
+        self.reject_tickers = set(reject_tickers)
+        self.cash = {currency: float(cash)}
+        self.positions = dict(positions or {})
+        self.latency = latency
+        self.price = float(price)
+        self.currency = currency
+        self.balance_calls = 0
+        self.orders = []
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def prepare_stocks(self, tickers):
+        pass
+
+    def get_balance(self):
+        with self._lock:
+            self.balance_calls += 1
+            return SimpleNamespace(
+                deposits={c: SimpleNamespace(amount=a) for c, a in self.cash.items()},
+                stocks=[SimpleNamespace(symbol=t, qty=q, orderable=q) for t, q in self.positions.items() if q])
+
+    def place_order(self, ticker, order_type, quantity, price=None, condition=None):
+        latency = self.latency.get(ticker, 0.0) if isinstance(self.latency, dict) else self.latency
+        time_module.sleep(latency)
+        if ticker in self.reject_tickers:
+            return None
+        with self._lock:
+            if order_type == 'buy':
+                self.cash[self.currency] -= quantity * self.price
+                self.positions[ticker] = self.positions.get(ticker, 0) + quantity
+            else:
+                self.cash[self.currency] += quantity * self.price
+                self.positions[ticker] = self.positions.get(ticker, 0) - quantity
+            self.orders.append((ticker, order_type, quantity))
+            subscribers = list(self._subscribers)
+        execution = SimpleNamespace(symbol=ticker, type=order_type, qty=quantity, price=self.price)
+        for callback in subscribers:
+            callback(execution)
+        return SimpleNamespace(number=str(len(self.orders)), symbol=ticker)
+
+    def subscribe_executions(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return SimpleNamespace(unsubscribe=lambda: self._subscribers.remove(callback))
+
+
+class SQLiteDBHandler:
+    """DBHandler 대역. 시세 테이블을 메모리 SQLite에 (ticker, timestamp) 기본키로 만듭니다."""
+
+    def __init__(self, table_names=('stock_data_min', 'stock_data_day')):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._lock = threading.Lock()
+        self.config = {}
+        columns = ', '.join(f"{c} {'TEXT' if c in ('ticker', 'timestamp') else 'REAL'}" for c in TABLE_COLUMNS)
+        for table_name in table_names:
+            self.conn.execute(f"CREATE TABLE {table_name} ({columns}, PRIMARY KEY (ticker, timestamp))")
+
+    def insert_data(self, df, table_name):
+        if df.empty:
+            return 0, 0
+        return self.upsert_data(df, table_name)
+
+    def upsert_data(self, df, table_name, chunk_size=1000, conn=None):
+        df = df.drop_duplicates(subset=['ticker', 'timestamp'], keep='last')
+        columns = [c for c in TABLE_COLUMNS if c in df.columns]
+        df = df[columns].copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        update_sql = ', '.join(f"{c} = excluded.{c}" for c in columns[2:])
+        query = (f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))}) "
+                 f"ON CONFLICT (ticker, timestamp) DO UPDATE SET {update_sql}")
+        inserted = updated = 0
+        with self._lock:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                keys = ', '.join(['(?, ?)'] * len(chunk))
+                existing = self.conn.execute(
+                    f"SELECT COUNT(*) FROM {table_name} WHERE (ticker, timestamp) IN (VALUES {keys})",
+                    [value for row in chunk for value in row[:2]]).fetchone()[0]
+                self.conn.executemany(query, chunk)
+                inserted += len(chunk) - existing
+                updated += existing
+            self.conn.commit()
+        return inserted, updated
+
+    def _read(self, query, params=()):
+        with self._lock:
+            df = pd.read_sql(query, self.conn, params=params)
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def get_last_timestamp(self, ticker, table_name):
+        with self._lock:
+            value = self.conn.execute(f"SELECT MAX(timestamp) FROM {table_name} WHERE ticker = ?",
+                                      (ticker,)).fetchone()[0]
+        return datetime.fromisoformat(value) if value else None
+
+    def get_last_timestamps(self, table_names):
+        marks = {}
+        with self._lock:
+            for table_name in table_names:
+                for ticker, value in self.conn.execute(
+                        f"SELECT ticker, MAX(timestamp) FROM {table_name} GROUP BY ticker"):
+                    marks[(table_name, ticker)] = datetime.fromisoformat(value)
+        return marks
+
+    def get_history(self, ticker, table_name):
+        return self._read(f"SELECT * FROM {table_name} WHERE ticker = ? ORDER BY timestamp", (ticker,))
+
+    def get_last_n_rows(self, ticker, table_name, n=40):
+        df = self._read(f"SELECT * FROM {table_name} WHERE ticker = ? ORDER BY timestamp DESC LIMIT ?", (ticker, n))
+        return df.sort_values('timestamp')
+
+    def iter_rows_since(self, ticker, table_name, since=None, chunksize=100000):
+        if since is None:
+            df = self.get_history(ticker, table_name)
+        else:
+            df = self._read(f"SELECT * FROM {table_name} WHERE ticker = ? AND timestamp > ? ORDER BY timestamp",
+                            (ticker, since.strftime('%Y-%m-%d %H:%M:%S')))
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
@@ -0,0 +1,209 @@
+"""
+수집/보조지표/매매 판단 경로의 성능 벤치마크.
+
+외부 API와 MySQL 없이 재현할 수 있도록 합성 차트를 반환하는 FakeKISApi와 SQLite 기반 DBHandler 대역을 사용합니다.
+측정 항목:
+  - indicators/<길이>       : calculate_indicators (시계열 길이별)
+  - convert/<봉 수>         : pykis 형식 봉(Decimal 가격, 시간대 포함 시각) -> DataFrame 변환 (시간, 최대 할당량)
+  - collect/<종목 수>/cold  : 빈 DB에서 collect_data_job 1회 (지표 상태 복원 + 전체 저장)
+  - collect/<종목 수>/steady: 새 분봉 1개가 추가된 뒤의 collect_data_job 1회 (정상 운영 주기)
+  - trader/<종목 수>        : Trader.run (모델 로드 후 한 주기 전체)
+  - execution/<주문 수>     : ExecutionEngine으로 주문(접수 지연 20ms인 FakeBroker)을 모두 접수하기까지의 시간
+  - rollout/<환경 수>       : PPOAgent.collect로 BatchedTradingEnv를 64스텝 진행 (환경 스텝당 시간, steps/s 함께 출력)
+결과는 benchmarks/results/hot_paths.json에 저장되며, 이전 결과 대비 --tolerance 이상 느려진 항목이 있으면 1로 종료합니다.
+
+사용법: python benchmarks/hot_paths.py [--quick] [--only collect,trader] [--repeat 3] [--baseline 경로]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import ROOT, RESULTS_DIR, time_call, report
+
+sys.path.insert(0, ROOT)
+
+from fakes import FakeBar, FakeBroker, FakeKISApi, SQLiteDBHandler  # noqa: E402
+from common.bar_array import BarArray  # noqa: E402
+from common.utils import calculate_indicators  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'hot_paths.json')
+
+
+def _price_frame(rows, ticker='000000'):
+    rng = np.random.default_rng(0)
+    close = 10000 + np.cumsum(rng.normal(0, 20, rows))
+    return pd.DataFrame({
+        'ticker': ticker,
+        'timestamp': pd.date_range('2020-01-01 09:00', periods=rows, freq='min'),
+        'open': close - 5, 'high': close + 10, 'low': close - 10, 'close': close,
+        'volume': rng.integers(1, 10000, rows).astype(float),
+        'trading_value': close * 1000,
+    })
+
+
+def bench_indicators(lengths, repeat):
+    results = {}
+    for rows in lengths:
+        df = _price_frame(rows)
+        results[f"indicators/{rows}"] = {'seconds': time_call(lambda: calculate_indicators(df.copy()), repeat)}
+    return results
+
+
+def bench_convert(bar_counts, repeat):
+    opening = datetime(2020, 1, 2, 9, 0, tzinfo=ZoneInfo('Asia/Seoul'))
+    results = {}
+    for count in bar_counts:
+        bars = [FakeBar(opening + timedelta(minutes=i), Decimal('10000.5'), Decimal('10010'), Decimal('9990'),
+                        Decimal(10000 + i % 50), 100 + i, Decimal('1000050')) for i in range(count)]
+        convert = lambda: BarArray.from_bars('000000', bars).to_frame()
+        seconds = time_call(convert, repeat)
+        tracemalloc.start()
+        convert()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[f"convert/{count}"] = {'seconds': seconds, 'peak_kb': peak / 1024}
+    return results
+
+
+def bench_collect(ticker_counts, repeat):
+    import main
+    from database.watermark import WatermarkIndex
+
+    main.logger = logging.getLogger('main')
+    results = {}
+    for count in ticker_counts:
+        tickers = [f"{i:06d}" for i in range(count)]
+        cold, steady = [], []
+        for _ in range(repeat):
+            db = SQLiteDBHandler()
+            api = FakeKISApi()
+            main.indicator_engine.reset()
+            watermarks = WatermarkIndex(db, ['stock_data_min', 'stock_data_day'])
+            watermarks.load()
+            cold.append(time_call(lambda: main.collect_data_job(db, api, tickers, 8, None, watermarks), 1))
+            api.advance()
+            steady.append(time_call(lambda: main.collect_data_job(db, api, tickers, 8, None, watermarks), 1))
+        results[f"collect/{count}/cold"] = {'seconds': float(np.median(cold))}
+        results[f"collect/{count}/steady"] = {'seconds': float(np.median(steady))}
+    return results
+
+
+def bench_trader(ticker_counts, repeat):
+    import tensorflow as tf
+    from tensorflow.keras import layers
+    from core.data_pipeline import FEATURES
+    from core.feature_transform import FeatureTransform, artifact_path, file_digest
+    from core.trader import Trader
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            os.makedirs('models')
+            api = FakeKISApi()
+            for count in ticker_counts:
+                tickers = [f"{i:06d}" for i in range(count)]
+                for ticker in tickers:
+                    path = f"models/actor_{ticker}_v1.0_short.h5"
+                    if not os.path.exists(path):
+                        inputs = layers.Input(shape=(len(FEATURES),))
+                        x = layers.Dense(128, activation='relu')(inputs)
+                        x = layers.Dense(128, activation='relu')(x)
+                        tf.keras.Model(inputs, layers.Dense(3, activation='softmax')(x)).save(path)
+                        FeatureTransform(FEATURES, np.zeros(len(FEATURES)), np.ones(len(FEATURES)), 1, ticker,
+                                         'v1.0_short', file_digest(path)).save(artifact_path(path))
+                trader = Trader(api, None, {'domestic_tickers': ','.join(tickers), 'prediction_threshold': '75',
+                                            'mode': 'short', 'window_size': '1'})
+                results[f"trader/{count}"] = {'seconds': time_call(trader.run, repeat)}
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def bench_execution(order_counts, repeat):
+    from core.execution import ExecutionEngine
+
+    results = {}
+    for count in order_counts:
+        tickers = [f"{i:06d}" for i in range(count)]
+
+        def cycle():
+            broker = FakeBroker(latency=0.02)
+            engine = ExecutionEngine(broker, {'order_amount': '100000', 'order_workers': '4'}).start(tickers)
+            for ticker in tickers:
+                engine.submit(ticker, 'buy', broker.price)
+            engine.wait()
+            engine.close()
+        results[f"execution/{count}"] = {'seconds': time_call(cycle, repeat)}
+    return results
+
+
+def bench_rollout(env_counts, repeat, steps=64):
+    from core.model_trainer import ModelTrainer
+    from core.ppo import PPOAgent
+    from core.trading_env import BatchedTradingEnv
+
+    df = calculate_indicators(_price_frame(20000))
+    close = df['close'].to_numpy()
+    numeric = df.select_dtypes('number')
+    features = ((numeric - numeric.min()) / (numeric.max() - numeric.min() + 1e-9)).fillna(0.0)
+    trainer = ModelTrainer(SQLiteDBHandler(), {'domestic_tickers': '000000', 'bar_cache_dir': ''})
+    actor, critic = trainer._build_ppo_model(input_shape=(features.shape[1],), num_actions=3)
+    agent = PPOAgent(actor, critic, {}, seed=0)
+
+    results = {}
+    for count in env_counts:
+        env = BatchedTradingEnv([(features.to_numpy(np.float32), close)], num_envs=count, seed=0)
+        observations = env.reset()
+        agent.collect(env, observations, 2)  # 배치 크기별 그래프 추적은 측정에서 제외
+        seconds = time_call(lambda: agent.collect(env, observations, steps), repeat)
+        results[f"rollout/{count}"] = {'seconds': seconds, 'us_per_env_step': seconds / (steps * count) * 1e6}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="수집/보조지표/매매 판단 경로 벤치마크")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help="작은 크기로만 측정 (1000종목, 100만 행 제외)")
+    parser.add_argument('--only', default='', help="측정할 항목 (indicators,convert,collect,trader,execution,rollout 중 쉼표로 구분)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 판단할 증가 비율")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', help="비교할 결과 파일 (기본값: 이전 --output 결과)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = {
+        'indicators': [1000, 10000, 100000] + ([] if args.quick else [1000000]),
+        'convert': [390, 10000],
+        'collect': [10, 100] + ([] if args.quick else [1000]),
+        'trader': [10] + ([] if args.quick else [100]),
+        'execution': [10, 100],
+        'rollout': [1, 16, 256],
+    }
+    benches = {'indicators': bench_indicators, 'convert': bench_convert, 'collect': bench_collect,
+               'trader': bench_trader, 'execution': bench_execution, 'rollout': bench_rollout}
+    selected = [name.strip() for name in args.only.split(',') if name.strip()] or list(benches)
+
+    results = {}
+    for name in selected:
+        for key, metrics in benches[name](sizes[name], args.repeat).items():
+            results[key] = metrics
+            line = f"{key:28s} {metrics['seconds'] * 1000:10.1f} ms"
+            if 'us_per_env_step' in metrics:
+                line += f"  ({1e6 / metrics['us_per_env_step']:,.0f} steps/s)"
+            print(line)
+    return report(args.output, results, args.tolerance, args.baseline)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+실시간 분봉 수집 경로(ReplayFeed -> StreamingIngestor)의 정확성 점검.
+
+합성 체결을 ReplayFeed로 재생해 StreamingIngestor가 저장한 분봉/보조지표를, 같은 체결을 pandas resample로 1분봉으로
+만든 뒤 calculate_indicators를 적용한 결과와 비교합니다. 재생 체결에는 다음 경우가 섞여 있습니다.
+  - 분 경계: 정확히 hh:mm:00.000000 과 hh:mm:59.999999 에 발생한 체결
+  - 순서 바뀜: 같은 분 안에서 시각 순서가 뒤바뀌어 도착한 체결 (시가/종가는 체결 시각 기준)
+  - 늦은 체결: 다음 분 체결이 들어온 뒤 도착한 이전 분 체결 (집계에서 제외되어야 함)
+기준 결과는 종목별로 그때까지 도착한 가장 늦은 분보다 이전 분의 체결을 제외하고 계산합니다.
+일치하지 않는 봉이 있으면 내용을 출력하고 1로 종료합니다.
+
+사용법: python benchmarks/replay_check.py [--minutes 240] [--tickers 3] [--seed 0]
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import ROOT
+
+sys.path.insert(0, ROOT)
+
+from fakes import SQLiteDBHandler  # noqa: E402
+from api.realtime_feed import ReplayFeed  # noqa: E402
+from common.bar_aggregator import Tick, BAR_COLUMNS  # noqa: E402
+from common.indicator_engine import IndicatorEngine, INDICATOR_COLUMNS  # noqa: E402
+from common.utils import calculate_indicators  # noqa: E402
+from core.stream_ingestor import StreamingIngestor  # noqa: E402
+
+
+def synthetic_ticks(tickers, minutes, seed):
+    """도착 순서대로 정렬된 체결 목록 (분 경계, 같은 분 내 순서 바뀜, 늦은 체결 포함)"""
+    rng = np.random.default_rng(seed)
+    opening = datetime(2026, 1, 5, 9, 0)
+    arrivals = []
+    for ticker in tickers:
+        price = 10000.0
+        ticks = []
+        for minute in range(minutes):
+            start = opening + timedelta(minutes=minute)
+            # 체결이 없는 분도 섞습니다.
+            if rng.random() < 0.05:
+                continue
+            offsets = sorted(rng.integers(1, 59_999_999, rng.integers(1, 8)).tolist())
+            if minute % 7 == 0:
+                offsets = [0] + offsets
+            if minute % 11 == 0:
+                offsets.append(59_999_999)
+            minute_ticks = []
+            for offset in offsets:
+                price = max(1.0, price + rng.normal(0, 5))
+                minute_ticks.append(Tick(ticker, start + timedelta(microseconds=offset), round(price),
+                                         float(rng.integers(1, 500))))
+            # 같은 분 안에서 두 체결의 도착 순서를 바꿉니다.
+            if len(minute_ticks) > 2 and minute % 3 == 0:
+                minute_ticks[0], minute_ticks[-1] = minute_ticks[-1], minute_ticks[0]
+            ticks.append(minute_ticks)
+        # 늦은 체결: 일부 분의 마지막 체결을 다음 분의 첫 체결 뒤로 보냅니다.
+        flat = []
+        for i, minute_ticks in enumerate(ticks):
+            flat.extend(minute_ticks)
+            if i % 5 == 4 and i + 1 < len(ticks) and len(minute_ticks) > 1:
+                late = flat.pop(len(flat) - 1)
+                ticks[i + 1].insert(1, late)
+        arrivals.append(flat)
+    # 종목 간에는 체결 시각 순으로 섞되, 종목 내 도착 순서는 유지합니다.
+    merged = []
+    positions = [0] * len(arrivals)
+    while any(p < len(a) for p, a in zip(positions, arrivals)):
+        candidates = [i for i, a in enumerate(arrivals) if positions[i] < len(a)]
+        i = min(candidates, key=lambda c: arrivals[c][positions[c]].timestamp)
+        merged.append(arrivals[i][positions[i]])
+        positions[i] += 1
+    return merged
+
+
+def expected_bars(ticks):
+    """늦은 체결을 제외하고 resample + calculate_indicators로 만든 기준 분봉 (보조지표 결측 행 제외)"""
+    latest, accepted, late = {}, [], 0
+    for tick in ticks:
+        minute = tick.timestamp.replace(second=0, microsecond=0)
+        if tick.ticker in latest and minute < latest[tick.ticker]:
+            late += 1
+            continue
+        latest[tick.ticker] = minute
+        accepted.append((tick.ticker, tick.timestamp, tick.price, tick.volume, tick.trading_value))
+    df = pd.DataFrame(accepted, columns=['ticker', 'timestamp', 'price', 'volume', 'trading_value'])
+
+    frames = []
+    for ticker, group in df.groupby('ticker', sort=False):
+        group = group.sort_values('timestamp', kind='stable').set_index('timestamp')
+        bars = group['price'].resample('1min').ohlc()
+        bars['volume'] = group['volume'].resample('1min').sum()
+        bars['trading_value'] = group['trading_value'].resample('1min').sum()
+        bars = bars.dropna(subset=['open']).reset_index()
+        bars.insert(0, 'ticker', ticker)
+        frames.append(calculate_indicators(bars[BAR_COLUMNS]).dropna())
+    return pd.concat(frames, ignore_index=True), late
+
+
+def replayed_bars(ticks):
+    """ReplayFeed로 재생해 StreamingIngestor가 저장한 분봉"""
+    stored = []
+    ingestor = StreamingIngestor(SQLiteDBHandler(), ReplayFeed(ticks), IndicatorEngine(),
+                                 lambda df, table_name, ticker: stored.append(df),
+                                 {'stream_idle_close_seconds': 0})
+    ingestor.start()
+    ingestor.feed.join()
+    ingestor.stop(close_open_bars=True)
+    return pd.concat(stored, ignore_index=True), ingestor.aggregator.late_ticks
+
+
+def compare(expected, actual):
+    """두 분봉 결과를 (종목, 시간)으로 맞춰 비교합니다. 반환값: 불일치 설명 목록"""
+    columns = BAR_COLUMNS[2:] + list(INDICATOR_COLUMNS)
+    expected = expected.set_index(['ticker', 'timestamp']).sort_index()
+    actual = actual.set_index(['ticker', 'timestamp']).sort_index()
+    problems = []
+    if not expected.index.equals(actual.index):
+        missing = expected.index.difference(actual.index)
+        extra = actual.index.difference(expected.index)
+        problems.append(f"봉 구성이 다릅니다: 누락 {len(missing)}개 {list(missing[:3])}, 추가 {len(extra)}개 {list(extra[:3])}")
+        common = expected.index.intersection(actual.index)
+        expected, actual = expected.loc[common], actual.loc[common]
+    for col in columns:
+        left = expected[col].to_numpy(dtype=np.float64)
+        right = actual[col].to_numpy(dtype=np.float64)
+        bad = ~np.isclose(left, right, rtol=1e-9, atol=1e-9)
+        if bad.any():
+            first = expected.index[np.flatnonzero(bad)[0]]
+            problems.append(f"{col}: {bad.sum()}개 봉 불일치 (처음: {first}, 기준 {left[bad][0]}, 재생 {right[bad][0]})")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReplayFeed -> StreamingIngestor 분봉/보조지표 정확성 점검")
+    parser.add_argument('--minutes', type=int, default=240)
+    parser.add_argument('--tickers', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    ticks = synthetic_ticks([f"{i:06d}" for i in range(args.tickers)], args.minutes, args.seed)
+    expected, expected_late = expected_bars(ticks)
+    actual, late = replayed_bars(ticks)
+
+    problems = compare(expected, actual)
+    if late != expected_late:
+        problems.append(f"제외한 늦은 체결 수가 다릅니다: 기준 {expected_late}건, 재생 {late}건")
+    print(f"체결 {len(ticks)}건 재생, 늦은 체결 {late}건 제외, 봉 {len(actual)}개 저장 (기준 {len(expected)}개)")
+    for problem in problems:
+        print(f"불일치: {problem}")
+    if not problems:
+        print("분봉과 보조지표가 resample + calculate_indicators 결과와 일치합니다.")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+실행 모드별 시작 비용(모듈 import 시간, 최대 RSS)을 측정하는 벤치마크.
+
+각 모드는 새 파이썬 프로세스에서 main 모듈을 불러온 뒤 모드 시작 함수와 같은 경로(main._mode_module)로 모드 모듈을 불러오며,
+결과를 JSON으로 저장하고 이전 결과보다 허용 비율 이상 느려지거나 커지면 회귀로 표시합니다.
+
+사용법: python benchmarks/startup_benchmark.py [--repeat 5] [--tolerance 0.25] [--output 경로]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from bench_utils import ROOT, RESULTS_DIR, report
+
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'startup.json')
+
+_PROBE = """
+import json, resource, time
+started = time.perf_counter()
+import main
+main._mode_module({mode!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'import_seconds': elapsed,
+                  'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def measure(mode, repeat):
+    """새 프로세스에서 mode의 import 시간과 최대 RSS를 repeat번 측정해 중앙값을 반환합니다."""
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(mode=mode)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'import_seconds': statistics.median(s['import_seconds'] for s in samples),
+        'max_rss_mb': statistics.median(s['max_rss_mb'] for s in samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="실행 모드별 시작 비용 벤치마크")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 판단할 증가 비율")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    from main import MODE_MODULES
+
+    current = {}
+    for mode in MODE_MODULES:
+        current[mode] = measure(mode, args.repeat)
+        print(f"{mode:8s} import {current[mode]['import_seconds']:.3f}s, max RSS {current[mode]['max_rss_mb']:.1f}MB")
+    return report(args.output, current, args.tolerance)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import threading
+
+import pandas as pd
+
+# 집계한 봉의 컬럼 (BarArray.to_frame과 같은 DB 저장 형식)
+BAR_COLUMNS = ['ticker', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'trading_value']
+
+
+class Tick:
+    """실시간 체결 한 건 (volume/trading_value는 해당 체결의 거래량/거래대금)"""
+    __slots__ = ('ticker', 'timestamp', 'price', 'volume', 'trading_value')
+
+    def __init__(self, ticker, timestamp, price, volume, trading_value=None):
+        self.ticker = ticker
+        self.timestamp = timestamp
+        self.price = float(price)
+        self.volume = float(volume)
+        self.trading_value = self.price * self.volume if trading_value is None else float(trading_value)
+
+
+class _Bar:
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'trading_value', 'first', 'last')
+
+    def __init__(self, timestamp, price, tick_time):
+        self.timestamp = timestamp
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.0
+        self.trading_value = 0.0
+        # 시가/종가는 도착 순서가 아니라 체결 시각 기준의 첫/마지막 체결로 정합니다.
+        self.first = self.last = tick_time
+
+    def as_row(self, ticker):
+        return (ticker, self.timestamp, self.open, self.high, self.low, self.close, self.volume, self.trading_value)
+
+
+class MinuteBarAggregator:
+    """
+    실시간 체결을 종목별 1분봉(OHLCV, 거래대금)으로 집계합니다.
+    봉의 시간은 분 시작 시각이며, 같은 종목의 다음 분 체결이 들어오거나 flush()로 해당 분이 지났음이
+    확인되면 봉이 완성되어 반환됩니다. 진행 중인 봉보다 이전 분의 체결(이미 지난 분에 늦게 도착한 체결)은 무시하고,
+    같은 분 안에서 순서가 바뀌어 도착한 체결은 체결 시각 순서대로 시가/종가에 반영합니다.
+    """
+
+    def __init__(self):
+        self._bars = {}
+        self._closed_until = {}
+        self._lock = threading.Lock()
+        # 이미 지난 분에 늦게 도착해 버린 체결 수
+        self.late_ticks = 0
+
+    @staticmethod
+    def _naive(timestamp):
+        return timestamp.replace(tzinfo=None) if timestamp.tzinfo is not None else timestamp
+
+    @classmethod
+    def _minute(cls, timestamp):
+        # 체결마다 호출되므로 pandas 변환 없이 datetime 연산으로 분 시작 시각을 구합니다.
+        return cls._naive(timestamp).replace(second=0, microsecond=0)
+
+    def add(self, tick):
+        """체결 한 건을 반영합니다. 반환값: 이번 체결로 완성된 봉 행 목록"""
+        tick_time = self._naive(tick.timestamp)
+        minute = self._minute(tick_time)
+        closed = []
+        with self._lock:
+            closed_until = self._closed_until.get(tick.ticker)
+            bar = self._bars.get(tick.ticker)
+            if (closed_until is not None and minute <= closed_until) or (bar is not None and minute < bar.timestamp):
+                self.late_ticks += 1
+                return closed
+
+            if bar is not None and minute > bar.timestamp:
+                closed.append(bar.as_row(tick.ticker))
+                self._closed_until[tick.ticker] = bar.timestamp
+                bar = None
+            if bar is None:
+                bar = self._bars[tick.ticker] = _Bar(minute, tick.price, tick_time)
+
+            bar.high = max(bar.high, tick.price)
+            bar.low = min(bar.low, tick.price)
+            if tick_time < bar.first:
+                bar.first, bar.open = tick_time, tick.price
+            if tick_time >= bar.last:
+                bar.last, bar.close = tick_time, tick.price
+            bar.volume += tick.volume
+            bar.trading_value += tick.trading_value
+        return closed
+
+    def flush(self, ticker, now):
+        """종목의 진행 중인 봉이 now 기준으로 끝난 분이면 완성 처리합니다. 반환값: 완성된 봉 행 목록"""
+        with self._lock:
+            bar = self._bars.get(ticker)
+            if bar is None or self._minute(now) <= bar.timestamp:
+                return []
+            del self._bars[ticker]
+            self._closed_until[ticker] = bar.timestamp
+            return [bar.as_row(ticker)]
+
+    def close_all(self):
+        """진행 중인 모든 봉을 완성 처리합니다. (스트림 종료 시)"""
+        with self._lock:
+            rows = [bar.as_row(ticker) for ticker, bar in self._bars.items()]
+            for ticker, bar in self._bars.items():
+                self._closed_until[ticker] = bar.timestamp
+            self._bars.clear()
+        return rows
+
+    def open_tickers(self):
+        with self._lock:
+            return list(self._bars)
+
+    @staticmethod
+    def to_frame(rows):
+        """봉 행 목록을 DataFrame으로 변환합니다."""
+        return pd.DataFrame(rows, columns=BAR_COLUMNS)
+
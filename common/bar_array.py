@@ -0,0 +1,78 @@
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+
+# (BarArray 속성, pykis 봉 속성)
+_PRICE_FIELDS = (('open', 'open'), ('high', 'high'), ('low', 'low'), ('close', 'close'),
+                 ('trading_value', 'amount'))
+
+
+def _timestamps(times):
+    """datetime 목록을 거래소 현지 시각 기준의 datetime64[us] 배열로 변환합니다. (시간대 정보 제거)"""
+    tz = times[0].tzinfo if times else None
+    if tz is None:
+        return pd.DatetimeIndex(times).to_numpy(dtype='datetime64[us]')
+    # 시간대가 있는 datetime은 epoch 초로 한 번에 바꾼 뒤 벡터 연산으로 현지 시각을 구합니다. (서머타임 반영)
+    epoch = np.fromiter((t.timestamp() for t in times), dtype=np.float64, count=len(times))
+    local = pd.to_datetime(epoch, unit='s', utc=True).tz_convert(tz).tz_localize(None)
+    return local.to_numpy(dtype='datetime64[us]')
+
+
+class BarArray:
+    """
+    한 종목의 봉 데이터를 컬럼별 NumPy 배열(float64, 거래량은 int64)로 보관하는 컨테이너.
+    pykis 봉 목록을 봉마다 dict를 만들지 않고 컬럼 단위로 한 번에 변환하며,
+    슬라이싱(after, 인덱싱)은 복사 없이 같은 배열의 뷰를 공유합니다.
+    """
+    __slots__ = ('ticker', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'trading_value')
+
+    def __init__(self, ticker, timestamp, open, high, low, close, volume, trading_value):
+        self.ticker = ticker
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.trading_value = trading_value
+
+    @classmethod
+    def from_bars(cls, ticker, bars):
+        """pykis 차트 봉 목록(time, open, high, low, close, volume, amount)을 변환합니다."""
+        bars = list(bars)
+        n = len(bars)
+        columns = {name: np.fromiter(map(attrgetter(attr), bars), dtype=np.float64, count=n)
+                   for name, attr in _PRICE_FIELDS}
+        volume = np.fromiter(map(attrgetter('volume'), bars), dtype=np.int64, count=n)
+        timestamp = _timestamps(list(map(attrgetter('time'), bars)))
+        return cls(ticker, timestamp, volume=volume, **columns)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        return BarArray(self.ticker, *(getattr(self, name)[index] for name in self.__slots__[1:]))
+
+    def sorted(self):
+        """시간순으로 정렬하고 같은 시간의 봉은 마지막 값만 남깁니다. 이미 정렬되어 있으면 자신을 반환합니다."""
+        ts = self.timestamp
+        if len(ts) < 2 or (ts[1:] > ts[:-1]).all():
+            return self
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        keep = np.append(ts[1:] != ts[:-1], True)
+        return self[order[keep]]
+
+    def after(self, ts):
+        """ts 이후의 봉만 담은 뷰를 반환합니다. (정렬된 상태에서 사용)"""
+        start = np.searchsorted(self.timestamp, np.datetime64(pd.Timestamp(ts).to_datetime64(), 'us'), side='right')
+        return self[start:]
+
+    def to_frame(self, extra=None):
+        """DB 저장 형식의 DataFrame을 만듭니다. extra({컬럼: 배열})는 뒤에 이어 붙입니다."""
+        data = {'ticker': self.ticker, 'timestamp': self.timestamp, 'open': self.open, 'high': self.high,
+                'low': self.low, 'close': self.close, 'volume': self.volume, 'trading_value': self.trading_value}
+        if extra:
+            data.update(extra)
+        return pd.DataFrame(data, copy=False)
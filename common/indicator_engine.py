@@ -0,0 +1,205 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+INDICATOR_COLUMNS = ['ma5', 'ma20', 'rsi', 'macd', 'bollinger_upper', 'bollinger_lower', 'vwap']
+NUMERIC_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'trading_value']
+
+
+def _ewm_alpha(span):
+    # pandas ewm(span=...)과 동일한 방식으로 alpha를 계산합니다.
+    com = (span - 1) / 2.0
+    return 1.0 / (1.0 + com)
+
+
+def _ewm_step(prev, value, alpha):
+    # pandas ewm(adjust=False)의 갱신식과 같은 연산 순서를 사용합니다.
+    old_wt = 1.0 - alpha
+    return (old_wt * prev + alpha * value) / (old_wt + alpha)
+
+
+class _IndicatorState:
+    """한 종목(테이블)의 보조지표 계산 상태"""
+    __slots__ = ('last_ts', 'last_close', 'closes', 'gains', 'losses',
+                 'ema_fast', 'ema_slow', 'signal', 'cum_vol', 'cum_pv')
+
+    def __init__(self):
+        self.last_ts = None
+        self.last_close = None
+        self.closes = deque(maxlen=20)
+        self.gains = deque(maxlen=14)
+        self.losses = deque(maxlen=14)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.cum_vol = 0.0
+        self.cum_pv = 0.0
+
+
+class IndicatorEngine:
+    """
+    종목별 보조지표를 증분 방식으로 계산하는 엔진.
+    이동평균/RSI 윈도우, MACD EWM 상태, VWAP 누적합을 메모리에 유지하여
+    새 봉마다 O(1)로 갱신하며, 결과는 전체 시계열에 calculate_indicators를 적용한 값과 같습니다.
+    """
+
+    ALPHA_FAST = _ewm_alpha(12)
+    ALPHA_SLOW = _ewm_alpha(26)
+    ALPHA_SIGNAL = _ewm_alpha(9)
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def is_seeded(self, key):
+        with self._lock:
+            return key in self._states
+
+    def last_timestamp(self, key):
+        with self._lock:
+            state = self._states.get(key)
+        return state.last_ts if state else None
+
+    def reset(self, key=None):
+        """상태를 초기화합니다. key가 없으면 전체를 초기화합니다."""
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+    def seed(self, key, history):
+        """DB 등에서 읽은 과거 봉 데이터로 상태를 한 번에 초기화합니다."""
+        state = _IndicatorState()
+        if history is not None and not history.empty:
+            df = history.sort_values('timestamp')
+            close = pd.to_numeric(df['close']).astype(float)
+            volume = pd.to_numeric(df['volume']).astype(float)
+
+            delta = close.diff()
+            gain = delta.where(delta > 0, 0)
+            loss = -delta.where(delta < 0, 0)
+
+            exp1 = close.ewm(span=12, adjust=False).mean()
+            exp2 = close.ewm(span=26, adjust=False).mean()
+            macd = exp1 - exp2
+            signal = macd.ewm(span=9, adjust=False).mean()
+
+            state.last_ts = df['timestamp'].iloc[-1]
+            state.last_close = float(close.iloc[-1])
+            state.closes.extend(close.iloc[-20:].tolist())
+            state.gains.extend(gain.iloc[-14:].tolist())
+            state.losses.extend(loss.iloc[-14:].tolist())
+            state.ema_fast = float(exp1.iloc[-1])
+            state.ema_slow = float(exp2.iloc[-1])
+            state.signal = float(signal.iloc[-1])
+            state.cum_vol = float(volume.sum())
+            state.cum_pv = float((close * volume).sum())
+
+        with self._lock:
+            self._states[key] = state
+
+    def update(self, key, bars):
+        """
+        새 봉 데이터에 보조지표를 계산해 반환합니다.
+        이미 반영된 시간 이하의 봉은 제외되며, 상태는 반환된 봉까지 갱신됩니다.
+        """
+        with self._lock:
+            state = self._states.setdefault(key, _IndicatorState())
+
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+
+        df = bars.sort_values('timestamp').drop_duplicates(subset=['timestamp'], keep='last')
+        if state.last_ts is not None:
+            df = df[df['timestamp'] > state.last_ts]
+        if df.empty:
+            return pd.DataFrame()
+        df = df.reset_index(drop=True)
+
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col])
+
+        out = self._run(state, df['close'].to_numpy(dtype=float), df['volume'].to_numpy(dtype=float))
+        for j, col in enumerate(INDICATOR_COLUMNS):
+            df[col] = out[:, j]
+        state.last_ts = df['timestamp'].iloc[-1]
+        return df
+
+    def update_bars(self, key, bars):
+        """
+        update와 같지만 BarArray를 받습니다. 이미 반영된 봉은 DataFrame을 만들기 전에 배열 뷰로 잘라내고,
+        새 봉만 DB 저장 형식의 DataFrame으로 만들어 반환합니다.
+        """
+        with self._lock:
+            state = self._states.setdefault(key, _IndicatorState())
+
+        if bars is None or len(bars) == 0:
+            return pd.DataFrame()
+
+        bars = bars.sorted()
+        if state.last_ts is not None:
+            bars = bars.after(state.last_ts)
+        if len(bars) == 0:
+            return pd.DataFrame()
+
+        out = self._run(state, bars.close, bars.volume.astype(np.float64))
+        state.last_ts = pd.Timestamp(bars.timestamp[-1])
+        return bars.to_frame({col: out[:, j] for j, col in enumerate(INDICATOR_COLUMNS)})
+
+    def _run(self, state, closes, volumes):
+        """봉들을 차례로 반영하고 봉별 보조지표 배열 (봉 수 x 지표 수)을 반환합니다."""
+        out = np.empty((len(closes), len(INDICATOR_COLUMNS)))
+        for i in range(len(closes)):
+            out[i] = self._step(state, closes[i], volumes[i])
+        return out
+
+    def _step(self, state, close, volume):
+        """봉 하나를 반영하고 (ma5, ma20, rsi, macd, bollinger_upper, bollinger_lower, vwap)을 반환합니다."""
+        if state.last_close is None:
+            gain = loss = 0.0
+        else:
+            delta = close - state.last_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+        state.last_close = close
+        state.closes.append(close)
+        state.gains.append(gain)
+        state.losses.append(loss)
+
+        # 이동평균
+        n20 = len(state.closes)
+        last5 = list(state.closes)[-5:]
+        ma5 = math.fsum(last5) / len(last5)
+        ma20 = math.fsum(state.closes) / n20
+
+        # RSI
+        avg_gain = math.fsum(state.gains) / len(state.gains)
+        avg_loss = math.fsum(state.losses) / len(state.losses)
+        rsi = 100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+
+        # MACD
+        if state.ema_fast is None:
+            state.ema_fast = state.ema_slow = close
+        else:
+            state.ema_fast = _ewm_step(state.ema_fast, close, self.ALPHA_FAST)
+            state.ema_slow = _ewm_step(state.ema_slow, close, self.ALPHA_SLOW)
+        macd = state.ema_fast - state.ema_slow
+        state.signal = macd if state.signal is None else _ewm_step(state.signal, macd, self.ALPHA_SIGNAL)
+
+        # 볼린저 밴드 (표본표준편차, 값이 1개이면 NaN)
+        if n20 > 1:
+            std = math.sqrt(math.fsum((c - ma20) ** 2 for c in state.closes) / (n20 - 1))
+        else:
+            std = math.nan
+
+        # VWAP (시계열 시작부터 누적)
+        state.cum_vol += volume
+        state.cum_pv += close * volume
+        vwap = state.cum_pv / (state.cum_vol if state.cum_vol != 0 else 1e-10)
+
+        return ma5, ma20, rsi, macd - state.signal, ma20 + 2 * std, ma20 - 2 * std, vwap
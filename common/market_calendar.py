@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime, time as dtime, timedelta
+from zoneinfo import ZoneInfo
+
+# 시장별 (시간대, 정규장 시작, 정규장 종료)
+MARKET_SESSIONS = {
+    'KRX': ('Asia/Seoul', dtime(9, 0), dtime(15, 30)),
+    'US': ('America/New_York', dtime(9, 30), dtime(16, 0)),
+}
+
+
+def market_of(ticker):
+    """종목 코드가 숫자로만 되어 있으면 국내(KRX), 아니면 미국 시장으로 봅니다."""
+    return 'KRX' if ticker.isdigit() else 'US'
+
+
+def _parse_dates(value):
+    dates = set()
+    for item in str(value or '').split(','):
+        item = item.strip()
+        if item:
+            dates.add(datetime.strptime(item, '%Y%m%d').date())
+    return dates
+
+
+class MarketCalendar:
+    """
+    시장별 정규장 시간과 휴장일로 현재 장이 열려 있는지 판단합니다.
+    주말과 설정 파일의 휴장일(krx_holidays, us_holidays)은 휴장으로 보고,
+    장 종료 후 session_grace_minutes분까지는 마지막 봉과 당일 일봉을 받기 위해 열린 것으로 봅니다.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.holidays = {
+            'KRX': _parse_dates(self.config.get('krx_holidays', '')),
+            'US': _parse_dates(self.config.get('us_holidays', '')),
+        }
+        self.grace = timedelta(minutes=float(self.config.get('session_grace_minutes', 5)))
+        self.zones = {market: ZoneInfo(zone) for market, (zone, _, _) in MARKET_SESSIONS.items()}
+
+    def is_open(self, market, now=None):
+        """market이 now(기본값: 현재) 시점에 정규장(+유예 시간) 중인지 반환합니다."""
+        _, open_time, close_time = MARKET_SESSIONS[market]
+        local = (now or datetime.now().astimezone()).astimezone(self.zones[market])
+        if local.weekday() >= 5 or local.date() in self.holidays[market]:
+            return False
+        opening = datetime.combine(local.date(), open_time, local.tzinfo)
+        closing = datetime.combine(local.date(), close_time, local.tzinfo) + self.grace
+        return opening <= local <= closing
+
+    def open_tickers(self, tickers, now=None):
+        """tickers 중 장이 열려 있는 시장의 종목만 반환합니다."""
+        now = now or datetime.now().astimezone()
+        status = {market: self.is_open(market, now) for market in MARKET_SESSIONS}
+        return [ticker for ticker in tickers if status[market_of(ticker)]]
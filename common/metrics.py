@@ -0,0 +1,200 @@
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 지연 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class _Histogram:
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'started')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    단계별 지연 시간(히스토그램)과 처리량/오류 건수(카운터)를 모으는 저장소.
+    Prometheus 텍스트 형식으로 로컬 HTTP 엔드포인트(/metrics)에 노출하고, 주기적으로 요약을 로그로 남길 수 있습니다.
+    비활성 상태에서는 timer()가 아무 일도 하지 않는 컨텍스트를 반환하고 inc/observe는 바로 반환하므로 부하가 거의 없습니다.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self.logger = logging.getLogger(__name__)
+        self._histograms = {}
+        self._counters = {}
+        self._last_summary = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._summary_thread = None
+        self._stop = threading.Event()
+
+    def configure(self, config):
+        """설정([METRICS] 섹션)에 따라 수집, HTTP 엔드포인트, 주기적 요약 로그를 시작합니다."""
+        self.enabled = str(config.get('enabled', 'False')).lower() in ('true', '1', 'yes', 'on')
+        if not self.enabled:
+            return
+        port = int(config.get('port', 0))
+        if port:
+            self.start_http_server(port, config.get('host', '127.0.0.1'))
+        interval = float(config.get('summary_interval_minutes', 0))
+        if interval > 0:
+            self.start_summary_log(interval * 60)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def timer(self, name, **labels):
+        """with 블록의 실행 시간을 name 히스토그램에 기록합니다."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.sum += value
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @staticmethod
+    def _format_labels(labels, extra=None):
+        items = list(labels) + ([extra] if extra else [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+    def render(self):
+        """Prometheus 텍스트 형식으로 모든 지표를 반환합니다."""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.count, h.sum) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), (counts, count, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{self._format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {total}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """직전 요약 이후 구간의 항목별 호출 수/평균 지연 시간과 카운터 증가량을 한 줄씩 반환합니다."""
+        with self._lock:
+            histograms = {key: (h.count, h.sum) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        previous, self._last_summary = self._last_summary, {**histograms, **counters}
+
+        lines = []
+        for (name, labels), (count, total) in sorted(histograms.items()):
+            prev_count, prev_sum = previous.get((name, labels), (0, 0.0))
+            if count > prev_count:
+                n = count - prev_count
+                lines.append(f"{name}{self._format_labels(labels)}: {n}회, 평균 {(total - prev_sum) / n * 1000:.1f}ms")
+        for (name, labels), value in sorted(counters.items()):
+            delta = value - previous.get((name, labels), 0)
+            if delta:
+                lines.append(f"{name}{self._format_labels(labels)}: +{delta}")
+        return lines
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        """/metrics 경로로 지표를 제공하는 HTTP 서버를 백그라운드 스레드로 시작합니다."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 수집 요청마다 로그를 남기지 않습니다.
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            self.logger.error(f"지표 HTTP 서버 시작 실패 ({host}:{port}): {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        self.logger.info(f"지표 HTTP 서버 시작: http://{host}:{self._server.server_address[1]}/metrics")
+
+    def start_summary_log(self, interval_seconds):
+        """interval_seconds마다 지표 요약을 로그로 남기는 스레드를 시작합니다."""
+        def run():
+            while not self._stop.wait(interval_seconds):
+                lines = self.summary()
+                if lines:
+                    self.logger.info("지표 요약 (최근 구간)\n  " + "\n  ".join(lines))
+
+        self._summary_thread = threading.Thread(target=run, name='metrics-summary', daemon=True)
+        self._summary_thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# 프로세스 전체에서 공유하는 지표 저장소 (설정으로 활성화하기 전에는 아무것도 기록하지 않음)
+metrics = MetricsRegistry()
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+
+from common.metrics import metrics
+
+
+class _Job:
+    def __init__(self, name, func, interval_minutes, offset_seconds):
+        self.name = name
+        self.func = func
+        self.interval = int(interval_minutes) * 60
+        self.offset = float(offset_seconds)
+        self.thread = None
+
+    def next_run(self, now):
+        """now 이후 처음 오는 (interval 분 경계 + offset) 시각을 반환합니다."""
+        boundary = (now - self.offset) // self.interval * self.interval + self.offset
+        return boundary + self.interval
+
+
+class MinuteScheduler:
+    """
+    분 경계에 맞춰 작업을 실행하는 스케줄러.
+    작업마다 전용 스레드에서 실행하므로 한 작업이 오래 걸려도 다른 작업이 밀리지 않고,
+    같은 작업은 이전 실행이 끝나기 전에 다시 시작하지 않습니다. (지나간 실행 시점은 건너뜀)
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._jobs = []
+        self._stop = threading.Event()
+        self._started = False
+
+    def add_job(self, name, func, interval_minutes=1, offset_seconds=0):
+        """func를 interval_minutes분 경계마다(offset_seconds초 뒤에) 실행하도록 등록합니다."""
+        job = _Job(name, func, interval_minutes, offset_seconds)
+        self._jobs.append(job)
+        if self._started:
+            self._start_job(job)
+        return job
+
+    def start(self):
+        self._started = True
+        for job in self._jobs:
+            if job.thread is None:
+                self._start_job(job)
+        return self
+
+    def _start_job(self, job):
+        job.thread = threading.Thread(target=self._run_job, args=(job,), name=f"job-{job.name}", daemon=True)
+        job.thread.start()
+
+    def _run_job(self, job):
+        due = job.next_run(time.time())
+        while not self._stop.wait(max(0.0, due - time.time())):
+            started = time.time()
+            metrics.observe('scheduler_lag_seconds', started - due, job=job.name)
+            try:
+                with metrics.timer('scheduler_job_seconds', job=job.name):
+                    job.func()
+            except Exception as e:
+                self.logger.error(f"예약 작업 '{job.name}' 실행 중 오류 발생: {e}", exc_info=True)
+
+            next_due = job.next_run(time.time())
+            skipped = int((next_due - due) // job.interval) - 1
+            if skipped > 0:
+                metrics.inc('scheduler_skipped_runs_total', skipped, job=job.name)
+                self.logger.warning(f"예약 작업 '{job.name}'이(가) {time.time() - started:.1f}초 걸려 "
+                                    f"{skipped}회 실행을 건너뜁니다.")
+            due = next_due
+
+    def wait(self):
+        """stop()이 호출될 때까지 대기합니다. (Ctrl+C로 중단 가능)"""
+        while not self._stop.wait(1):
+            pass
+
+    def stop(self, timeout=None):
+        """새 실행을 멈추고, 실행 중인 작업이 끝나기를 timeout초까지 기다립니다."""
+        self._stop.set()
+        for job in self._jobs:
+            if job.thread:
+                job.thread.join(timeout)
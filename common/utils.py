@@ -46,4 +46,136 @@ def calculate_indicators(df):
         cum_vol = df['volume'].cumsum()
         df['vwap'] = (df['close'] * df['volume']).cumsum() / cum_vol.replace(0, 1e-10)
 
-    return df
\ No newline at end of file
+    return df
+
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'trading_value']
+
+
+def to_panel(df):
+    """
+    여러 종목의 데이터프레임(ticker, timestamp, ...)을 (종목 × 시간) 패널 배열로 변환합니다.
+    각 종목의 시계열은 왼쪽 정렬되며, 길이가 짧은 종목의 나머지 칸은 NaN(NaT)으로 채워집니다.
+    반환값: (tickers, lengths, panel) - panel은 컬럼명 -> 2차원 배열 딕셔너리
+    """
+    codes, tickers = pd.factorize(df['ticker'], sort=True)
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    order = np.lexsort((timestamps, codes))
+    codes = codes[order]
+    lengths = np.bincount(codes, minlength=len(tickers))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.arange(len(codes)) - starts[codes]
+    shape = (len(tickers), int(lengths.max()) if len(lengths) else 0)
+
+    panel = {}
+    ts_panel = np.full(shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+    ts_panel[codes, positions] = timestamps[order]
+    panel['timestamp'] = ts_panel
+    for col in PANEL_FIELDS:
+        if col in df.columns:
+            values = np.full(shape, np.nan)
+            values[codes, positions] = pd.to_numeric(df[col]).to_numpy(dtype=float)[order]
+            panel[col] = values
+    return np.asarray(tickers), lengths, panel
+
+
+def from_panel(tickers, lengths, panel):
+    """to_panel/calculate_indicators_panel 결과를 다시 종목별 행 형태의 데이터프레임으로 변환합니다."""
+    lengths = np.asarray(lengths)
+    mask = np.arange(panel['timestamp'].shape[1]) < lengths[:, None]
+    data = {'ticker': np.repeat(np.asarray(tickers), lengths)}
+    for col, values in panel.items():
+        data[col] = values[mask]
+    return pd.DataFrame(data)
+
+
+def _rolling_sum(x, window):
+    """(시간 × 종목) 배열의 시간축 이동합계와 윈도우 내 개수 (min_periods=1)"""
+    total = x.copy()
+    for lag in range(1, min(window, len(x))):
+        total[lag:] += x[:-lag]
+    counts = np.minimum(np.arange(1, len(x) + 1), window)[:, None].astype(float)
+    return total, counts
+
+
+def _rolling_std(x, mean, window):
+    """(시간 × 종목) 배열의 시간축 이동 표본표준편차 (min_periods=1, 값이 1개이면 NaN)"""
+    sq = np.square(x - mean)
+    tmp = np.empty_like(x)
+    for lag in range(1, min(window, len(x))):
+        diff = np.subtract(x[:-lag], mean[lag:], out=tmp[lag:])
+        sq[lag:] += np.square(diff, out=diff)
+    counts = np.minimum(np.arange(1, len(x) + 1), window)[:, None].astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = sq / (counts - 1)
+    var[counts[:, 0] < 2] = np.nan
+    return np.sqrt(var)
+
+
+def _ewm_mean(x, span):
+    """(시간 × 종목) 배열의 시간축 지수이동평균 (pandas ewm(adjust=False)와 같은 갱신식)"""
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    old_wt = 1.0 - alpha
+    out = np.empty_like(x)
+    out[0] = x[0]
+    for t in range(1, len(x)):
+        out[t] = (old_wt * out[t - 1] + alpha * x[t]) / (old_wt + alpha)
+    return out
+
+
+def calculate_indicators_panel(panel, lengths):
+    """
+    (종목 × 시간) 패널 전체에 보조지표를 한 번에 계산합니다.
+    종목 반복 없이 모든 종목을 배열 연산으로 동시에 처리하며,
+    결과는 종목별로 calculate_indicators를 적용한 값과 (부동소수점 오차 범위 내에서) 같습니다.
+    """
+    lengths = np.asarray(lengths)
+    result = dict(panel)
+    n_times = panel['close'].shape[1]
+    if n_times == 0:
+        return result
+
+    # 시간축 연산이 연속 메모리에서 이루어지도록 (시간 × 종목) 형태로 계산합니다.
+    close = np.ascontiguousarray(panel['close'].T)
+    valid = np.arange(n_times)[:, None] < lengths[None, :]
+
+    # 이동평균
+    sum5, cnt5 = _rolling_sum(close, 5)
+    sum20, cnt20 = _rolling_sum(close, 20)
+    ma5 = sum5 / cnt5
+    ma20 = sum20 / cnt20
+
+    # RSI
+    delta = np.full_like(close, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gain_sum, cnt14 = _rolling_sum(np.where(delta > 0, delta, 0.0), 14)
+    loss_sum, _ = _rolling_sum(np.where(delta < 0, -delta, 0.0), 14)
+    gain, loss = gain_sum / cnt14, loss_sum / cnt14
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+    rsi[loss == 0] = 100
+    rsi[np.isnan(rsi)] = 50
+
+    # MACD
+    macd = _ewm_mean(close, 12) - _ewm_mean(close, 26)
+    macd_hist = macd - _ewm_mean(macd, 9)
+
+    # 볼린저 밴드
+    std20 = _rolling_std(close, ma20, 20)
+
+    indicators = {
+        'ma5': ma5, 'ma20': ma20, 'rsi': rsi, 'macd': macd_hist,
+        'bollinger_upper': ma20 + 2 * std20, 'bollinger_lower': ma20 - 2 * std20,
+    }
+
+    # VWAP
+    if 'volume' in panel:
+        volume = np.ascontiguousarray(panel['volume'].T)
+        cum_vol = np.cumsum(volume, axis=0)
+        cum_vol[cum_vol == 0] = 1e-10
+        indicators['vwap'] = np.cumsum(close * volume, axis=0) / cum_vol
+
+    for col, values in indicators.items():
+        values[~valid] = np.nan
+        result[col] = values.T
+    return result
\ No newline at end of file
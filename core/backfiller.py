@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common.indicator_engine import INDICATOR_COLUMNS
+from common.utils import PANEL_FIELDS, to_panel, from_panel, calculate_indicators_panel
+from database.bar_cache import BarCache
+
+TABLE_NAME = 'stock_data_min'
+# 정규장(09:00~15:30)을 한 번의 조회(최대 120건)로 받을 수 있는 구간으로 나눈 각 구간의 끝 시각.
+# 구간 안에 체결이 없는 분이 있으면 조회 결과가 앞 구간과 겹칠 뿐 빠지는 분은 생기지 않습니다.
+PAGE_END_HOURS = ['153000', '133000', '113000', '093000']
+# 과거 분봉 보관 기간 (일)
+MAX_HISTORY_DAYS = 365
+DAY_COLUMNS = ['timestamp'] + PANEL_FIELDS
+
+
+def parse_minute_rows(day, rows):
+    """
+    과거 분봉 조회 응답(output2) 행 목록을 DB 저장 형식으로 변환합니다. (day의 행만 사용)
+    거래대금은 누적값으로 제공되므로 저장 단계에서 분별 값으로 바꿉니다. (to_day_frame)
+    """
+    records = []
+    for row in rows:
+        if row.get('stck_bsop_date') != day:
+            continue
+        records.append((
+            datetime.strptime(day + row['stck_cntg_hour'], '%Y%m%d%H%M%S'),
+            float(row['stck_oprc']), float(row['stck_hgpr']), float(row['stck_lwpr']), float(row['stck_prpr']),
+            float(row['cntg_vol']), float(row['acml_tr_pbmn'])
+        ))
+    return records
+
+
+def to_day_frame(records):
+    """하루치 분봉 레코드를 시간순으로 정렬하고, 누적 거래대금을 분별 거래대금으로 바꾼 DataFrame을 반환합니다."""
+    df = pd.DataFrame(records, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'acml_tr_pbmn'])
+    df = df.drop_duplicates(subset=['timestamp']).sort_values('timestamp').reset_index(drop=True)
+    cumulative = df.pop('acml_tr_pbmn').to_numpy()
+    df['trading_value'] = np.maximum(np.diff(cumulative, prepend=0.0), 0.0)
+    return df[DAY_COLUMNS]
+
+
+class MinuteBackfiller:
+    """
+    국내 종목의 과거 분봉을 기간 × 종목 단위로 나누어 채워 넣는 백필 작업.
+    (종목, 날짜, 조회 구간) 단위로 나눈 조회를 스레드 풀에서 동시에 실행하며 API 호출량은 KISApi의 호출 제한기가 조절합니다.
+    하루치 조회가 끝나면 {backfill_dir}/{종목}/{날짜}.csv로 저장하여 중단 후 다시 실행하면 남은 날짜만 조회하고,
+    모든 조회가 끝나면 기존 DB 이력과 합쳐 보조지표를 패널 연산으로 다시 계산한 뒤 종목별로 일괄 저장합니다.
+    """
+
+    def __init__(self, kis_api, db_handler, config):
+        self.kis_api = kis_api
+        self.db_handler = db_handler
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+        domestic_tickers = [t.strip() for t in self.config.get('domestic_tickers', '').split(',') if t.strip()]
+        overseas_tickers = [t.strip() for t in self.config.get('overseas_tickers', '').split(',') if t.strip()]
+        if overseas_tickers:
+            self.logger.warning(f"과거 분봉 백필은 국내 주식만 지원합니다. 해외 종목 제외: {', '.join(overseas_tickers)}")
+        self.tickers = domestic_tickers
+
+        self.workers = int(self.config.get('backfill_workers', 8))
+        self.backfill_dir = self.config.get('backfill_dir', 'cache/backfill')
+        self.max_retries = int(self.config.get('backfill_max_retries', 3))
+        self.retry_delay = float(self.config.get('backfill_retry_delay', 1.0))
+        # 학습/백테스트용 로컬 시세 캐시. 이전 봉이 추가되고 지표가 다시 계산되므로 저장한 종목의 캐시를 삭제합니다.
+        cache_dir = self.config.get('bar_cache_dir', '')
+        self.bar_cache = BarCache(db_handler, cache_dir) if cache_dir else None
+
+    def date_range(self, start=None, end=None):
+        """
+        백필할 날짜(YYYYMMDD) 목록을 반환합니다. 주말은 제외하며, 오늘 분봉은 수집 작업이 담당하므로 어제까지만 포함합니다.
+        start/end가 없으면 설정값(backfill_start, backfill_end, backfill_days)을 사용합니다.
+        """
+        today = date.today()
+        start = start or self.config.get('backfill_start', '')
+        end = end or self.config.get('backfill_end', '')
+        end_day = datetime.strptime(end, '%Y%m%d').date() if end else today - timedelta(days=1)
+        end_day = min(end_day, today - timedelta(days=1))
+        if start:
+            start_day = datetime.strptime(start, '%Y%m%d').date()
+        else:
+            start_day = today - timedelta(days=int(self.config.get('backfill_days', MAX_HISTORY_DAYS)))
+
+        oldest = today - timedelta(days=MAX_HISTORY_DAYS)
+        if start_day < oldest:
+            self.logger.warning(f"과거 분봉은 최대 {MAX_HISTORY_DAYS}일까지만 조회할 수 있어 시작일을 {oldest}로 조정합니다.")
+            start_day = oldest
+
+        days = []
+        current = start_day
+        while current <= end_day:
+            if current.weekday() < 5:
+                days.append(current.strftime('%Y%m%d'))
+            current += timedelta(days=1)
+        return days
+
+    def _day_path(self, ticker, day):
+        return os.path.join(self.backfill_dir, ticker, f"{day}.csv")
+
+    def _written_path(self, ticker):
+        return os.path.join(self.backfill_dir, ticker, 'written.json')
+
+    def _read_written(self, ticker):
+        path = self._written_path(ticker)
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding='utf-8') as f:
+            return set(json.load(f))
+
+    def _write_json(self, path, value):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def run(self, start=None, end=None):
+        """
+        백필을 실행합니다. 이미 조회/저장이 끝난 날짜는 건너뜁니다.
+        반환값: {종목: 저장한 행 수}
+        """
+        days = self.date_range(start, end)
+        if not self.tickers or not days:
+            self.logger.info("백필할 종목 또는 날짜가 없습니다.")
+            return {}
+        self.logger.info(f"과거 분봉 백필 시작: 종목 {len(self.tickers)}개, {days[0]}~{days[-1]} ({len(days)}일)")
+
+        pending = [(ticker, day) for ticker in self.tickers for day in days
+                   if not os.path.exists(self._day_path(ticker, day))]
+        self._fetch(pending)
+
+        # 모든 날짜의 조회가 끝났고 아직 DB에 반영되지 않은 날짜가 있는 종목만 저장합니다.
+        to_write = {}
+        for ticker in self.tickers:
+            fetched = [day for day in days if os.path.exists(self._day_path(ticker, day))]
+            if len(fetched) < len(days):
+                self.logger.warning(f"'{ticker}' {len(days) - len(fetched)}일 조회 실패. 다시 실행하면 이어서 조회합니다.")
+                continue
+            if set(days) - self._read_written(ticker):
+                to_write[ticker] = days
+        return self._write(to_write)
+
+    def _fetch(self, pending):
+        """(종목, 날짜) 목록을 조회 구간 단위 작업으로 나누어 동시에 조회하고, 하루치가 모이면 파일로 저장합니다."""
+        if not pending:
+            return
+        units = [(ticker, day, hour) for ticker, day in pending for hour in PAGE_END_HOURS]
+        self.logger.info(f"과거 분봉 조회: {len(pending)}일치, 조회 {len(units)}건 (동시 작업 {self.workers}개)")
+
+        # 조회 결과는 호출 스레드에서 모으므로 별도의 잠금이 필요 없습니다.
+        results = {}
+        failed = set()
+        started = time.monotonic()
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill') as executor:
+            futures = {executor.submit(self._fetch_unit, *unit): unit for unit in units}
+            for future in as_completed(futures):
+                ticker, day, hour = futures[future]
+                done += 1
+                # 조회 중 예외(응답 형식 오류 등)가 나도 해당 날짜만 실패로 두고 나머지 조회는 계속합니다.
+                # 실패한 날짜는 파일을 남기지 않으므로 다시 실행하면 그 날짜만 다시 조회합니다.
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    self.logger.error(f"'{ticker}' {day} {hour} 구간 조회 중 오류: {e}")
+                    rows = None
+                if rows is None:
+                    failed.add((ticker, day))
+                parts = results.setdefault((ticker, day), [])
+                parts.append(rows or [])
+                if len(parts) == len(PAGE_END_HOURS):
+                    del results[(ticker, day)]
+                    if (ticker, day) not in failed:
+                        try:
+                            self._save_day(ticker, day, [record for part in parts for record in part])
+                        except Exception as e:
+                            self.logger.error(f"'{ticker}' {day} 분봉 파일 저장 실패: {e}")
+                if done % 500 == 0 or done == len(units):
+                    elapsed = time.monotonic() - started
+                    self.logger.info(f"과거 분봉 조회 진행: {done}/{len(units)}건 ({done / max(elapsed, 1e-9):.1f}건/초)")
+
+    def _fetch_unit(self, ticker, day, hour):
+        """조회 구간 하나를 가져옵니다. 실패하면 재시도하며, 끝내 실패하면 None을 반환합니다."""
+        for attempt in range(self.max_retries + 1):
+            rows = self.kis_api.get_minute_chart_page(ticker, day, hour)
+            if rows is not None:
+                return parse_minute_rows(day, rows)
+            if attempt < self.max_retries:
+                time.sleep(self.retry_delay * (2 ** attempt))
+        return None
+
+    def _save_day(self, ticker, day, records):
+        """하루치 분봉을 파일로 저장합니다. (파일이 있으면 해당 날짜는 조회 완료로 간주)"""
+        os.makedirs(os.path.join(self.backfill_dir, ticker), exist_ok=True)
+        path = self._day_path(ticker, day)
+        tmp_path = f"{path}.tmp"
+        to_day_frame(records).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _load_days(self, ticker, days):
+        frames = [pd.read_csv(self._day_path(ticker, day), parse_dates=['timestamp']) for day in days]
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DAY_COLUMNS)
+
+    def _write(self, to_write):
+        """조회한 분봉을 기존 이력과 합쳐 보조지표를 다시 계산하고 종목별로 일괄 저장합니다."""
+        if not to_write:
+            return {}
+        frames = []
+        for ticker, days in to_write.items():
+            backfilled = self._load_days(ticker, days)
+            # 같은 시간의 봉이 이미 DB에 있으면 수집 작업이 저장한 값을 유지합니다.
+            existing = self.db_handler.get_history(ticker, TABLE_NAME)
+            existing = existing[[c for c in DAY_COLUMNS if c in existing.columns]] if not existing.empty else None
+            df = pd.concat([existing, backfilled], ignore_index=True) if existing is not None else backfilled
+            df = df.drop_duplicates(subset=['timestamp'], keep='first')
+            df.insert(0, 'ticker', ticker)
+            frames.append(df)
+
+        # VWAP처럼 시계열 시작부터 누적되는 지표가 있으므로 기존 행까지 포함한 전체 이력을 다시 계산합니다.
+        tickers, lengths, panel = to_panel(pd.concat(frames, ignore_index=True))
+        result = from_panel(tickers, lengths, calculate_indicators_panel(panel, lengths))
+        columns = ['ticker'] + DAY_COLUMNS + INDICATOR_COLUMNS
+
+        written = {}
+        for ticker, df in result.groupby('ticker', sort=False):
+            df = df[columns].dropna()
+            try:
+                inserted, updated = self.db_handler.upsert_data(df, TABLE_NAME)
+            except Exception as e:
+                self.logger.error(f"'{ticker}' 백필 데이터 저장 실패: {e}")
+                continue
+            if self.bar_cache:
+                self.bar_cache.invalidate(ticker, TABLE_NAME)
+            self._write_json(self._written_path(ticker), sorted(self._read_written(ticker) | set(to_write[ticker])))
+            written[ticker] = len(df)
+            self.logger.info(f"'{ticker}' 백필 저장 완료 (신규 {inserted}개, 갱신 {updated}개)")
+        return written
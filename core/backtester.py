@@ -0,0 +1,245 @@
+import tensorflow as tf
+import numpy as np
+import pandas as pd
+import logging
+import time
+
+from database.bar_cache import BarCache
+from core.model_registry import ModelRegistry
+
+# 한국거래소 호가 가격 단위 (2023년 1월 개편 기준): 가격 구간 상한 → 호가 단위
+KRX_TICK_BOUNDS = np.array([2000, 5000, 20000, 50000, 200000, 500000], dtype=np.float64)
+KRX_TICK_SIZES = np.array([1, 5, 10, 50, 100, 500, 1000], dtype=np.float64)
+
+
+def tick_size(prices, domestic):
+    """가격별 호가 단위를 반환합니다. (국내: 한국거래소 구간별 단위, 해외: 1달러 이상 0.01, 미만 0.0001)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if domestic:
+        return KRX_TICK_SIZES[np.searchsorted(KRX_TICK_BOUNDS, prices, side='right')]
+    return np.where(prices >= 1.0, 0.01, 0.0001)
+
+
+def round_to_tick(prices, domestic, side):
+    """가격을 호가 단위에 맞춥니다. 매수(side='buy')는 올림, 매도는 내림으로 불리한 쪽으로 맞춥니다."""
+    prices = np.asarray(prices, dtype=np.float64)
+    ticks = tick_size(prices, domestic)
+    # 부동소수점 오차로 이미 호가 단위인 가격이 한 단위 밀리지 않도록 작은 여유를 둡니다.
+    units = prices / ticks
+    units = np.ceil(units - 1e-9) if side == 'buy' else np.floor(units + 1e-9)
+    return units * ticks
+
+
+def actions_from_probs(probs, threshold):
+    """
+    행동 확률로 봉별 결정을 만듭니다. (Trader.run과 같은 규칙)
+    반환값: 1(매수), -1(매도), 0(유지) 배열
+    """
+    recommendation = np.argmax(probs, axis=1)  # 0: Buy, 1: Sell, 2: Hold
+    confident = probs.max(axis=1) * 100 >= threshold
+    actions = np.zeros(len(probs), dtype=np.int8)
+    actions[confident & (recommendation == 0)] = 1
+    actions[confident & (recommendation == 1)] = -1
+    return actions
+
+
+def simulate(actions, open_, close, domestic, fee_rate, sell_tax_rate=0.0, slippage=0.0):
+    """
+    봉별 결정으로 매매를 시뮬레이션합니다. 봉 t 종가 시점의 결정은 봉 t+1 시가에 체결되며,
+    매수 신호에 전액 매수, 매도 신호에 전량 매도하는 롱 전용 포지션을 가정합니다.
+    체결가는 시가에 슬리피지를 반영한 뒤 호가 단위로 맞추고, 수수료(매수/매도)와 거래세(매도)를 차감합니다.
+    반환값: (봉별 자산 배열(초기 1.0), 봉별 포지션 보유 여부, 매수 체결 여부, 매도 체결 여부)
+    """
+    n = len(close)
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    # 마지막 매수/매도 신호를 이어받아 목표 포지션을 구합니다. (신호가 없던 구간은 무포지션)
+    last_signal = np.where(actions != 0, np.arange(n), -1)
+    np.maximum.accumulate(last_signal, out=last_signal)
+    target = (last_signal >= 0) & (actions[np.maximum(last_signal, 0)] > 0)
+
+    position = np.zeros(n, dtype=bool)
+    position[1:] = target[:-1]
+    previous = np.zeros(n, dtype=bool)
+    previous[1:] = position[:-1]
+    buys = position & ~previous
+    sells = previous & ~position
+    holds = position & previous
+
+    prev_close = np.empty(n, dtype=np.float64)
+    prev_close[0] = close[0]
+    prev_close[1:] = close[:-1]
+
+    # 봉별 자산 변화율: 보유 중이면 종가 대비, 진입 봉은 매수 체결가 대비, 청산 봉은 매도 체결가까지
+    factor = np.ones(n, dtype=np.float64)
+    factor[holds] = close[holds] / prev_close[holds]
+    buy_price = round_to_tick(open_[buys] * (1 + slippage), domestic, 'buy')
+    factor[buys] = close[buys] / buy_price * (1 - fee_rate)
+    sell_price = round_to_tick(open_[sells] * (1 - slippage), domestic, 'sell')
+    factor[sells] = sell_price / prev_close[sells] * (1 - fee_rate - sell_tax_rate)
+
+    return np.cumprod(factor), position, buys, sells
+
+
+def summarize(equity, position, buys, sells, close):
+    """시뮬레이션 결과로 수익률, 최대 낙폭, 회전율 등의 지표를 계산합니다."""
+    if len(equity) == 0:
+        return {'total_return': 0.0, 'max_drawdown': 0.0, 'trades': 0, 'turnover': 0.0,
+                'exposure': 0.0, 'buy_and_hold': 0.0}
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+    previous_equity = np.concatenate([[1.0], equity[:-1]])
+    # 회전율: 체결 금액 합계 / 초기 자산 (매수는 진입 직전 자산, 매도는 청산 후 자산 기준)
+    turnover = previous_equity[buys].sum() + equity[sells].sum()
+    return {
+        'total_return': float(equity[-1] - 1),
+        'max_drawdown': float(drawdown.max()),
+        'trades': int(buys.sum() + sells.sum()),
+        'turnover': float(turnover),
+        'exposure': float(position.mean()),
+        'buy_and_hold': float(close[-1] / close[0] - 1),
+    }
+
+
+class Backtester:
+    """
+    저장된 시세 이력(stock_data_min / stock_data_day)으로 학습된 actor 모델을 평가하는 백테스터.
+    전체 이력의 윈도우 피처를 큰 배치로 나누어 한 번에 추론하고, 체결/수수료/호가 단위/포지션 상태를
+    NumPy 벡터 연산으로 시뮬레이션합니다. 추론은 한 번만 수행하고 여러 prediction_threshold 값을 함께 평가합니다.
+    """
+
+    def __init__(self, db_handler, config):
+        self.db_handler = db_handler
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+        domestic_tickers = self.config.get('domestic_tickers', '').split(',')
+        overseas_tickers = self.config.get('overseas_tickers', '').split(',')
+        self.tickers = [t.strip() for t in domestic_tickers + overseas_tickers if t.strip()]
+
+        self.mode = self.config.get('mode', 'short')
+        self.table_name = 'stock_data_min' if self.mode == 'short' else 'stock_data_day'
+        self.window_size = int(self.config.get('window_size', 1))
+        self.batch_size = int(self.config.get('backtest_batch_size', 65536))
+
+        thresholds = self.config.get('backtest_thresholds', '')
+        self.thresholds = [float(t) for t in thresholds.split(',') if t.strip()] or \
+            [float(self.config['prediction_threshold'])]
+        self.domestic_fee_rate = float(self.config.get('backtest_domestic_fee_rate', 0.00015))
+        self.overseas_fee_rate = float(self.config.get('backtest_overseas_fee_rate', 0.0025))
+        self.sell_tax_rate = float(self.config.get('backtest_sell_tax_rate', 0.002))
+        self.slippage = float(self.config.get('backtest_slippage', 0.0))
+
+        cache_dir = self.config.get('bar_cache_dir', '')
+        self.bar_cache = BarCache(db_handler, cache_dir) if cache_dir else None
+        self.registry = ModelRegistry('models', f"v1.0_{self.mode}")
+
+    def _load_bars(self, ticker):
+        """종목 이력을 컬럼별 배열로 불러옵니다. (캐시가 있으면 증분 동기화 후 메모리 맵으로)"""
+        if self.bar_cache:
+            self.bar_cache.sync(ticker, self.table_name)
+            return self.bar_cache.load(ticker, self.table_name)
+        chunks = [chunk for chunk in self.db_handler.iter_rows_since(ticker, self.table_name) if not chunk.empty]
+        if not chunks:
+            return {'timestamp': np.empty(0, dtype='datetime64[ns]')}
+        df = pd.concat(chunks, ignore_index=True)
+        arrays = {'timestamp': pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]')}
+        for col in df.columns:
+            if col not in ('ticker', 'timestamp'):
+                arrays[col] = pd.to_numeric(df[col]).to_numpy(dtype=np.float64)
+        return arrays
+
+    def _predict(self, model, values):
+        """
+        (행, 피처) 배열로 window_size 길이의 윈도우를 만들어 batch_size씩 추론합니다.
+        반환값: 윈도우별 행동 확률 (행 수 - window_size + 1, 행동 수)
+        """
+        input_dim = values.shape[1] * self.window_size
+        forward = tf.function(lambda x: model(x, training=False),
+                              input_signature=[tf.TensorSpec(shape=(None, input_dim), dtype=tf.float32)])
+        windows = np.lib.stride_tricks.sliding_window_view(values, self.window_size, axis=0)
+        outputs = []
+        for start in range(0, len(windows), self.batch_size):
+            # sliding_window_view 결과는 (샘플, 피처, 윈도우) 형태이므로 (샘플, 윈도우 × 피처)로 바꿉니다.
+            batch = windows[start:start + self.batch_size].transpose(0, 2, 1).reshape(-1, input_dim)
+            outputs.append(forward(tf.convert_to_tensor(batch)).numpy())
+        return np.concatenate(outputs)
+
+    def run_ticker(self, ticker):
+        """한 종목을 백테스트합니다. 반환값: {임계값: 지표 dict} (평가할 수 없으면 None)"""
+        entry = self.registry.get(ticker)
+        if entry is None:
+            return None
+        model, transform = entry.model, entry.transform
+        if transform is None:
+            self.logger.warning(f"'{ticker}' 전처리 파일이 없어 백테스트를 건너뜁니다.")
+            return None
+        if transform.window_size != self.window_size:
+            self.logger.warning(f"'{ticker}' 모델의 윈도우 길이({transform.window_size})가 "
+                                f"설정({self.window_size})과 다릅니다.")
+            return None
+
+        arrays = self._load_bars(ticker)
+        feature_cols = transform.feature_cols
+        if len(arrays['timestamp']) == 0 or 'open' not in arrays or 'close' not in arrays \
+                or any(col not in arrays for col in feature_cols):
+            self.logger.warning(f"'{ticker}' 백테스트할 시세 데이터가 없습니다.")
+            return None
+
+        values = np.column_stack([arrays[col] for col in feature_cols]).astype(np.float64)
+        # 보조지표 계산 초기 구간처럼 결측값이 있는 행은 Trader와 마찬가지로 제외하고, 학습 때의 스케일링을 적용합니다.
+        valid = ~np.isnan(values).any(axis=1)
+        values = transform.transform(values[valid])
+        open_ = np.asarray(arrays['open'])[valid]
+        close = np.asarray(arrays['close'])[valid]
+        if len(values) <= self.window_size:
+            self.logger.warning(f"'{ticker}' 백테스트 데이터 부족 ({len(values)}개).")
+            return None
+        if values.shape[1] * self.window_size != int(model.input_shape[-1]):
+            self.logger.warning(f"'{ticker}' 피처 크기({values.shape[1] * self.window_size})가 "
+                                f"모델 입력 크기({model.input_shape[-1]})와 다릅니다.")
+            return None
+
+        started = time.perf_counter()
+        probs = self._predict(model, values)
+        inferred = time.perf_counter()
+
+        domestic = ticker.isdigit()
+        fee_rate = self.domestic_fee_rate if domestic else self.overseas_fee_rate
+        sell_tax_rate = self.sell_tax_rate if domestic else 0.0
+        results = {}
+        for threshold in self.thresholds:
+            # 첫 window_size - 1개 봉은 윈도우가 채워지지 않아 결정이 없습니다.
+            actions = np.zeros(len(values), dtype=np.int8)
+            actions[self.window_size - 1:] = actions_from_probs(probs, threshold)
+            equity, position, buys, sells = simulate(actions, open_, close, domestic, fee_rate,
+                                                     sell_tax_rate, self.slippage)
+            results[threshold] = summarize(equity, position, buys, sells, close)
+        simulated = time.perf_counter()
+
+        self.logger.info(f"'{ticker}' 백테스트 완료: {len(values)}개 봉, 추론 {inferred - started:.2f}초, "
+                         f"시뮬레이션 {simulated - inferred:.2f}초 (임계값 {len(self.thresholds)}개)")
+        return results
+
+    def run(self):
+        """
+        모든 종목을 백테스트하고 결과를 로그로 출력합니다.
+        반환값: {종목: {임계값: 지표 dict}}
+        """
+        report = {}
+        for ticker in self.tickers:
+            try:
+                results = self.run_ticker(ticker)
+            except Exception as e:
+                self.logger.error(f"'{ticker}' 백테스트 중 오류 발생: {e}", exc_info=True)
+                continue
+            if results is None:
+                continue
+            report[ticker] = results
+            for threshold, metrics in results.items():
+                self.logger.info(
+                    f"'{ticker}' 임계값 {threshold:.1f}%: 수익률 {metrics['total_return'] * 100:.2f}% "
+                    f"(보유 시 {metrics['buy_and_hold'] * 100:.2f}%), 최대 낙폭 {metrics['max_drawdown'] * 100:.2f}%, "
+                    f"거래 {metrics['trades']}회, 회전율 {metrics['turnover']:.2f}, "
+                    f"보유 비중 {metrics['exposure'] * 100:.1f}%")
+        return report
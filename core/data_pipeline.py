@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import logging
+import tempfile
+from sklearn.preprocessing import MinMaxScaler
+
+# 학습에 사용하는 피처 (존재하는 컬럼만 사용)
+FEATURES = [
+    'open', 'high', 'low', 'close', 'volume', 'trading_value', 'vwap',
+    'ma5', 'ma20', 'rsi', 'macd', 'bollinger_upper', 'bollinger_lower'
+]
+
+
+class StreamingDataPipeline:
+    """
+    학습 데이터를 청크 단위로 읽어 처리하는 스트리밍 파이프라인.
+    1차 패스에서 MinMaxScaler를 partial_fit으로 학습하고(전체 데이터로 fit한 결과와 동일),
+    2차 패스에서 청크별로 스케일링한 피처를 임시 파일 기반 배열에 기록해 롤아웃 환경에 공급합니다.
+    프로세스 메모리에는 한 청크만 올라가므로, 이력이 늘어나도 최대 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, db_handler, config, bar_cache=None):
+        self.db_handler = db_handler
+        self.bar_cache = bar_cache
+        self.logger = logging.getLogger(__name__)
+        self.chunk_rows = int(config.get('train_chunk_rows', 100000))
+        self.window_size = int(config.get('window_size', 1))
+        # 롤아웃용 피처 행렬을 기록할 임시 파일 경로 (비어 있으면 시스템 임시 디렉터리)
+        self.scratch_dir = config.get('train_scratch_dir', '')
+
+    def iter_chunks(self, ticker, table_name):
+        """종목 이력을 chunk_rows 행씩 시간순으로 반환합니다. (캐시가 있으면 캐시에서, 없으면 DB에서)"""
+        if self.bar_cache:
+            self.bar_cache.sync(ticker, table_name)
+            arrays = self.bar_cache.load(ticker, table_name)
+            rows = len(arrays['timestamp'])
+            for start in range(0, rows, self.chunk_rows):
+                yield pd.DataFrame({col: values[start:start + self.chunk_rows] for col, values in arrays.items()})
+        else:
+            yield from self.db_handler.iter_rows_since(ticker, table_name, chunksize=self.chunk_rows)
+
+    def fit_scaler(self, ticker, table_name):
+        """
+        청크를 순회하며 스케일러를 학습합니다.
+        반환값: (scaler, 피처 컬럼 목록, 유효 행 수) - 유효 행이 없으면 scaler는 None
+        """
+        scaler = MinMaxScaler()
+        feature_cols = None
+        rows = 0
+        for chunk in self.iter_chunks(ticker, table_name):
+            if feature_cols is None:
+                feature_cols = [f for f in FEATURES if f in chunk.columns]
+            values = self._clean(chunk, feature_cols)
+            if len(values):
+                scaler.partial_fit(values)
+                rows += len(values)
+        if rows == 0:
+            return None, feature_cols or [], 0
+        return scaler, feature_cols, rows
+
+    @staticmethod
+    def _clean(chunk, feature_cols):
+        """피처 컬럼만 남기고 결측 행을 제거한 float 배열을 반환합니다."""
+        df = chunk[feature_cols].apply(pd.to_numeric).dropna()
+        return df.to_numpy(dtype=np.float64)
+
+    def load_arrays(self, ticker, table_name, scaler, feature_cols, rows):
+        """
+        롤아웃 환경용으로 전체 이력을 스케일링된 피처 행렬(float32)과 스케일링 전 종가로 반환합니다.
+        환경은 임의 위치에서 에피소드를 시작하므로 전체 이력이 필요하지만, 청크별로 스케일링해 임시 파일 기반
+        np.memmap에 기록하므로 프로세스 메모리에는 한 청크만 올라가고 나머지는 운영체제가 필요할 때 읽어 들입니다.
+        rows는 fit_scaler가 센 유효 행 수이며, 그 사이 행이 늘어나면 rows개까지만 사용합니다.
+        """
+        close_idx = feature_cols.index('close')
+        if rows <= 0:
+            return np.empty((0, len(feature_cols)), dtype=np.float32), np.empty(0)
+        features = self._scratch((rows, len(feature_cols)), np.float32)
+        close = self._scratch((rows,), np.float64)
+        written = 0
+        for chunk in self.iter_chunks(ticker, table_name):
+            values = self._clean(chunk, feature_cols)[:rows - written]
+            if len(values):
+                close[written:written + len(values)] = values[:, close_idx]
+                features[written:written + len(values)] = scaler.transform(values)
+                written += len(values)
+            if written == rows:
+                break
+        return features[:written], close[:written]
+
+    def _scratch(self, shape, dtype):
+        """학습 중에만 쓰는 임시 파일 기반 배열. 파일은 만들자마자 삭제되므로 배열이 해제되면 공간도 반환됩니다."""
+        return np.memmap(tempfile.TemporaryFile(dir=self.scratch_dir or None), dtype=dtype, mode='w+', shape=shape)
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+from common.market_calendar import market_of
+from common.metrics import metrics
+
+# 시장별 결제 통화
+MARKET_CURRENCY = {'KRX': 'KRW', 'US': 'USD'}
+
+
+def currency_of(ticker):
+    return MARKET_CURRENCY[market_of(ticker)]
+
+
+class AccountCache:
+    """
+    계좌의 통화별 예수금과 종목별 보유 수량을 메모리에 유지하는 캐시.
+    ttl_seconds가 지나면 잔고를 다시 조회하고, 그 사이에는 주문 접수(예약)와 체결 통보로 로컬에서 갱신합니다.
+    """
+
+    def __init__(self, kis_api, ttl_seconds=30):
+        self.kis_api = kis_api
+        self.ttl = float(ttl_seconds)
+        self.logger = logging.getLogger(__name__)
+        self.cash = {}
+        self.positions = {}
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """잔고를 조회하여 캐시를 갱신합니다. 조회에 실패하면 기존 값을 유지하고 False를 반환합니다."""
+        balance = self.kis_api.get_balance()
+        if balance is None:
+            return False
+        try:
+            cash = {currency: float(deposit.amount) for currency, deposit in balance.deposits.items()}
+            positions = {stock.symbol: int(getattr(stock, 'orderable', stock.qty)) for stock in balance.stocks}
+        except Exception as e:
+            self.logger.error(f"잔고 응답 처리 실패: {e}", exc_info=True)
+            return False
+        with self._lock:
+            self.cash, self.positions = cash, positions
+            self._refreshed_at = time.monotonic()
+        metrics.inc('account_refresh_total')
+        return True
+
+    def invalidate(self):
+        """다음 조회 시 잔고를 다시 불러오도록 합니다."""
+        with self._lock:
+            self._refreshed_at = None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.ttl
+        if stale:
+            self.refresh()
+
+    def reserve(self, ticker, side, quantity, price):
+        """
+        주문 가능 여부를 확인하고 가능하면 예수금(매수) 또는 보유 수량(매도)을 먼저 차감합니다.
+        매도 수량이 0이면 보유 수량 전체를 매도합니다. 예약한 수량을 반환하며 주문할 수 없으면 0을 반환합니다.
+        """
+        self._ensure_fresh()
+        currency = currency_of(ticker)
+        with self._lock:
+            if side == 'buy':
+                cost = quantity * price
+                if quantity <= 0 or self.cash.get(currency, 0.0) < cost:
+                    return 0
+                self.cash[currency] = self.cash.get(currency, 0.0) - cost
+            else:
+                held = self.positions.get(ticker, 0)
+                quantity = min(quantity, held) if quantity else held
+                if quantity <= 0:
+                    return 0
+                self.positions[ticker] = held - quantity
+        return quantity
+
+    def apply_fill(self, ticker, side, quantity, price):
+        """체결 통보를 반영합니다. (매수는 보유 수량 증가, 매도는 예수금 증가 - 반대쪽은 접수 시 이미 차감됨)"""
+        with self._lock:
+            if side == 'buy':
+                self.positions[ticker] = self.positions.get(ticker, 0) + quantity
+            else:
+                currency = currency_of(ticker)
+                self.cash[currency] = self.cash.get(currency, 0.0) + quantity * price
+
+
+class Order:
+    """주문 한 건과 접수 결과"""
+    __slots__ = ('ticker', 'side', 'quantity', 'price', 'submitted_at', 'ack_seconds', 'result')
+
+    def __init__(self, ticker, side, quantity, price):
+        self.ticker = ticker
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.submitted_at = None
+        self.ack_seconds = None
+        self.result = None
+
+    @property
+    def accepted(self):
+        return self.result is not None
+
+
+class ExecutionEngine:
+    """
+    매매 신호를 주문으로 바꾸어 비동기로 접수하는 실행기.
+    잔고는 AccountCache로 관리하여 주문마다 잔고를 조회하지 않고, 주문은 작업 스레드에서 동시에 접수하므로
+    한 주문의 응답이 늦어도 같은 주기의 다른 주문이 기다리지 않습니다. 주문 접수까지 걸린 시간을 기록합니다.
+    """
+
+    def __init__(self, kis_api, config):
+        self.kis_api = kis_api
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+        # 매수 1건당 주문 금액 (종목 통화 기준) / 매도 수량 (0이면 보유 수량 전체)
+        self.order_amount = float(self.config.get('order_amount', 1000000))
+        self.sell_quantity = int(self.config.get('sell_quantity', 0))
+        self.account = AccountCache(kis_api, self.config.get('account_cache_ttl_seconds', 30))
+        self._executor = ThreadPoolExecutor(max_workers=int(self.config.get('order_workers', 4)),
+                                            thread_name_prefix='order')
+        self._in_flight = set()
+        self._submitted = []
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._ticket = None
+
+    def start(self, tickers):
+        """종목 핸들을 미리 만들고, 잔고를 불러오고, 체결 통보 구독을 시작합니다."""
+        self.kis_api.prepare_stocks(tickers)
+        self.account.refresh()
+        self._ticket = self.kis_api.subscribe_executions(self._on_execution)
+        return self
+
+    def submit(self, ticker, side, price):
+        """
+        ticker에 대한 side('buy'/'sell') 주문을 비동기로 접수합니다. price는 수량 계산과 예수금 예약에 쓰는 현재가입니다.
+        같은 종목의 이전 주문이 아직 접수 중이거나 예수금/보유 수량이 부족하면 주문하지 않고 None을 반환합니다.
+        매수인데 현재가가 없거나 0 이하이면 수량을 계산할 수 없으므로 주문하지 않습니다.
+        """
+        if side not in ('buy', 'sell'):
+            self.logger.error(f"'{ticker}' 알 수 없는 주문 종류 '{side}'는 접수하지 않습니다.")
+            return None
+        if side == 'buy' and not (price and price > 0):
+            self.logger.warning(f"'{ticker}' 현재가({price})가 올바르지 않아 매수 주문을 건너뜁니다.")
+            metrics.inc('order_rejected_total', side=side)
+            return None
+
+        with self._lock:
+            if ticker in self._in_flight:
+                self.logger.info(f"'{ticker}' 이전 주문이 접수 중이므로 {side} 주문을 건너뜁니다.")
+                return None
+            # 같은 종목의 주문이 동시에 접수되지 않도록 예약이 끝날 때까지 자리를 잡아 둡니다.
+            self._in_flight.add(ticker)
+
+        quantity = int(self.order_amount // price) if side == 'buy' else self.sell_quantity
+        quantity = self.account.reserve(ticker, side, quantity, price or 0.0)
+        if not quantity:
+            with self._lock:
+                self._in_flight.discard(ticker)
+            self.logger.info(f"'{ticker}' {side} 주문 가능 수량이 없습니다.")
+            return None
+
+        order = Order(ticker, side, quantity, price)
+        order.submitted_at = time.perf_counter()
+        future = self._executor.submit(self._send, order)
+        with self._lock:
+            self._submitted.append(future)
+        return future
+
+    def _send(self, order):
+        try:
+            # 시장가 주문 (price는 수량 계산에만 사용)
+            order.result = self.kis_api.place_order(order.ticker, order.side, order.quantity)
+        finally:
+            order.ack_seconds = time.perf_counter() - order.submitted_at
+            with self._lock:
+                self._in_flight.discard(order.ticker)
+                self._latencies.append(order.ack_seconds)
+
+        metrics.observe('order_ack_seconds', order.ack_seconds, side=order.side)
+        if order.accepted:
+            metrics.inc('orders_total', side=order.side)
+            self.logger.info(f"'{order.ticker}' {order.side} {order.quantity}주 주문 접수 "
+                             f"({order.ack_seconds * 1000:.1f}ms)")
+        else:
+            # 예약한 예수금/수량을 되돌리기 위해 다음 주문 전에 잔고를 다시 조회합니다.
+            metrics.inc('order_errors_total', side=order.side)
+            self.account.invalidate()
+        return order
+
+    def _on_execution(self, execution):
+        """실시간 체결 통보를 잔고 캐시에 반영합니다."""
+        try:
+            side = 'buy' if str(execution.type).lower() == 'buy' else 'sell'
+            self.account.apply_fill(execution.symbol, side, int(execution.qty), float(execution.price))
+        except Exception as e:
+            self.logger.error(f"체결 통보 처리 실패: {e}", exc_info=True)
+
+    def wait(self, timeout=None):
+        """지난 wait() 이후 제출한 주문이 모두 접수될 때까지 기다리고, 완료된 주문 목록을 반환합니다."""
+        with self._lock:
+            futures, self._submitted = self._submitted, []
+        done, not_done = wait(futures, timeout=timeout)
+        with self._lock:
+            self._submitted.extend(not_done)
+        return [f.result() for f in done]
+
+    def latency_summary(self):
+        """최근 주문 접수 시간(ms)의 (건수, 중앙값, 95% 값, 최댓값)을 반환합니다."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+        if not len(latencies):
+            return 0, 0.0, 0.0, 0.0
+        return len(latencies), float(np.median(latencies)), float(np.percentile(latencies, 95)), float(latencies.max())
+
+    def close(self):
+        """체결 통보 구독을 해제하고, 접수 중인 주문이 끝나면 주문 작업 스레드를 종료합니다."""
+        if self._ticket is not None:
+            try:
+                self._ticket.unsubscribe()
+            except Exception as e:
+                self.logger.warning(f"체결 통보 구독 해제 실패: {e}")
+            self._ticket = None
+        self._executor.shutdown(wait=True)
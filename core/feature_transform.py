@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# 전처리 파일 형식 버전 (형식이 바뀌면 올리고, 다른 버전의 파일은 불러오지 않습니다)
+ARTIFACT_VERSION = 2
+
+
+def artifact_path(model_path):
+    """모델 파일(models/actor_{종목}_{버전}.h5) 옆에 저장하는 전처리 파일 경로를 반환합니다."""
+    return f"{os.path.splitext(model_path)[0]}.features.json"
+
+
+def file_digest(path):
+    """파일 내용의 SHA-256 해시. 전처리 파일이 어떤 모델 파일과 함께 저장되었는지 확인하는 데 사용합니다."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class FeatureTransform:
+    """
+    학습 시 적용한 전처리(피처 목록, MinMaxScaler 계수, 윈도우 길이)를 그대로 재현하는 변환기.
+    스케일 계수를 윈도우 길이만큼 미리 이어 붙여 두므로, 최신 윈도우 변환은 평탄화한 벡터에 곱셈/덧셈 한 번이며
+    연산 순서가 MinMaxScaler.transform과 같아, 같은 원본 피처 행이면 학습/백테스트/실시간 입력이 비트 단위까지 일치합니다.
+    model_digest는 함께 저장된 actor 모델 파일의 해시로, 다른 모델과 짝지어 쓰이지 않도록 확인하는 데 씁니다.
+    """
+
+    def __init__(self, feature_cols, min_, scale_, window_size, ticker=None, model_version=None, model_digest=None):
+        self.feature_cols = list(feature_cols)
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.scale_ = np.asarray(scale_, dtype=np.float64)
+        self.window_size = int(window_size)
+        self.ticker = ticker
+        self.model_version = model_version
+        self.model_digest = model_digest
+        if not (len(self.feature_cols) == len(self.min_) == len(self.scale_)):
+            raise ValueError("피처 수와 스케일 계수 수가 다릅니다.")
+        self._window_scale = np.tile(self.scale_, self.window_size)
+        self._window_min = np.tile(self.min_, self.window_size)
+
+    @classmethod
+    def from_scaler(cls, scaler, feature_cols, window_size, ticker=None, model_version=None, model_digest=None):
+        return cls(feature_cols, scaler.min_, scaler.scale_, window_size, ticker, model_version, model_digest)
+
+    @property
+    def input_dim(self):
+        return len(self.feature_cols) * self.window_size
+
+    def transform(self, values):
+        """(행, 피처) float64 배열 전체를 스케일링하여 float32로 반환합니다. (백테스트용)"""
+        return (np.asarray(values, dtype=np.float64) * self.scale_ + self.min_).astype(np.float32)
+
+    def window(self, values):
+        """
+        (행, 피처) float64 배열의 마지막 window_size개 행만 스케일링하여 모델 입력 벡터로 반환합니다.
+        행이 부족하거나 윈도우에 결측값이 있으면 None을 반환합니다.
+        """
+        if len(values) < self.window_size:
+            return None
+        window = np.asarray(values[len(values) - self.window_size:], dtype=np.float64).reshape(-1)
+        if np.isnan(window).any():
+            return None
+        return (window * self._window_scale + self._window_min).astype(np.float32)
+
+    def to_dict(self):
+        return {
+            'version': ARTIFACT_VERSION,
+            'ticker': self.ticker,
+            'model_version': self.model_version,
+            'model_digest': self.model_digest,
+            'window_size': self.window_size,
+            'feature_cols': self.feature_cols,
+            'min': self.min_.tolist(),
+            'scale': self.scale_.tolist(),
+        }
+
+    def save(self, path):
+        """임시 파일에 쓴 뒤 교체하여 반쯤 쓰인 파일이 남지 않도록 저장합니다."""
+        tmp_path = f"{path}.tmp_{os.getpid()}"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"지원하지 않는 전처리 파일 버전입니다: {data.get('version')}")
+        return cls(data['feature_cols'], data['min'], data['scale'], data['window_size'],
+                   data.get('ticker'), data.get('model_version'), data.get('model_digest'))
@@ -0,0 +1,173 @@
+import tensorflow as tf
+from tensorflow.keras import layers
+import numpy as np
+import logging
+
+
+def _architecture_signature(model):
+    """모델 구조를 나타내는 키 (입력 크기 + 층 구성). 같은 키의 모델끼리 묶어 배치 추론합니다."""
+    parts = [tuple(model.input_shape[1:])]
+    for layer in model.layers:
+        if isinstance(layer, layers.InputLayer):
+            continue
+        config = layer.get_config()
+        parts.append((type(layer).__name__, config.get('units'), config.get('activation')))
+    return tuple(parts)
+
+
+def _is_dense_chain(model):
+    """입력 하나에 Dense 층만 순서대로 연결된 모델인지 확인합니다."""
+    body = [layer for layer in model.layers if not isinstance(layer, layers.InputLayer)]
+    return len(model.inputs) == 1 and len(model.outputs) == 1 and body and \
+        all(isinstance(layer, layers.Dense) for layer in body)
+
+
+class _StackedDenseGroup:
+    """
+    구조가 같은 Dense 모델 여러 개의 가중치를 쌓아 한 번의 연산으로 모든 종목을 추론하는 그룹.
+    종목 i의 입력은 종목 i의 가중치로만 계산됩니다. (배치 행렬곱)
+    """
+
+    def __init__(self, tickers, models):
+        self.tickers = list(tickers)
+        self.input_dim = int(models[0].input_shape[-1])
+        dense_layers = [[layer for layer in m.layers if isinstance(layer, layers.Dense)] for m in models]
+        self.kernels, self.biases, self.activations = [], [], []
+        for depth in range(len(dense_layers[0])):
+            self.kernels.append(tf.constant(np.stack([d[depth].kernel.numpy() for d in dense_layers])))
+            self.biases.append(tf.constant(np.stack([
+                d[depth].bias.numpy() if d[depth].use_bias else np.zeros(d[depth].units, dtype=np.float32)
+                for d in dense_layers])))
+            self.activations.append(dense_layers[0][depth].activation)
+        spec = tf.TensorSpec(shape=(len(self.tickers), self.input_dim), dtype=tf.float32)
+        self._forward = tf.function(self._forward_impl, input_signature=[spec])
+
+    def _forward_impl(self, x):
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = activation(tf.einsum('mi,mio->mo', x, kernel) + bias)
+        return x
+
+    def __call__(self, x):
+        return self._forward(tf.convert_to_tensor(x, dtype=tf.float32)).numpy()
+
+
+class _SingleModelGroup:
+    """가중치를 쌓을 수 없는 모델용 그룹. 모델별로 컴파일된 그래프 함수를 사용합니다."""
+
+    def __init__(self, tickers, models):
+        self.tickers = list(tickers)
+        self.input_dim = int(models[0].input_shape[-1])
+        spec = tf.TensorSpec(shape=(1, self.input_dim), dtype=tf.float32)
+        self._functions = [tf.function(lambda x, m=m: m(x, training=False), input_signature=[spec]) for m in models]
+
+    def __call__(self, x):
+        x = tf.convert_to_tensor(x, dtype=tf.float32)
+        return np.concatenate([fn(x[i:i + 1]).numpy() for i, fn in enumerate(self._functions)])
+
+
+class _CallableGroup:
+    """Keras 모델이 아닌 추론 객체(TFLite 등) 하나로 이루어진 그룹"""
+
+    def __init__(self, ticker, model):
+        self.tickers = [ticker]
+        self.input_dim = int(model.input_dim)
+        self._model = model
+
+    def __call__(self, x):
+        return self._model(x)
+
+
+class InferenceEngine:
+    """
+    여러 종목의 최신 피처를 모아 모델 구조별로 묶은 뒤 배치로 추론하는 엔진.
+    Dense 층으로만 이루어진 모델은 가중치를 쌓아 tf.function으로 컴파일한 한 번의 연산으로 처리하므로,
+    종목 수가 늘어도 주기당 추론 지연 시간이 거의 일정합니다.
+    컴파일한 가중치 쌓기 그룹은 (종목, 모델 해시) 구성별로 보관하므로, 모델 캐시보다 종목이 많아 묶음마다
+    build()를 다시 호출해도 같은 묶음의 그룹은 다시 컴파일하지 않습니다. (clear_cache()로 비움)
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.groups = []
+        self._ticker_group = {}
+        self._built_key = None
+        self._stacked = {}
+
+    def build(self, entries):
+        """
+        {종목: ModelEntry}로 추론 그룹을 구성하고 워밍업(그래프 컴파일)을 수행합니다.
+        직전 구성과 종목/모델 파일 해시가 모두 같으면 다시 구성하지 않으며,
+        이전에 컴파일한 가중치 쌓기 그룹과 종목/모델 해시가 같은 그룹은 그대로 재사용합니다.
+        """
+        entries = {ticker: entry for ticker, entry in entries.items() if entry is not None}
+        key = tuple(sorted((ticker, entry.digest) for ticker, entry in entries.items()))
+        if key == self._built_key:
+            return
+        models = {ticker: entry.model for ticker, entry in entries.items()}
+
+        by_signature = {}
+        self.groups = []
+        self._ticker_group = {}
+        built = []
+        for ticker, model in models.items():
+            if not isinstance(model, tf.keras.Model):
+                group = _CallableGroup(ticker, model)
+                built.append(group)
+                self.groups.append(group)
+                self._ticker_group[ticker] = group
+                continue
+            by_signature.setdefault(_architecture_signature(model), []).append((ticker, model))
+
+        for grouped in by_signature.values():
+            tickers = [t for t, _ in grouped]
+            group_models = [m for _, m in grouped]
+            if _is_dense_chain(group_models[0]):
+                # 쌓은 가중치는 모델 객체와 별개의 상수이므로 모델이 캐시에서 해제되어도 그룹을 보관할 수 있습니다.
+                group_key = tuple((t, entries[t].digest) for t in tickers)
+                group = self._stacked.get(group_key)
+                if group is None:
+                    group = self._stacked[group_key] = _StackedDenseGroup(tickers, group_models)
+                    built.append(group)
+            else:
+                group = _SingleModelGroup(tickers, group_models)
+                built.append(group)
+            self.groups.append(group)
+            for ticker in tickers:
+                self._ticker_group[ticker] = group
+        self._built_key = key
+        self.warmup(built)
+        self.logger.info(f"추론 엔진 구성 완료: 모델 {len(self._ticker_group)}개, 그룹 {len(self.groups)}개 "
+                         f"(새로 구성 {len(built)}개)")
+
+    def clear_cache(self):
+        """보관 중인 가중치 쌓기 그룹을 비웁니다. (모델이 교체되어 이전 그룹을 다시 쓸 일이 없을 때)"""
+        self._stacked = {}
+        self._built_key = None
+
+    def warmup(self, groups=None):
+        """첫 주기에 그래프 컴파일 비용이 발생하지 않도록 미리 한 번 실행합니다. (기본값: 전체 그룹)"""
+        for group in self.groups if groups is None else groups:
+            group(np.zeros((len(group.tickers), group.input_dim), dtype=np.float32))
+
+    def input_dim(self, ticker):
+        group = self._ticker_group.get(ticker)
+        return group.input_dim if group else None
+
+    def predict(self, features):
+        """
+        {종목: 피처 벡터}에 대해 각 종목 모델의 출력(행동 확률)을 계산합니다.
+        그룹 내 피처가 없는 종목은 0 벡터로 채워 계산한 뒤 결과에서 제외합니다.
+        반환값: {종목: 출력 벡터}
+        """
+        results = {}
+        for group in self.groups:
+            present = [i for i, t in enumerate(group.tickers) if t in features]
+            if not present:
+                continue
+            batch = np.zeros((len(group.tickers), group.input_dim), dtype=np.float32)
+            for i in present:
+                batch[i] = features[group.tickers[i]]
+            outputs = group(batch)
+            for i in present:
+                results[group.tickers[i]] = outputs[i]
+        return results
@@ -0,0 +1,225 @@
+import tensorflow as tf
+import numpy as np
+import glob
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from core.feature_transform import FeatureTransform, artifact_path, file_digest
+
+
+class TFLiteModel:
+    """TFLite로 변환된 모델을 감싸는 경량 추론 객체 (입력 1개, 출력 1개)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.interpreter = tf.lite.Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_dim = int(self._input['shape'][-1])
+        self._lock = threading.Lock()
+
+    def __call__(self, x):
+        """(배치, 입력 크기) 배열을 받아 행 단위로 추론한 결과를 반환합니다."""
+        x = np.asarray(x, dtype=np.float32)
+        outputs = []
+        with self._lock:
+            for row in x:
+                self.interpreter.set_tensor(self._input['index'], row[None, :])
+                self.interpreter.invoke()
+                outputs.append(self.interpreter.get_tensor(self._output['index'])[0].copy())
+        return np.stack(outputs)
+
+
+class ModelEntry:
+    """불러온 모델 하나와 그 전처리(FeatureTransform), 파일 상태. digest는 모델 파일 내용의 해시입니다."""
+    __slots__ = ('model', 'mtime_ns', 'size', 'digest', 'transform', 'transform_mtime_ns', 'pending')
+
+    def __init__(self, model, mtime_ns, size, digest, transform=None, transform_mtime_ns=None):
+        self.model = model
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.transform = transform
+        self.transform_mtime_ns = transform_mtime_ns
+        # 전처리 파일을 기다리는 새 모델 파일의 (수정 시각, 크기)
+        self.pending = None
+
+
+class ModelRegistry:
+    """
+    종목별 actor 모델을 처음 사용할 때 불러오고, 최대 capacity개까지 LRU 방식으로 메모리에 유지하는 저장소.
+    refresh()는 불러온 모델 파일의 변경(수정 시각/크기 → 해시)을 확인해 새 모델로 교체하므로
+    매매 주기 사이에 호출하면 재시작 없이 재학습된 모델이 반영됩니다.
+    모델과 함께 저장된 전처리 파일(FeatureTransform)도 같이 불러오며, 전처리 파일에 기록된 모델 해시/버전이
+    불러온 모델과 일치할 때만 짝지어 사용합니다. (학습 결과를 저장하는 도중의 새 모델 + 이전 전처리 조합 방지)
+    model_format이 'tflite'이면 Keras 모델을 TFLite로 변환(파일로 캐시)하여 가볍게 불러옵니다.
+    generation은 종목의 모델이 이전과 다른 내용(해시)으로 교체/재로드될 때마다 증가하므로,
+    모델에서 만든 파생 결과(컴파일한 추론 그룹 등)를 보관하는 쪽은 값이 바뀌었을 때만 비우면 됩니다.
+    """
+
+    def __init__(self, model_dir, model_version, capacity=0, model_format='keras'):
+        self.model_dir = model_dir
+        self.model_version = model_version
+        self.capacity = int(capacity)
+        self.model_format = model_format
+        self.logger = logging.getLogger(__name__)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.generation = 0
+        # 종목별로 마지막에 불러온 모델 해시 (캐시에서 해제된 뒤 다시 불러올 때 교체 여부 판단)
+        self._digests = {}
+
+    def path(self, ticker):
+        return os.path.join(self.model_dir, f"actor_{ticker}_{self.model_version}.h5")
+
+    def exists(self, ticker):
+        return os.path.exists(self.path(ticker))
+
+    def get(self, ticker):
+        """
+        종목의 ModelEntry(모델과 전처리)를 반환합니다. 메모리에 없으면 파일에서 불러오며, 파일이 없으면 None을 반환합니다.
+        모델과 전처리를 한 번에 꺼내므로 둘 사이에 다른 종목을 불러와 한쪽만 해제되는 일이 없습니다.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None:
+                self._entries.move_to_end(ticker)
+                return entry
+
+        entry = self._load(ticker)
+        if entry is None:
+            return None
+        with self._lock:
+            self._entries[ticker] = entry
+            self._entries.move_to_end(ticker)
+            self._track_digest(ticker, entry.digest)
+            while self.capacity and len(self._entries) > self.capacity:
+                evicted, _ = self._entries.popitem(last=False)
+                self.logger.info(f"'{evicted}' 모델을 메모리에서 해제했습니다. (LRU, 최대 {self.capacity}개)")
+        return entry
+
+    def loaded(self):
+        """현재 메모리에 있는 {종목: ModelEntry}를 반환합니다."""
+        with self._lock:
+            return dict(self._entries)
+
+    def refresh(self):
+        """
+        메모리에 있는 모델의 파일이 바뀌었는지 확인하고, 바뀐 모델은 새로 불러와 교체합니다.
+        새 모델을 완전히 불러온 뒤에 교체하므로 사용 중인 모델이 반쯤 바뀐 상태가 되지 않습니다.
+        반환값: 교체된 종목 목록
+        """
+        with self._lock:
+            snapshot = list(self._entries.items())
+
+        reloaded = []
+        for ticker, entry in snapshot:
+            path = self.path(ticker)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            transform_mtime_ns = self._mtime_ns(artifact_path(path))
+            model_stat = (stat.st_mtime_ns, stat.st_size)
+            if transform_mtime_ns == entry.transform_mtime_ns and model_stat in ((entry.mtime_ns, entry.size),
+                                                                               entry.pending):
+                continue
+            if model_stat != (entry.mtime_ns, entry.size) and file_digest(path) == entry.digest:
+                entry.mtime_ns, entry.size = model_stat
+                entry.pending = None
+            if model_stat == (entry.mtime_ns, entry.size):
+                # 모델은 그대로이고 전처리 파일만 바뀐 경우, 같은 모델의 전처리 파일일 때만 교체합니다.
+                transform, entry.transform_mtime_ns = self._load_transform(ticker, entry.digest)
+                if transform is not None:
+                    entry.transform = transform
+                continue
+
+            new_entry = self._load(ticker)
+            if new_entry is None:
+                continue
+            if new_entry.transform is None and entry.transform is not None:
+                # 새 모델과 짝이 맞는 전처리 파일이 아직 없으면(학습 결과 저장 중) 기존 모델/전처리 쌍을 유지하고,
+                # 전처리 파일이 바뀌면 다시 확인합니다.
+                entry.pending = model_stat
+                entry.transform_mtime_ns = transform_mtime_ns
+                self.logger.warning(f"'{ticker}' 새 모델과 짝이 맞는 전처리 파일이 없어 기존 모델을 계속 사용합니다.")
+                continue
+            with self._lock:
+                if ticker in self._entries:
+                    self._entries[ticker] = new_entry
+                    self._track_digest(ticker, new_entry.digest)
+                    reloaded.append(ticker)
+            self.logger.info(f"'{ticker}' 모델 파일 변경 감지, 새 모델로 교체했습니다: {path}")
+        return reloaded
+
+    def _track_digest(self, ticker, digest):
+        """종목의 모델 해시가 이전에 불러온 것과 다르면 generation을 올립니다. (잠금을 잡은 상태에서 호출)"""
+        previous = self._digests.get(ticker)
+        if previous is not None and previous != digest:
+            self.generation += 1
+        self._digests[ticker] = digest
+
+    @staticmethod
+    def _mtime_ns(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_transform(self, ticker, model_digest):
+        """
+        전처리 파일을 불러옵니다. 기록된 모델 해시/버전이 model_digest 모델과 다르면 사용하지 않습니다.
+        반환값: (FeatureTransform 또는 None, 파일 수정 시각)
+        """
+        path = artifact_path(self.path(ticker))
+        mtime_ns = self._mtime_ns(path)
+        if mtime_ns is None:
+            self.logger.warning(f"'{ticker}' 전처리 파일을 찾을 수 없음: {path}. 'train' 모드로 모델을 다시 학습시켜주세요.")
+            return None, None
+        try:
+            transform = FeatureTransform.load(path)
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 전처리 파일 로드 실패: {e}")
+            return None, mtime_ns
+        if transform.model_digest != model_digest or transform.model_version != self.model_version:
+            self.logger.warning(f"'{ticker}' 전처리 파일이 현재 모델과 짝이 맞지 않습니다: {path}")
+            return None, mtime_ns
+        return transform, mtime_ns
+
+    def _load(self, ticker):
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            self.logger.warning(f"'{ticker}' 모델 파일을 찾을 수 없음: {path}. 'train' 모드로 먼저 모델을 학습시켜주세요.")
+            return None
+        try:
+            stat = os.stat(path)
+            digest = file_digest(path)
+            if self.model_format == 'tflite':
+                model = TFLiteModel(self._tflite_path(path, digest))
+            else:
+                model = tf.keras.models.load_model(path, compile=False)
+            self.logger.info(f"'{ticker}' 모델 로드 성공: {path}")
+            return ModelEntry(model, stat.st_mtime_ns, stat.st_size, digest, *self._load_transform(ticker, digest))
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 모델 로드 실패: {e}")
+            return None
+
+    def _tflite_path(self, h5_path, digest):
+        """Keras 모델을 TFLite로 변환한 파일 경로를 반환합니다. 같은 내용의 변환 결과가 있으면 재사용합니다."""
+        tflite_path = f"{os.path.splitext(h5_path)[0]}.{digest[:12]}.tflite"
+        if not os.path.exists(tflite_path):
+            model = tf.keras.models.load_model(h5_path, compile=False)
+            content = tf.lite.TFLiteConverter.from_keras_model(model).convert()
+            tmp_path = f"{tflite_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, tflite_path)
+            # 이전 버전 모델에서 변환한 파일은 정리합니다.
+            for old_path in glob.glob(f"{glob.escape(os.path.splitext(h5_path)[0])}.*.tflite"):
+                if old_path != tflite_path:
+                    os.remove(old_path)
+            self.logger.info(f"TFLite 변환 완료: {tflite_path}")
+        return tflite_path
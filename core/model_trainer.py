@@ -1,10 +1,17 @@
 import tensorflow as tf
 from tensorflow.keras import layers
-import numpy as np
-import pandas as pd
 import logging
-from sklearn.preprocessing import MinMaxScaler
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from common.logger import setup_logger
+from database.db_handler import DBHandler
+from database.bar_cache import BarCache
+from core.data_pipeline import StreamingDataPipeline
+from core.feature_transform import FeatureTransform, artifact_path, file_digest
+from core.ppo import PPOAgent
+from core.trading_env import BatchedTradingEnv
 
 
 class ModelTrainer:
@@ -17,40 +24,10 @@ class ModelTrainer:
         overseas_tickers = self.config.get('overseas_tickers', '').split(',')
         self.tickers = [t.strip() for t in domestic_tickers + overseas_tickers if t.strip()]
 
-    def _get_data(self, ticker):
-        """데이터베이스에서 학습 데이터를 불러옵니다."""
-        mode = self.config.get('mode', 'short')
-        table_name = 'stock_data_min' if mode == 'short' else 'stock_data_day'
-        self.logger.info(f"'{ticker}' 종목의 학습 데이터를 '{table_name}' 테이블에서 불러옵니다.")
-
-        query = f"SELECT * FROM {table_name} WHERE ticker = '{ticker}' ORDER BY timestamp"
-        try:
-            df = pd.read_sql(query, self.db_handler.engine)
-            return df
-        except Exception as e:
-            self.logger.error(f"{ticker} 데이터 로드 실패: {e}")
-            return pd.DataFrame()
-
-    def _preprocess(self, df):
-        """데이터를 전처리하고 학습에 사용할 피처를 생성합니다."""
-        self.logger.info("데이터 전처리 시작...")
-        features = [
-            'open', 'high', 'low', 'close', 'volume', 'trading_value', 'vwap',
-            'ma5', 'ma20', 'rsi', 'macd', 'bollinger_upper', 'bollinger_lower'
-        ]
-
-        feature_cols = [f for f in features if f in df.columns]
-        df = df[feature_cols].copy()
-        df.dropna(inplace=True)
-
-        if df.empty:
-            return pd.DataFrame()
-
-        scaler = MinMaxScaler()
-        df_scaled = pd.DataFrame(scaler.fit_transform(df), columns=df.columns)
-
-        self.logger.info("데이터 전처리 완료")
-        return df_scaled
+        # 로컬 시세 캐시 (설정 시 DB 전체 조회 대신 증분 동기화 후 캐시에서 읽음)
+        cache_dir = self.config.get('bar_cache_dir', '')
+        self.bar_cache = BarCache(db_handler, cache_dir) if cache_dir else None
+        self.pipeline = StreamingDataPipeline(db_handler, config, self.bar_cache)
 
     def _build_ppo_model(self, input_shape, num_actions):
         """PPO 알고리즘을 위한 Actor-Critic 모델을 생성합니다."""
@@ -68,39 +45,134 @@ class ModelTrainer:
         self.logger.info("Actor-Critic 모델 생성 완료")
         return actor, critic
 
-    def train(self):
-        """모델 학습을 실행합니다."""
-        mode = self.config.get('mode', 'short')
-        model_version = f"v1.0_{mode}"
+    def _build_env(self, ticker, table_name, scaler, feature_cols, rows):
+        """종목 이력으로 PPO 롤아웃용 배치 매매 환경을 만듭니다. (수수료/세금은 백테스트 설정과 동일)"""
+        features, close = self.pipeline.load_arrays(ticker, table_name, scaler, feature_cols, rows)
+        domestic = ticker.isdigit()
+        fee_rate = float(self.config.get('backtest_domestic_fee_rate' if domestic else 'backtest_overseas_fee_rate',
+                                         0.00015 if domestic else 0.0025))
+        sell_tax_rate = float(self.config.get('backtest_sell_tax_rate', 0.002)) if domestic else 0.0
+        return BatchedTradingEnv([(features, close)], window_size=self.pipeline.window_size,
+                                 num_envs=int(self.config.get('ppo_envs', 64)),
+                                 episode_length=int(self.config.get('ppo_episode_length', 256)),
+                                 fee_rate=fee_rate, sell_tax_rate=sell_tax_rate)
 
+    def train(self):
+        """
+        모델 학습을 실행합니다.
+        train_workers가 2 이상이면 종목들을 프로세스 풀에 나누어 병렬로 학습합니다.
+        반환값: {종목: (상태, 메시지)} - 상태는 'ok', 'skipped', 'failed' 중 하나
+        """
         if not os.path.exists('models'):
             os.makedirs('models')
 
-        for ticker in self.tickers:
-            self.logger.info(f"'{ticker}' 종목 ({mode} 모드) 모델 학습 시작...")
-            df = self._get_data(ticker)
-
-            if df.empty or len(df) < 100:
-                self.logger.warning(f"'{ticker}' 학습 데이터 부족 (100개 미만). 학습을 건너뜁니다.")
-                continue
+        workers = min(int(self.config.get('train_workers', 1)), len(self.tickers))
+        if workers > 1:
+            results = self._train_parallel(workers)
+        else:
+            results = {ticker: self._train_ticker(ticker) for ticker in self.tickers}
+
+        counts = {status: sum(1 for s, _ in results.values() if s == status) for status in ('ok', 'skipped', 'failed')}
+        self.logger.info(f"전체 학습 완료: 성공 {counts['ok']}개, 건너뜀 {counts['skipped']}개, 실패 {counts['failed']}개")
+        failed = [ticker for ticker, (status, _) in results.items() if status == 'failed']
+        if failed:
+            self.logger.warning(f"학습 실패 종목: {', '.join(failed)}")
+        return results
+
+    def _train_parallel(self, workers):
+        """종목들을 워커 프로세스에 나누어 학습하고 결과를 모읍니다."""
+        threads = int(self.config.get('train_threads_per_worker', 0)) or max(1, (os.cpu_count() or 1) // workers)
+        self.logger.info(f"병렬 학습 시작: 워커 {workers}개, 워커당 TensorFlow 스레드 {threads}개")
+
+        # 연결 객체는 프로세스 간에 전달할 수 없으므로 설정만 넘기고 워커에서 새로 연결합니다.
+        db_config = dict(self.db_handler.config)
+        trading_config = dict(self.config)
+        results = {}
+        # TensorFlow는 fork 이후 안전하지 않으므로 spawn 방식으로 워커를 생성합니다.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_train_worker, initargs=(threads,)) as executor:
+            futures = {executor.submit(_train_ticker_worker, db_config, trading_config, ticker): ticker
+                       for ticker in self.tickers}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    results[ticker] = future.result()
+                except Exception as e:
+                    results[ticker] = ('failed', f"워커 오류: {e}")
+        return {ticker: results[ticker] for ticker in self.tickers}
+
+    def _train_ticker(self, ticker):
+        """한 종목의 모델을 학습하고 저장합니다. 반환값: (상태, 메시지)"""
+        mode = self.config.get('mode', 'short')
+        model_version = f"v1.0_{mode}"
+        table_name = 'stock_data_min' if mode == 'short' else 'stock_data_day'
+        self.logger.info(f"'{ticker}' 종목 ({mode} 모드) 모델 학습 시작...")
 
-            df_processed = self._preprocess(df)
+        # 전체 이력을 한 번에 올리지 않고 청크 단위로 스케일러를 학습합니다. (계수는 모델과 함께 전처리 파일로 저장)
+        try:
+            scaler, feature_cols, rows = self.pipeline.fit_scaler(ticker, table_name)
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 학습 데이터 로드 실패: {e}")
+            return 'failed', f"학습 데이터 로드 실패: {e}"
 
-            if df_processed.empty:
-                self.logger.warning(f"'{ticker}' 전처리 후 데이터 없음. 학습을 건너뜁니다.")
-                continue
+        if rows < 100:
+            self.logger.warning(f"'{ticker}' 학습 데이터 부족 (100개 미만). 학습을 건너뜁니다.")
+            return 'skipped', f"학습 데이터 부족 ({rows}행)"
 
-            states = df_processed.values
+        try:
+            env = self._build_env(ticker, table_name, scaler, feature_cols, rows)
             num_actions = 3  # Buy, Sell, Hold
 
-            actor, critic = self._build_ppo_model(input_shape=(states.shape[1],), num_actions=num_actions)
+            actor, critic = self._build_ppo_model(input_shape=(env.observation_dim,), num_actions=num_actions)
 
-            self.logger.info("PPO 알고리즘 학습 시작 (개념적)...")
-            # ... 실제 PPO 학습 로직 ...
-            self.logger.info(f"'{ticker}' 종목 모델 학습 완료 (개념적).")
+            iterations = int(self.config.get('ppo_iterations', 20))
+            steps = int(self.config.get('ppo_steps', 128))
+            self.logger.info(f"PPO 학습 시작 (유효 데이터 {rows}행, 환경 {env.num_envs}개 × {steps}스텝 × "
+                             f"{iterations}회)...")
+            stats = PPOAgent(actor, critic, self.config).train(env, iterations, steps)
+            self.logger.info(f"'{ticker}' 종목 모델 학습 완료: 롤아웃 평균 {stats['steps_per_second']:,.0f} steps/s, "
+                             f"에피소드 {stats['episodes']}개, 평균 수익률 {stats['mean_return'] * 100:.2f}%")
 
             actor_path = f"models/actor_{ticker}_{model_version}.h5"
             critic_path = f"models/critic_{ticker}_{model_version}.h5"
-            actor.save(actor_path)
-            critic.save(critic_path)
-            self.logger.info(f"학습된 모델 저장 완료: {actor_path}, {critic_path}")
\ No newline at end of file
+            _save_model_atomic(critic, critic_path)
+            _save_model_atomic(actor, actor_path)
+            # 매매/백테스트에서 학습과 같은 전처리를 다시 학습하지 않고 적용하도록 스케일러 계수를 함께 저장합니다.
+            # 전처리 파일에는 방금 저장한 actor 파일의 해시를 기록하며, ModelRegistry는 해시가 맞는 경우에만 둘을 짝짓습니다.
+            transform = FeatureTransform.from_scaler(scaler, feature_cols, self.pipeline.window_size,
+                                                     ticker, model_version, file_digest(actor_path))
+            transform.save(artifact_path(actor_path))
+            self.logger.info(f"학습된 모델 저장 완료: {actor_path}, {critic_path}, {artifact_path(actor_path)}")
+            return 'ok', actor_path
+        except Exception as e:
+            self.logger.error(f"'{ticker}' 모델 학습 중 오류 발생: {e}", exc_info=True)
+            return 'failed', str(e)
+
+
+def _save_model_atomic(model, path):
+    """같은 디렉터리의 임시 파일에 저장한 뒤 교체하여, 중단되더라도 반쯤 쓰인 모델 파일이 남지 않도록 합니다."""
+    directory, filename = os.path.split(path)
+    tmp_path = os.path.join(directory, f".tmp_{os.getpid()}_{filename}")
+    try:
+        model.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _init_train_worker(threads):
+    """학습 워커 프로세스의 TensorFlow 스레드 수를 제한합니다."""
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _train_ticker_worker(db_config, trading_config, ticker):
+    """워커 프로세스에서 한 종목을 학습합니다."""
+    setup_logger()
+    db_handler = DBHandler(db_config)
+    try:
+        return ModelTrainer(db_handler, trading_config)._train_ticker(ticker)
+    finally:
+        if db_handler.conn:
+            db_handler.conn.close()
@@ -0,0 +1,137 @@
+import logging
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+class PPOAgent:
+    """
+    Actor-Critic 모델을 PPO(clipped objective)로 학습합니다.
+    롤아웃은 BatchedTradingEnv의 모든 환경을 한 번의 배치 추론으로 진행하고(스텝당 actor/critic 호출 1회),
+    GAE로 이점을 계산한 뒤 미니배치 단위로 정책/가치 신경망을 갱신합니다.
+    """
+
+    def __init__(self, actor, critic, config, seed=None):
+        self.actor = actor
+        self.critic = critic
+        self.logger = logging.getLogger(__name__)
+        self.gamma = float(config.get('ppo_gamma', 0.99))
+        self.lam = float(config.get('ppo_lambda', 0.95))
+        self.clip = float(config.get('ppo_clip', 0.2))
+        self.entropy_coef = float(config.get('ppo_entropy', 0.01))
+        self.epochs = int(config.get('ppo_epochs', 4))
+        self.minibatch_size = int(config.get('batch_size', 256))
+        learning_rate = float(config.get('ppo_learning_rate', 0.0003))
+        self.actor_optimizer = tf.keras.optimizers.Adam(learning_rate)
+        self.critic_optimizer = tf.keras.optimizers.Adam(learning_rate)
+        self.rng = np.random.default_rng(seed)
+        self._policy = tf.function(self._policy_step, reduce_retracing=True)
+        self._train_step = tf.function(self._train_step_impl, reduce_retracing=True)
+
+    def _policy_step(self, observations):
+        return self.actor(observations, training=False), tf.squeeze(self.critic(observations, training=False), -1)
+
+    def collect(self, env, observations, steps):
+        """
+        env에서 steps 스텝 동안 롤아웃을 수집합니다.
+        반환값: (롤아웃 dict, 다음 관측값, 초당 환경 스텝 수)
+        """
+        n = env.num_envs
+        buffers = {
+            'observations': np.empty((steps, n, env.observation_dim), dtype=np.float32),
+            'actions': np.empty((steps, n), dtype=np.int32),
+            'log_probs': np.empty((steps, n), dtype=np.float32),
+            'values': np.empty((steps, n), dtype=np.float32),
+            'rewards': np.empty((steps, n), dtype=np.float32),
+            'dones': np.empty((steps, n), dtype=np.float32),
+        }
+        rows = np.arange(n)
+        started = time.perf_counter()
+        for t in range(steps):
+            probs, values = self._policy(observations)
+            probs, values = probs.numpy(), values.numpy()
+            # 누적 확률과 균등 난수를 비교하여 환경별 행동을 한 번에 샘플링합니다.
+            actions = np.minimum((probs.cumsum(axis=1) < self.rng.random((n, 1))).sum(axis=1), probs.shape[1] - 1)
+
+            buffers['observations'][t] = observations
+            buffers['actions'][t] = actions
+            buffers['log_probs'][t] = np.log(probs[rows, actions] + 1e-8)
+            buffers['values'][t] = values
+            observations, buffers['rewards'][t], buffers['dones'][t] = env.step(actions)
+        steps_per_second = steps * n / (time.perf_counter() - started)
+
+        last_values = self._policy(observations)[1].numpy()
+        buffers['advantages'], buffers['returns'] = self._gae(buffers, last_values)
+        return buffers, observations, steps_per_second
+
+    def _gae(self, buffers, last_values):
+        """GAE(lambda) 이점과 가치 학습 목표를 계산합니다. (시간 축만 순회하고 환경 축은 벡터 연산)"""
+        rewards, values, dones = buffers['rewards'], buffers['values'], buffers['dones']
+        advantages = np.empty_like(rewards)
+        running = np.zeros_like(last_values)
+        next_values = last_values
+        for t in range(len(rewards) - 1, -1, -1):
+            nonterminal = 1.0 - dones[t]
+            delta = rewards[t] + self.gamma * next_values * nonterminal - values[t]
+            running = delta + self.gamma * self.lam * nonterminal * running
+            advantages[t] = running
+            next_values = values[t]
+        return advantages, advantages + values
+
+    def _train_step_impl(self, observations, actions, old_log_probs, advantages, returns):
+        with tf.GradientTape() as actor_tape, tf.GradientTape() as critic_tape:
+            probs = self.actor(observations, training=True)
+            log_probs = tf.math.log(tf.gather(probs, actions, batch_dims=1) + 1e-8)
+            ratio = tf.exp(log_probs - old_log_probs)
+            clipped = tf.clip_by_value(ratio, 1.0 - self.clip, 1.0 + self.clip)
+            entropy = -tf.reduce_sum(probs * tf.math.log(probs + 1e-8), axis=1)
+            actor_loss = (-tf.reduce_mean(tf.minimum(ratio * advantages, clipped * advantages))
+                          - self.entropy_coef * tf.reduce_mean(entropy))
+            values = tf.squeeze(self.critic(observations, training=True), -1)
+            critic_loss = tf.reduce_mean(tf.square(returns - values))
+        self.actor_optimizer.apply_gradients(
+            zip(actor_tape.gradient(actor_loss, self.actor.trainable_variables), self.actor.trainable_variables))
+        self.critic_optimizer.apply_gradients(
+            zip(critic_tape.gradient(critic_loss, self.critic.trainable_variables), self.critic.trainable_variables))
+        return actor_loss, critic_loss
+
+    def update(self, rollout):
+        """롤아웃으로 epochs번 미니배치 갱신을 수행하고 마지막 (actor 손실, critic 손실)을 반환합니다."""
+        observations = rollout['observations'].reshape(-1, rollout['observations'].shape[-1])
+        actions = rollout['actions'].reshape(-1)
+        old_log_probs = rollout['log_probs'].reshape(-1)
+        returns = rollout['returns'].reshape(-1)
+        advantages = rollout['advantages'].reshape(-1)
+        advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-8)
+
+        losses = (0.0, 0.0)
+        for _ in range(self.epochs):
+            order = self.rng.permutation(len(actions))
+            for start in range(0, len(order), self.minibatch_size):
+                batch = order[start:start + self.minibatch_size]
+                losses = self._train_step(observations[batch], actions[batch], old_log_probs[batch],
+                                          advantages[batch], returns[batch])
+        return float(losses[0]), float(losses[1])
+
+    def train(self, env, iterations, steps):
+        """
+        롤아웃 수집과 갱신을 iterations번 반복합니다.
+        반환값: {'steps_per_second': 평균 롤아웃 처리량, 'episodes': 종료된 에피소드 수, 'mean_return': 평균 에피소드 수익률}
+        """
+        observations = env.reset()
+        throughput = []
+        for iteration in range(1, iterations + 1):
+            rollout, observations, steps_per_second = self.collect(env, observations, steps)
+            actor_loss, critic_loss = self.update(rollout)
+            throughput.append(steps_per_second)
+            recent = env.finished_returns[-env.num_envs:]
+            self.logger.info(f"PPO {iteration}/{iterations}: 롤아웃 {steps_per_second:,.0f} steps/s "
+                             f"(환경 {env.num_envs}개), 최근 에피소드 평균 수익률 "
+                             f"{(np.mean(recent) if recent else 0.0) * 100:.2f}%, "
+                             f"actor 손실 {actor_loss:.4f}, critic 손실 {critic_loss:.6f}")
+        return {
+            'steps_per_second': float(np.mean(throughput)) if throughput else 0.0,
+            'episodes': len(env.finished_returns),
+            'mean_return': float(np.mean(env.finished_returns)) if env.finished_returns else 0.0,
+        }
@@ -0,0 +1,94 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from common.bar_aggregator import MinuteBarAggregator
+
+
+class StreamingIngestor:
+    """
+    실시간 체결 피드를 받아 1분봉으로 집계하고, 봉이 완성되는 즉시 보조지표를 계산해 저장하는 수집기.
+    피드는 start(on_tick)/stop()을 제공하는 객체(KisRealtimeFeed, ReplayFeed)이며,
+    store(df, table_name, ticker)는 완성된 봉(보조지표 포함)을 저장하는 함수입니다.
+    체결이 뜸한 종목의 봉은 종목 시각 기준으로 분이 지나고 idle_close_seconds가 더 지나면 완성 처리합니다.
+    """
+
+    TABLE_NAME = 'stock_data_min'
+
+    def __init__(self, db_handler, feed, indicator_engine, store, config):
+        self.db_handler = db_handler
+        self.feed = feed
+        self.indicator_engine = indicator_engine
+        self.store = store
+        self.logger = logging.getLogger(__name__)
+        self.idle_close_seconds = float(config.get('stream_idle_close_seconds', 5))
+
+        self.aggregator = MinuteBarAggregator()
+        self.bars_stored = 0
+        # 종목별 (체결 시각 - 수신 시각). 해외 종목처럼 시간대가 다른 종목도 종목 시각 기준으로 봉을 닫기 위해 사용합니다.
+        self._clock_offsets = {}
+        self._emit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer = None
+
+    def start(self):
+        """피드 구독과 봉 마감 타이머를 시작합니다."""
+        self._stop.clear()
+        self.feed.start(self._on_tick)
+        if self.idle_close_seconds > 0:
+            self._timer = threading.Thread(target=self._run_timer, name='bar-closer', daemon=True)
+            self._timer.start()
+        self.logger.info("실시간 분봉 수집을 시작합니다.")
+        return self
+
+    def stop(self, close_open_bars=False):
+        """
+        피드 구독과 타이머를 중지합니다.
+        close_open_bars가 True이면 진행 중인 봉도 완성된 것으로 보고 저장합니다. (재생 데이터 등 끝난 스트림)
+        실시간 피드에서는 아직 끝나지 않은 분의 봉이 저장되지 않도록 False로 둡니다.
+        """
+        self._stop.set()
+        self.feed.stop()
+        if self._timer:
+            self._timer.join()
+            self._timer = None
+        if close_open_bars:
+            self._emit(self.aggregator.close_all())
+        self.logger.info(f"실시간 분봉 수집을 종료합니다. (저장한 봉 {self.bars_stored}개, "
+                         f"늦게 도착해 버린 체결 {self.aggregator.late_ticks}건)")
+
+    def _on_tick(self, tick):
+        timestamp = tick.timestamp.replace(tzinfo=None) if tick.timestamp.tzinfo is not None else tick.timestamp
+        self._clock_offsets[tick.ticker] = timestamp - datetime.now()
+        self._emit(self.aggregator.add(tick))
+
+    def _run_timer(self):
+        grace = timedelta(seconds=self.idle_close_seconds)
+        while not self._stop.wait(1.0):
+            now = datetime.now()
+            rows = []
+            for ticker in self.aggregator.open_tickers():
+                offset = self._clock_offsets.get(ticker)
+                if offset is not None:
+                    rows.extend(self.aggregator.flush(ticker, now + offset - grace))
+            self._emit(rows)
+
+    def _emit(self, rows):
+        """완성된 봉에 보조지표를 계산해 저장합니다."""
+        if not rows:
+            return
+        df = MinuteBarAggregator.to_frame(rows)
+        # 피드 스레드와 타이머 스레드가 같은 종목의 지표 상태를 동시에 갱신하지 않도록 순서대로 처리합니다.
+        with self._emit_lock:
+            for ticker, bars in df.groupby('ticker', sort=False):
+                try:
+                    key = (self.TABLE_NAME, ticker)
+                    if not self.indicator_engine.is_seeded(key):
+                        self.indicator_engine.seed(key, self.db_handler.get_history(ticker, self.TABLE_NAME))
+                    df_to_insert = self.indicator_engine.update(key, bars.reset_index(drop=True)).dropna()
+                    if df_to_insert.empty:
+                        continue
+                    self.store(df_to_insert, self.TABLE_NAME, ticker)
+                    self.bars_stored += len(df_to_insert)
+                except Exception as e:
+                    self.logger.error(f"'{ticker}' 실시간 분봉 저장 실패: {e}", exc_info=True)
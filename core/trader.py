@@ -1,9 +1,18 @@
-import tensorflow as tf
 import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date
 import logging
-import os
+import time
+
+from collections import deque
+
+from common.bar_array import BarArray
+from common.indicator_engine import IndicatorEngine
+from common.metrics import metrics
+from core.data_pipeline import FEATURES
+from core.execution import ExecutionEngine
+from core.inference import InferenceEngine
+from core.model_registry import ModelRegistry
 
 
 class Trader:
@@ -17,61 +26,223 @@ class Trader:
         overseas_tickers = self.config.get('overseas_tickers', '').split(',')
         self.tickers = [t.strip() for t in domestic_tickers + overseas_tickers if t.strip()]
 
-        self.models = self._load_models()
         self.threshold = float(self.config['prediction_threshold'])
+        # 수집기가 이 시간(초) 안에 받은 차트가 필요한 구간을 담고 있으면 API를 다시 호출하지 않고 재사용합니다.
+        # (장기 모드의 일봉은 수집기가 하루 한 번만 받으므로 대부분 직접 조회하며, 이때도 마지막 반영 봉 이후만 조회)
+        self.chart_max_age = float(self.config.get('chart_cache_seconds', 20))
 
-    def _load_models(self):
-        """설정에 맞는 학습된 모델들을 불러옵니다."""
-        models = {}
+        # 모델은 처음 사용할 때 불러오고, 최대 model_cache_size개까지만 메모리에 유지합니다. (0이면 제한 없음)
         mode = self.config.get('mode', 'short')
-        model_version = f"v1.0_{mode}"
-
-        for ticker in self.tickers:
-            actor_path = f"models/actor_{ticker}_{model_version}.h5"
-            if os.path.exists(actor_path):
-                models[ticker] = tf.keras.models.load_model(actor_path)
-                self.logger.info(f"'{ticker}' 모델 로드 성공: {actor_path}")
-            else:
-                self.logger.warning(f"'{ticker}' 모델 파일을 찾을 수 없음: {actor_path}. 'train' 모드로 먼저 모델을 학습시켜주세요.")
-                models[ticker] = None
-        return models
-
-    def run(self):
-        """매매 분석 및 실행/알림 로직을 수행합니다."""
-        mode = self.config['mode']
+        self.table_name = 'stock_data_min' if mode == 'short' else 'stock_data_day'
+        # 종목별 보조지표 상태와 최근 피처 행. 학습 데이터를 저장한 수집기와 같은 방식(DB 이력으로 복원 후 봉마다 갱신)으로
+        # 계산하므로 실시간 피처가 학습 피처와 같은 값이 되고, 주기마다 새 봉만 반영합니다.
+        self.indicators = IndicatorEngine()
+        self._recent = {}
+        self.registry = ModelRegistry('models', f"v1.0_{mode}",
+                                      capacity=int(self.config.get('model_cache_size', 0)),
+                                      model_format=self.config.get('model_format', 'keras'))
+        self.inference = InferenceEngine()
+        self._generation = self.registry.generation
+        if self.registry.capacity and self.registry.capacity < len(self.tickers):
+            # 묶음마다 모델을 파일에서 다시 불러옵니다. (컴파일한 추론 그룹은 묶음별로 재사용)
+            self.logger.warning(f"모델 캐시 크기(model_cache_size={self.registry.capacity})가 종목 수({len(self.tickers)})보다 "
+                                f"작아 매 주기 모델을 다시 불러옵니다. 메모리가 충분하면 종목 수 이상으로 설정하세요.")
+
+        # 미리 불러오도록 설정된 경우 시작 시 모델을 불러와 배치 추론 그룹을 구성하고 워밍업합니다. (캐시 크기까지만)
+        if str(self.config.get('preload_models', 'True')).lower() in ('true', '1', 'yes', 'on'):
+            for ticker in self.tickers[:self.registry.capacity or None]:
+                self.registry.get(ticker)
+            self.inference.build(self.registry.loaded())
+
+        # 자동 주문이 켜져 있으면 잔고 캐시와 종목 핸들을 미리 준비합니다.
+        self.execution = None
+        if str(self.config.get('auto_trade', 'False')).lower() in ('true', '1', 'yes', 'on'):
+            self.execution = ExecutionEngine(self.kis_api, self.config).start(self.tickers)
+
+    def _chunks(self, tickers):
+        """
+        종목들을 모델 캐시 크기(model_cache_size) 이하의 묶음으로 나눕니다. (0이면 한 묶음)
+        한 묶음의 모델이 모두 캐시에 있는 동안 추론까지 마치므로, 묶음 안에서는 모델이 해제되지 않고
+        메모리에 동시에 올라가는 모델 수도 캐시 크기를 넘지 않습니다.
+        묶음 구성은 주기마다 같으므로 묶음별로 컴파일한 추론 그룹은 모델이 교체되기 전까지 재사용됩니다.
+        """
+        size = self.registry.capacity or len(tickers) or 1
+        for start in range(0, len(tickers), size):
+            yield tickers[start:start + size]
 
-        for ticker in self.tickers:
-            model = self.models.get(ticker)
-            if not model:
+    def _get_models(self, tickers):
+        """{종목: ModelEntry}(모델과 전처리)를 반환합니다. 모델 또는 전처리 파일이 없는 종목은 제외합니다."""
+        entries = {}
+        for ticker in tickers:
+            if not self.registry.exists(ticker):
                 self.logger.warning(f"'{ticker}' 모델이 없어 분석을 건너뜁니다.")
                 continue
+            entry = self.registry.get(ticker)
+            if entry is None:
+                continue
+            if entry.transform is None:
+                self.logger.warning(f"'{ticker}' 전처리 파일이 없어 분석을 건너뜁니다.")
+                continue
+            entries[ticker] = entry
+        return entries
+
+    def run(self, tickers=None):
+        """매매 분석 및 실행/알림 로직을 수행합니다. tickers를 지정하면 해당 종목만 분석합니다. (기본값: 전체 종목)"""
+        mode = self.config['mode']
+        started = time.perf_counter()
+
+        # 변경된 모델 파일은 주기 시작 시점에 교체됩니다.
+        self.registry.refresh()
+        if self.registry.generation != self._generation:
+            # 교체된 모델로 만든 이전 추론 그룹은 다시 쓰지 않으므로 비웁니다.
+            self.inference.clear_cache()
+            self._generation = self.registry.generation
+        predictions = {}
+        prices = {}
+        prepare_seconds = inference_seconds = 0.0
+        for chunk in self._chunks(self.tickers if tickers is None else tickers):
+            chunk_started = time.perf_counter()
+            entries = self._get_models(chunk)
+            self.inference.build(entries)
+
+            # 1. 묶음 내 종목의 최신 피처와 현재가를 모읍니다.
+            features = {}
+            for ticker, entry in entries.items():
+                self.logger.info(f"--- {ticker} ({mode} 모드) 매매 분석 시작 ---")
+
+                try:
+                    # API를 통해 최신 시세 데이터 조회. 보조지표 상태에 마지막으로 반영한 봉부터만 요청하므로
+                    # 수집기가 같은 구간을 받아 둔 차트가 있으면 캐시에서 재사용됩니다.
+                    last_ts = self._last_applied(ticker, entry.transform.window_size)
+                    if mode == 'short':
+                        today = last_ts is not None and last_ts.date() == date.today()
+                        start = last_ts.to_pydatetime() if today else None
+                        chart = self.kis_api.get_day_chart(ticker, start=start, max_age=self.chart_max_age)
+                    else:
+                        start_date = last_ts.date() if last_ts is not None else None
+                        chart = self.kis_api.get_daily_chart(ticker, start_date=start_date, max_age=self.chart_max_age)
+                    if not chart or not chart.bars:
+                        self.logger.warning(f"'{ticker}' 최신 시세 데이터 없음.")
+                        continue
+
+                    feature = self._build_features(ticker, chart, entry.transform)
+                    if feature is not None:
+                        features[ticker] = feature
+                        prices[ticker] = float(chart.bars[-1].close)
+                except Exception as e:
+                    self.logger.error(f"'{ticker}' 분석 중 오류 발생: {e}", exc_info=True)
+
+            # 2. 모델 구조별 배치 추론으로 묶음 내 종목을 한 번에 예측합니다.
+            prepared = time.perf_counter()
+            predictions.update(self.inference.predict(features))
+            prepare_seconds += prepared - chunk_started
+            inference_seconds += time.perf_counter() - prepared
+
+        signals = {}
+        for ticker, action_probs in predictions.items():
+            recommendation = int(np.argmax(action_probs))  # 0: Buy, 1: Sell, 2: Hold
+            probability = float(action_probs[recommendation]) * 100
+
+            if recommendation < 2 and probability >= self.threshold:
+                rec_type = 'buy' if recommendation == 0 else 'sell'
+                self.logger.info(f"[{datetime.now()}] '{ticker}' 추천: {rec_type.upper()} (확률: {probability:.2f}%)")
+                self._log_recommendation(ticker, rec_type, probability)
+                signals[ticker] = rec_type
+
+        if self.execution and signals:
+            # 주문 수량 계산용 현재가는 신호가 난 종목만 모아 한 번에 조회합니다. (실패 시 차트 종가 사용)
+            quotes = self.kis_api.get_quotes(list(signals))
+            for ticker, rec_type in signals.items():
+                price = quotes[ticker]['price'] if ticker in quotes else prices[ticker]
+                self._execute_trade(ticker, rec_type, price)
+
+        # 3. 이번 주기에 접수한 주문이 모두 응답을 받을 때까지 기다립니다. (주문끼리는 동시에 접수됨)
+        if self.execution:
+            orders = self.execution.wait()
+            if orders:
+                count, p50, p95, worst = self.execution.latency_summary()
+                self.logger.info(f"주문 {len(orders)}건 접수 완료 (최근 {count}건 접수 시간 중앙값 {p50:.1f}ms, "
+                                 f"95% {p95:.1f}ms, 최대 {worst:.1f}ms)")
+
+        metrics.observe('trader_stage_seconds', prepare_seconds, stage='prepare')
+        metrics.observe('trader_stage_seconds', inference_seconds, stage='inference')
+        metrics.observe('trader_run_seconds', time.perf_counter() - started)
+        self.logger.info(f"매매 분석 완료: {len(predictions)}개 종목, 시세/피처 준비 {prepare_seconds * 1000:.1f}ms, "
+                         f"추론 {inference_seconds * 1000:.1f}ms")
+
+    def _build_features(self, ticker, chart, transform):
+        """
+        차트의 새 봉만 보조지표 상태에 반영하고, 학습 때 저장한 전처리를 최근 window_size개 피처 행에 적용해
+        모델 입력 벡터로 만듭니다. (스케일러를 다시 학습하지 않으며 주기당 계산량은 새 봉 수에만 비례)
+        """
+        recent = self._recent.get(ticker)
+        if recent is None or recent.maxlen < transform.window_size:
+            recent = self._seed_features(ticker, transform.window_size)
+
+        new_bars = self._new_bars(ticker, chart.bars)
+        if new_bars:
+            rows = self.indicators.update_bars(ticker, BarArray.from_bars(ticker, new_bars))
+            if not rows.empty:
+                # 수집기와 마찬가지로 결측 지표가 있는 봉(초기 구간)은 피처 행으로 쓰지 않습니다.
+                recent.extend(rows[FEATURES].dropna().to_numpy(dtype=np.float64))
 
-            self.logger.info(f"--- {ticker} ({mode} 모드) 매매 분석 시작 ---")
+        missing = [col for col in transform.feature_cols if col not in FEATURES]
+        if missing:
+            self.logger.warning(f"'{ticker}' 학습에 사용한 피처를 계산할 수 없습니다: {', '.join(missing)}")
+            return None
+        values = np.array(recent, dtype=np.float64).reshape(len(recent), len(FEATURES))
+        feature = transform.window(values[:, [FEATURES.index(col) for col in transform.feature_cols]])
+        if feature is None:
+            self.logger.warning(f"'{ticker}' 피처를 만들기 위한 데이터 부족 (결측 없는 최근 봉 {transform.window_size}개 필요).")
+            return None
+        if feature.shape[0] != self.inference.input_dim(ticker):
+            self.logger.warning(f"'{ticker}' 피처 크기({feature.shape[0]})가 모델 입력 크기와 다릅니다.")
+            return None
+        return feature
 
-            try:
-                # API를 통해 최신 시세 데이터 조회
-                chart = self.kis_api.get_day_chart(ticker) if mode == 'short' else self.kis_api.get_daily_chart(ticker)
-                if not chart or not chart.bars:
-                    self.logger.warning(f"'{ticker}' 최신 시세 데이터 없음.")
-                    continue
+    def _last_applied(self, ticker, window_size):
+        """보조지표 상태에 마지막으로 반영한 봉의 시간을 반환합니다. 아직 상태가 없으면 DB 이력으로 먼저 복원합니다."""
+        recent = self._recent.get(ticker)
+        if recent is None or recent.maxlen < window_size:
+            self._seed_features(ticker, window_size)
+        last_ts = self.indicators.last_timestamp(ticker)
+        return pd.Timestamp(last_ts) if last_ts is not None else None
 
-                # ... (데이터 전처리 및 모델 예측 로직) ...
+    def _seed_features(self, ticker, window_size):
+        """DB에 저장된 이력으로 보조지표 상태를 복원하고 최근 window_size개 피처 행을 채웁니다. (종목당 최초 1회)"""
+        history = self.db_handler.get_history(ticker, self.table_name) if self.db_handler else pd.DataFrame()
+        self.indicators.seed(ticker, history)
+        recent = deque(maxlen=window_size)
+        if not history.empty:
+            rows = history.reindex(columns=FEATURES).apply(pd.to_numeric).dropna()
+            recent.extend(rows.tail(window_size).to_numpy(dtype=np.float64))
+        self._recent[ticker] = recent
+        return recent
 
-                # 임시 로직
-                recommendation, probability = np.random.randint(0, 3), np.random.uniform(70, 95)
+    def _new_bars(self, ticker, bars):
+        """차트 봉 중 보조지표 상태에 아직 반영되지 않은 봉만 반환합니다. (뒤에서부터 확인하므로 새 봉 수에 비례)"""
+        last_ts = self.indicators.last_timestamp(ticker)
+        if last_ts is None:
+            return list(bars)
+        last_ts = pd.Timestamp(last_ts)
+        count = 0
+        for bar in reversed(bars):
+            # BarArray와 같이 시간대 정보가 있으면 거래소 현지 시각으로 비교합니다.
+            if pd.Timestamp(bar.time.replace(tzinfo=None)) <= last_ts:
+                break
+            count += 1
+        return list(bars[len(bars) - count:])
 
-                if recommendation < 2 and probability >= self.threshold:
-                    rec_type = 'buy' if recommendation == 0 else 'sell'
-                    self.logger.info(f"[{datetime.now()}] '{ticker}' 추천: {rec_type.upper()} (확률: {probability:.2f}%)")
-                    self._log_recommendation(ticker, rec_type, probability)
-                    # self._execute_trade(ticker, rec_type)
-            except Exception as e:
-                self.logger.error(f"'{ticker}' 분석 중 오류 발생: {e}", exc_info=True)
+    def close(self):
+        """자동 주문 실행기(주문 작업 스레드, 체결 통보 구독)를 종료합니다."""
+        if self.execution:
+            self.execution.close()
+            self.execution = None
 
     def _log_recommendation(self, ticker, rec_type, probability):
         """추천 내역을 데이터베이스에 기록합니다."""
         pass  # DB 저장 로직 구현
 
-    def _execute_trade(self, ticker, rec_type):
-        """실제 매매를 실행하는 함수 (2단계 기능, 주석처리)"""
-        pass
\ No newline at end of file
+    def _execute_trade(self, ticker, rec_type, price):
+        """실제 매매 주문을 비동기로 접수합니다. (auto_trade 설정 시)"""
+        return self.execution.submit(ticker, rec_type, price)
\ No newline at end of file
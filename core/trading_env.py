@@ -0,0 +1,103 @@
+import numpy as np
+
+# 행동 (Trader/Backtester와 같은 순서)
+BUY, SELL, HOLD = 0, 1, 2
+
+
+class BatchedTradingEnv:
+    """
+    전처리된 피처 행렬 위에서 num_envs개의 에피소드(종목/시작 위치가 서로 다름)를 한 번의 NumPy 연산으로 진행하는 매매 환경.
+
+    관측값은 window_size개 봉의 피처를 평탄화한 벡터(모델 입력과 같은 형태)이고, 포지션은 롱 전용(0 또는 1)입니다.
+    t 시점의 행동은 t 봉 종가에 체결된다고 보고, 보상은 (새 포지션 × t→t+1 종가 수익률 - 수수료/세금)입니다.
+    에피소드가 episode_length 스텝에 도달한 환경은 step() 안에서 임의의 종목/위치로 자동으로 다시 시작합니다.
+    """
+
+    def __init__(self, segments, window_size=1, num_envs=64, episode_length=256, fee_rate=0.00015,
+                 sell_tax_rate=0.0, seed=None):
+        """
+        segments: [(features (T, F) float32, close (T,) float)] - 종목별 스케일링된 피처와 원 가격
+        관측 윈도우는 미리 만들지 않고 스텝마다 피처 행에서 인덱스로 모으므로, 메모리는 피처 행렬 크기만큼만 사용합니다.
+        종목이 하나이면 배열(np.memmap 포함)을 복사하지 않고 그대로 사용합니다.
+        """
+        self.window_size = int(window_size)
+        self.num_envs = int(num_envs)
+        self.episode_length = int(episode_length)
+        self.fee_rate = float(fee_rate)
+        self.sell_tax_rate = float(sell_tax_rate)
+        self.rng = np.random.default_rng(seed)
+
+        features_list, close_list, starts, lengths = [], [], [], []
+        offset = 0
+        for features, close in segments:
+            features = np.asarray(features, dtype=np.float32)
+            close = np.asarray(close, dtype=np.float64)
+            # 윈도우가 완성되고 다음 봉이 있는 시점만 사용합니다.
+            if len(features) < self.window_size + 1:
+                continue
+            features_list.append(features)
+            close_list.append(close)
+            # 세그먼트의 첫 관측 시점은 윈도우의 마지막 행 위치입니다.
+            starts.append(offset + self.window_size - 1)
+            lengths.append(len(features) - self.window_size)
+            offset += len(features)
+        if not features_list:
+            raise ValueError("환경을 만들 데이터가 부족합니다.")
+
+        self.features = features_list[0] if len(features_list) == 1 else np.concatenate(features_list)
+        self.close = close_list[0] if len(close_list) == 1 else np.concatenate(close_list)
+        self.segment_starts = np.array(starts)
+        self.segment_lengths = np.array(lengths)
+        self.observation_dim = self.window_size * self.features.shape[1]
+        self._window_offsets = np.arange(1 - self.window_size, 1)
+
+        self.index = np.zeros(self.num_envs, dtype=np.int64)
+        self.end = np.zeros(self.num_envs, dtype=np.int64)
+        self.position = np.zeros(self.num_envs, dtype=np.float64)
+        self.equity = np.ones(self.num_envs, dtype=np.float64)
+        self.finished_returns = []
+
+    def _observe(self):
+        """각 환경의 현재 시점까지 window_size개 피처 행을 평탄화한 관측값 (num_envs, window_size × 피처)"""
+        rows = self.features[self.index[:, None] + self._window_offsets]
+        return rows.reshape(self.num_envs, self.observation_dim)
+
+    def _start(self, envs):
+        """envs 위치의 환경을 임의의 종목/시작 위치에서 새로 시작합니다."""
+        count = len(envs)
+        segment = self.rng.integers(0, len(self.segment_starts), count)
+        lengths = self.segment_lengths[segment]
+        span = np.minimum(self.episode_length, lengths)
+        offset = (self.rng.random(count) * (lengths - span + 1)).astype(np.int64)
+        self.index[envs] = self.segment_starts[segment] + offset
+        self.end[envs] = self.index[envs] + span
+        self.position[envs] = 0.0
+        self.equity[envs] = 1.0
+
+    def reset(self):
+        self._start(np.arange(self.num_envs))
+        self.finished_returns = []
+        return self._observe()
+
+    def step(self, actions):
+        """
+        actions (num_envs,)를 적용하고 (다음 관측값, 보상, 종료 여부)를 반환합니다.
+        종료된 환경의 다음 관측값은 새로 시작한 에피소드의 첫 관측값입니다.
+        """
+        actions = np.asarray(actions)
+        new_position = np.where(actions == BUY, 1.0, np.where(actions == SELL, 0.0, self.position))
+        change = new_position - self.position
+        cost = np.abs(change) * self.fee_rate + (change < 0) * self.sell_tax_rate
+        returns = self.close[self.index + 1] / self.close[self.index] - 1.0
+        rewards = new_position * returns - cost
+
+        self.position = new_position
+        self.equity *= 1.0 + rewards
+        self.index += 1
+        dones = self.index >= self.end
+
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            self.finished_returns.extend((self.equity[finished] - 1.0).tolist())
+            self._start(finished)
+        return self._observe(), rewards.astype(np.float32), dones
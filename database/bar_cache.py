@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# 캐시에 저장하는 컬럼 (학습/백테스트에 사용하는 시세 및 보조지표)
+CACHE_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume', 'trading_value', 'vwap',
+    'ma5', 'ma20', 'rsi', 'macd', 'bollinger_upper', 'bollinger_lower'
+]
+
+
+class BarCache:
+    """
+    종목별 시세/보조지표 이력을 로컬 디스크에 컬럼 단위 바이너리 파일로 보관하는 캐시.
+    {cache_dir}/{table}/{ticker}/ 아래에 컬럼마다 하나의 파일(timestamp는 int64 ns, 나머지는 float64)과
+    meta.json(행 수, 마지막 시간)을 두며, sync() 시 마지막 시간 이후의 데이터만 DB에서 읽어 이어 붙입니다.
+    load()는 파일을 메모리 맵으로 열어 복사 없이 배열을 반환합니다.
+    """
+
+    def __init__(self, db_handler, cache_dir):
+        self.db_handler = db_handler
+        self.cache_dir = cache_dir
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, table_name, ticker):
+        return os.path.join(self.cache_dir, table_name, ticker)
+
+    def _read_meta(self, path):
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return {'rows': 0, 'last_ts': None, 'columns': []}
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_meta(self, path, meta):
+        # 임시 파일에 쓴 뒤 교체하여, 중간에 중단되어도 이전 메타 정보가 유지되도록 합니다.
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    def sync(self, ticker, table_name):
+        """DB에서 캐시의 마지막 시간 이후 데이터를 읽어 캐시에 추가합니다. 추가된 행 수를 반환합니다."""
+        path = self._path(table_name, ticker)
+        os.makedirs(path, exist_ok=True)
+        meta = self._read_meta(path)
+        since = pd.Timestamp(meta['last_ts']).to_pydatetime() if meta['last_ts'] else None
+
+        added = 0
+        for chunk in self.db_handler.iter_rows_since(ticker, table_name, since):
+            if chunk.empty:
+                continue
+            if not meta['columns']:
+                meta['columns'] = [c for c in CACHE_COLUMNS if c in chunk.columns]
+            self._append(path, meta, chunk)
+            added += len(chunk)
+
+        if added:
+            self.logger.info(f"'{ticker}' {table_name} 캐시에 {added}개 행 추가 (총 {meta['rows']}개)")
+        return added
+
+    def invalidate(self, ticker, table_name):
+        """
+        종목 캐시를 삭제하여 다음 sync() 때 DB에서 전체를 다시 읽도록 합니다.
+        sync()는 마지막 시간 이후의 행만 이어 붙이므로, 그보다 이전 봉을 추가하거나 기존 행의 지표를 다시 계산한 경우
+        (백필 등) 반드시 호출해야 합니다.
+        """
+        path = self._path(table_name, ticker)
+        if not os.path.exists(path):
+            return
+        # 메타 파일을 먼저 지워, 삭제 도중 중단되더라도 빈 캐시로 인식되도록 합니다.
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        shutil.rmtree(path, ignore_errors=True)
+        self.logger.info(f"'{ticker}' {table_name} 캐시를 삭제했습니다. (다음 사용 시 DB에서 다시 생성)")
+
+    def _append(self, path, meta, chunk):
+        chunk = chunk.sort_values('timestamp')
+        arrays = {'timestamp': pd.to_datetime(chunk['timestamp']).to_numpy(dtype='datetime64[ns]').view('<i8')}
+        for col in meta['columns']:
+            arrays[col] = pd.to_numeric(chunk[col]).to_numpy(dtype='<f8')
+
+        for col, values in arrays.items():
+            file_path = os.path.join(path, f"{col}.bin")
+            with open(file_path, 'ab') as f:
+                # 이전 추가가 메타 갱신 전에 중단되었다면 메타 기준 길이 이후의 바이트를 잘라냅니다.
+                f.truncate(meta['rows'] * values.itemsize)
+                f.write(values.tobytes())
+
+        meta['rows'] += len(chunk)
+        meta['last_ts'] = str(chunk['timestamp'].iloc[-1])
+        self._write_meta(path, meta)
+
+    def load(self, ticker, table_name):
+        """캐시를 메모리 맵 배열로 엽니다. 반환값: 컬럼명 -> 배열 (timestamp는 datetime64[ns])"""
+        path = self._path(table_name, ticker)
+        meta = self._read_meta(path)
+        rows = meta['rows']
+        arrays = {}
+        for col in ['timestamp'] + meta['columns']:
+            dtype = 'datetime64[ns]' if col == 'timestamp' else '<f8'
+            if rows == 0:
+                arrays[col] = np.empty(0, dtype=dtype)
+            else:
+                arrays[col] = np.memmap(os.path.join(path, f"{col}.bin"), dtype=dtype, mode='r', shape=(rows,))
+        return arrays
+
+    def load_frame(self, ticker, table_name):
+        """캐시를 DataFrame으로 반환합니다."""
+        arrays = self.load(ticker, table_name)
+        if len(arrays['timestamp']) == 0:
+            return pd.DataFrame()
+        df = pd.DataFrame(arrays, copy=False)
+        df.insert(0, 'ticker', ticker)
+        return df
@@ -1,7 +1,27 @@
 import pymysql
 import pandas as pd
 from sqlalchemy import create_engine
+import contextlib
+import functools
 import logging
+import threading
+
+from common.metrics import metrics
+
+# 시세 테이블의 고유 키 (종목, 시간)
+KEY_COLUMNS = ['ticker', 'timestamp']
+
+
+def _timed(method):
+    """DB 메서드의 소요 시간을 지표로 기록합니다."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with metrics.timer('db_query_seconds', method=name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DBHandler:
     def __init__(self, config):
@@ -9,22 +29,19 @@ class DBHandler:
         self.logger = logging.getLogger(__name__)
         self.conn = None
         self.engine = None
+        # pymysql 연결은 스레드 간 공유가 안전하지 않으므로 커서 사용을 직렬화합니다.
+        self._lock = threading.Lock()
+        self.chunk_size = int(self.config.get('upsert_chunk_size', 1000))
         self.connect()
 
     def connect(self):
         """데이터베이스에 연결합니다."""
         try:
-            self.conn = pymysql.connect(
-                host=self.config['host'],
-                user=self.config['user'],
-                password=self.config['password'],
-                db=self.config['database'],
-                port=int(self.config['port']),
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor # 결과를 딕셔너리로 받기 위해 추가
-            )
+            self.conn = self.create_connection()
+            # 조회용 엔진은 커넥션 풀을 사용하며, 끊어진 연결은 사용 전에 확인 후 재연결합니다.
             self.engine = create_engine(
-                f"mysql+pymysql://{self.config['user']}:{self.config['password']}@{self.config['host']}:{self.config['port']}/{self.config['database']}"
+                f"mysql+pymysql://{self.config['user']}:{self.config['password']}@{self.config['host']}:{self.config['port']}/{self.config['database']}",
+                pool_pre_ping=True, pool_recycle=3600
             )
             self.logger.info("데이터베이스 연결 성공")
         except pymysql.Error as e:
@@ -32,8 +49,35 @@ class DBHandler:
             self.logger.critical("DB 연결 정보를 확인하고, 데이터베이스와 테이블이 생성되었는지 확인해주세요.")
             raise
 
+    def create_connection(self):
+        """새 pymysql 연결을 생성합니다. (백그라운드 저장 스레드 등 별도 연결이 필요한 곳에서 사용)"""
+        return pymysql.connect(
+            host=self.config['host'],
+            user=self.config['user'],
+            password=self.config['password'],
+            db=self.config['database'],
+            port=int(self.config['port']),
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor # 결과를 딕셔너리로 받기 위해 추가
+        )
+
     def insert_data(self, df, table_name):
-        """데이터를 지정된 테이블에 저장합니다."""
+        """
+        데이터를 지정된 테이블에 저장합니다.
+        이미 존재하는 (ticker, timestamp) 행은 새 값으로 갱신하며, (신규 행 수, 갱신 행 수)를 반환합니다.
+        """
+        if df.empty:
+            return 0, 0
+        try:
+            return self.upsert_data(df, table_name)
+        except Exception as e:
+            self.logger.error(f"{table_name} 데이터 {len(df)}건 저장 실패: {e}")
+            metrics.inc('db_dropped_rows_total', len(df), table=table_name)
+            return 0, 0
+
+    @_timed
+    def append_data(self, df, table_name):
+        """pandas to_sql로 데이터를 추가합니다. (중복 행이 하나라도 있으면 배치 전체가 실패, benchmarks/db_write_benchmark.py 비교용)"""
         if df.empty:
             return
         try:
@@ -41,11 +85,67 @@ class DBHandler:
         except Exception as e:
             self.logger.warning(f"{table_name} 데이터 저장 중 오류 발생 (중복 가능성): {e}")
 
+    @_timed
+    def upsert_data(self, df, table_name, chunk_size=None, conn=None):
+        """
+        여러 행을 묶은 INSERT ... ON DUPLICATE KEY UPDATE 문으로 데이터를 일괄 저장합니다.
+        chunk_size 행 단위로 나누어 전송하고 하나의 트랜잭션으로 커밋하며, 실패 시 롤백 후 예외를 전달합니다.
+        conn을 지정하면 공유 연결 대신 해당 연결을 사용합니다. (호출자가 연결을 단독으로 사용해야 함)
+        반환값: (신규 행 수, 갱신 행 수)
+        """
+        if df.empty:
+            return 0, 0
+        chunk_size = chunk_size or self.chunk_size
+        df = df.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+
+        columns = list(df.columns)
+        update_cols = [c for c in columns if c not in KEY_COLUMNS]
+        col_sql = ', '.join(f"`{c}`" for c in columns)
+        row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        update_sql = ', '.join(f"`{c}` = VALUES(`{c}`)" for c in update_cols)
+        key_idx = [columns.index(c) for c in KEY_COLUMNS]
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+
+        inserted = updated = 0
+        # 전용 연결(conn)을 받은 경우에는 공유 연결 잠금이 필요 없습니다.
+        lock = self._lock if conn is None else contextlib.nullcontext()
+        conn = conn or self.conn
+        with lock:
+            try:
+                with conn.cursor() as cursor:
+                    for start in range(0, len(rows), chunk_size):
+                        chunk = rows[start:start + chunk_size]
+
+                        # 신규/갱신 건수 집계를 위해 이미 존재하는 키 수를 먼저 조회합니다. (기본키 조회)
+                        # INSERT의 영향 행 수는 값이 같은 기존 행을 0으로 세므로 신규/갱신을 정확히 나눌 수 없습니다.
+                        key_sql = ', '.join(['(%s, %s)'] * len(chunk))
+                        cursor.execute(
+                            f"SELECT COUNT(*) AS cnt FROM {table_name} WHERE (ticker, timestamp) IN ({key_sql})",
+                            [row[i] for row in chunk for i in key_idx])
+                        existing = cursor.fetchone()['cnt']
+
+                        query = f"INSERT INTO {table_name} ({col_sql}) VALUES {', '.join([row_sql] * len(chunk))}"
+                        if update_cols:
+                            query += f" ON DUPLICATE KEY UPDATE {update_sql}"
+                        cursor.execute(query, [value for row in chunk for value in row])
+
+                        inserted += len(chunk) - existing
+                        updated += existing
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except pymysql.Error:
+                    pass  # 연결이 끊어진 경우 롤백도 실패하므로 원래 예외를 전달합니다.
+                raise
+        return inserted, updated
+
+    @_timed
     def get_last_timestamp(self, ticker, table_name):
         """특정 테이블에서 종목의 마지막 데이터 시간을 조회합니다."""
         query = f"SELECT MAX(timestamp) FROM {table_name} WHERE ticker = %s"
         try:
-            with self.conn.cursor() as cursor:
+            with self._lock, self.conn.cursor() as cursor:
                 cursor.execute(query, (ticker,))
                 result = cursor.fetchone()
                 # 딕셔너리에서 값 추출
@@ -54,6 +154,28 @@ class DBHandler:
             self.logger.error(f"{table_name}에서 마지막 타임스탬프 조회 실패: {e}")
             return None
 
+    @_timed
+    def get_last_timestamps(self, table_names):
+        """
+        여러 테이블의 종목별 마지막 데이터 시간을 한 번의 쿼리로 조회합니다.
+        반환값: {(테이블명, 종목): 마지막 시간}
+        """
+        query = " UNION ALL ".join(
+            f"SELECT '{table}' AS table_name, ticker, MAX(timestamp) AS last_ts FROM {table} GROUP BY ticker"
+            for table in table_names)
+        try:
+            with self._lock:
+                with self.conn.cursor() as cursor:
+                    cursor.execute(query)
+                    rows = cursor.fetchall()
+                # 장기 연결의 트랜잭션 스냅샷에 묶이지 않도록 조회 후 트랜잭션을 종료합니다.
+                self.conn.commit()
+            return {(row['table_name'], row['ticker']): row['last_ts'] for row in rows if row['last_ts']}
+        except pymysql.Error as e:
+            self.logger.error(f"마지막 타임스탬프 일괄 조회 실패: {e}")
+            return None
+
+    @_timed
     def get_last_n_rows(self, ticker, table_name, n=40):
         """특정 테이블에서 종목의 마지막 N개 데이터를 조회하여 시간순으로 정렬된 DataFrame을 반환합니다."""
         query = f"(SELECT * FROM {table_name} WHERE ticker = %s ORDER BY timestamp DESC LIMIT %s)"
@@ -65,4 +187,32 @@ class DBHandler:
             return pd.DataFrame()
         except Exception as e:
             self.logger.error(f"{table_name}에서 마지막 {n}개 데이터 조회 실패: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+
+    @_timed
+    def get_history(self, ticker, table_name):
+        """특정 테이블에서 종목의 전체 데이터를 시간순으로 조회합니다."""
+        query = f"SELECT * FROM {table_name} WHERE ticker = %s ORDER BY timestamp"
+        try:
+            return pd.read_sql(query, self.engine, params=(ticker,))
+        except Exception as e:
+            self.logger.error(f"{table_name}에서 '{ticker}' 전체 데이터 조회 실패: {e}")
+            return pd.DataFrame()
+
+    def iter_rows_since(self, ticker, table_name, since=None, chunksize=100000):
+        """특정 시간 이후의 종목 데이터를 시간순으로 chunksize 행씩 나누어 반환하는 제너레이터입니다."""
+        if since is None:
+            query = f"SELECT * FROM {table_name} WHERE ticker = %s ORDER BY timestamp"
+            params = (ticker,)
+        else:
+            query = f"SELECT * FROM {table_name} WHERE ticker = %s AND timestamp > %s ORDER BY timestamp"
+            params = (ticker, since)
+        try:
+            # chunksize만으로는 드라이버가 결과 전체를 메모리에 받아 두므로, 서버 측 커서(SSCursor)로 읽은 만큼만 가져옵니다.
+            # 스트리밍 중인 연결은 다른 쿼리에 쓸 수 없으므로 풀에서 전용 연결을 받아 다 읽은 뒤 반납합니다.
+            with self.engine.connect().execution_options(stream_results=True) as conn:
+                for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+                    yield chunk
+        except Exception as e:
+            self.logger.error(f"{table_name}에서 '{ticker}' 데이터 조회 실패: {e}")
+            raise
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""
+시세 테이블 스키마 관리.
+
+stock_data_min / stock_data_day를 (ticker, timestamp) 기본키로 만들고, 분봉 테이블은 월 단위 RANGE COLUMNS 파티션으로 나눕니다.
+InnoDB는 기본키 순서로 행을 저장(클러스터드 인덱스)하므로 종목별 MAX(timestamp), 최근 N개, 전체 이력 조회가
+별도 보조 인덱스 없이 기본키 범위 읽기만으로 처리됩니다.
+
+사용법: python -m database.schema [migrate|check|partitions|prune] [--config 경로]
+"""
+import argparse
+import configparser
+import gzip
+import logging
+import os
+from datetime import date
+
+import pandas as pd
+import pymysql
+
+from common.indicator_engine import INDICATOR_COLUMNS
+
+MINUTE_TABLE = 'stock_data_min'
+DAY_TABLE = 'stock_data_day'
+KEY_COLUMNS = ['ticker', 'timestamp']
+
+# 컬럼 정의 (보조지표는 초기 구간 계산값이 없을 수 있으므로 NULL 허용)
+COLUMN_DEFINITIONS = [
+    ('ticker', 'VARCHAR(16) NOT NULL'),
+    ('timestamp', 'DATETIME NOT NULL'),
+    ('open', 'DOUBLE NULL'),
+    ('high', 'DOUBLE NULL'),
+    ('low', 'DOUBLE NULL'),
+    ('close', 'DOUBLE NULL'),
+    ('volume', 'BIGINT NULL'),
+    ('trading_value', 'DOUBLE NULL'),
+] + [(col, 'DOUBLE NULL') for col in INDICATOR_COLUMNS]
+
+# 성능 점검 대상 조회 (DBHandler/WatermarkIndex가 실제로 실행하는 형태)
+HOT_QUERIES = {
+    'last_timestamp': "SELECT MAX(timestamp) FROM {table} WHERE ticker = %s",
+    'last_timestamps': "SELECT ticker, MAX(timestamp) FROM {table} GROUP BY ticker",
+    'last_n_rows': "SELECT * FROM {table} WHERE ticker = %s ORDER BY timestamp DESC LIMIT 40",
+    'history': "SELECT * FROM {table} WHERE ticker = %s ORDER BY timestamp",
+    'rows_since': "SELECT * FROM {table} WHERE ticker = %s AND timestamp > %s ORDER BY timestamp",
+}
+
+# EXPLAIN의 Extra 중 인덱스만으로 처리되었음을 뜻하는 항목
+_INDEX_ONLY_EXTRA = ('Select tables optimized away', 'Using index for group-by', 'No matching min/max row',
+                     'no matching row in const table')
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month, upper=None):
+    """month가 담기는 파티션 정의 (upper가 없으면 다음 달 1일 미만)"""
+    upper = upper or _add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{upper:%Y-%m-%d}')"
+
+
+def check_explain(rows):
+    """
+    EXPLAIN 결과가 기본키(클러스터드 인덱스)만으로 처리되는지 확인합니다.
+    반환값: (통과 여부, 요약 문자열)
+    """
+    problems = []
+    for row in rows:
+        extra = row.get('Extra') or ''
+        if any(flag in extra for flag in _INDEX_ONLY_EXTRA):
+            continue
+        if row.get('type') == 'ALL' or row.get('key') != 'PRIMARY':
+            problems.append(f"인덱스 미사용 (type={row.get('type')}, key={row.get('key')})")
+        if 'Using filesort' in extra or 'Using temporary' in extra:
+            problems.append(f"추가 정렬/임시 테이블 ({extra})")
+    summary = '; '.join(f"type={r.get('type')}, key={r.get('key')}, partitions={r.get('partitions')}, "
+                        f"rows={r.get('rows')}, extra={r.get('Extra')}" for r in rows)
+    return not problems, '; '.join(problems) or summary
+
+
+class SchemaManager:
+    """
+    시세 테이블의 생성/변경(migrate), 분봉 월 파티션 유지(미래 파티션 추가, 오래된 파티션 보관 후 삭제),
+    주요 조회의 EXPLAIN 점검을 담당합니다. DDL은 저장 작업과 섞이지 않도록 별도 연결에서 실행합니다.
+    """
+
+    def __init__(self, db_handler, config):
+        self.db_handler = db_handler
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.database = self.config['database']
+        # 미리 만들어 둘 미래 월 파티션 수 / 보관할 개월 수 (0이면 삭제하지 않음) / 삭제 전 CSV로 보관할 경로
+        self.months_ahead = int(self.config.get('partition_months_ahead', 3))
+        self.retention_months = int(self.config.get('partition_retention_months', 0))
+        self.archive_dir = self.config.get('partition_archive_dir', '')
+
+    def _execute(self, query, params=None):
+        conn = self.db_handler.create_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    # --- 스키마 생성/변경 ---
+
+    def table_exists(self, table):
+        rows = self._execute("SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                             (self.database, table))
+        return bool(rows)
+
+    def create_table(self, table, partitioned):
+        columns = ',\n  '.join(f"`{name}` {definition}" for name, definition in COLUMN_DEFINITIONS)
+        query = (f"CREATE TABLE IF NOT EXISTS {table} (\n  {columns},\n  PRIMARY KEY (ticker, timestamp)\n"
+                 f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+        if partitioned:
+            query += self._partition_by(_month_start(date.today()))
+        self._execute(query)
+        self.logger.info(f"{table} 테이블 생성 완료")
+
+    def _partition_by(self, first_month):
+        """first_month부터 이번 달 + months_ahead까지의 월 파티션과 MAXVALUE 파티션 정의"""
+        months, month = [], first_month
+        last = _add_months(_month_start(date.today()), self.months_ahead)
+        while month <= last:
+            months.append(partition_clause(month))
+            month = _add_months(month, 1)
+        months.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        return "\nPARTITION BY RANGE COLUMNS(timestamp) (\n  " + ',\n  '.join(months) + "\n)"
+
+    def primary_key(self, table):
+        rows = self._execute(
+            "SELECT COLUMN_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY' ORDER BY SEQ_IN_INDEX",
+            (self.database, table))
+        return [row['COLUMN_NAME'] for row in rows]
+
+    def migrate(self, rebuild=True):
+        """
+        테이블이 없으면 만들고, 있으면 누락된 컬럼/기본키/분봉 파티션을 추가합니다.
+        기존 기본키가 (ticker, timestamp)가 아니면 자동으로 바꾸지 않고 필요한 작업을 로그로 안내합니다.
+        rebuild가 False이면 테이블 전체를 다시 쓰는 작업(기본키 추가, 파티션 적용)은 하지 않고 안내만 합니다.
+        반환값: 스키마가 기대한 형태이면 True
+        """
+        ok = True
+        for table, partitioned in ((DAY_TABLE, False), (MINUTE_TABLE, True)):
+            if not self.table_exists(table):
+                self.create_table(table, partitioned)
+                continue
+
+            existing = {row['COLUMN_NAME'] for row in self._execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                (self.database, table))}
+            for name, definition in COLUMN_DEFINITIONS:
+                if name not in existing:
+                    self._execute(f"ALTER TABLE {table} ADD COLUMN `{name}` {definition}")
+                    self.logger.info(f"{table}.{name} 컬럼 추가")
+
+            primary_key = self.primary_key(table)
+            if not primary_key and not rebuild:
+                self.logger.warning(f"{table}에 기본키가 없습니다. python -m database.schema migrate 로 추가하세요.")
+                ok = False
+                continue
+            if not primary_key:
+                self.logger.info(f"{table} 기본키 (ticker, timestamp) 추가 중...")
+                self._execute(f"ALTER TABLE {table} ADD PRIMARY KEY (ticker, timestamp)")
+            elif primary_key != KEY_COLUMNS:
+                self.logger.error(f"{table}의 기본키가 ({', '.join(primary_key)})입니다. (ticker, timestamp)로 바꾼 뒤 "
+                                  f"다시 실행하세요. 예: ALTER TABLE {table} DROP PRIMARY KEY, "
+                                  f"ADD PRIMARY KEY (ticker, timestamp)")
+                ok = False
+                continue
+
+            if partitioned and not self.partitions(table):
+                if not rebuild:
+                    self.logger.warning(f"{table}에 월 파티션이 없습니다. python -m database.schema migrate 로 적용하세요.")
+                    continue
+                first = self._execute(f"SELECT MIN(timestamp) AS first_ts FROM {table}")[0]['first_ts']
+                self.logger.warning(f"{table} 월 파티션 적용 중... (테이블 전체를 다시 쓰므로 데이터가 많으면 오래 걸립니다)")
+                self._execute(f"ALTER TABLE {table}" + self._partition_by(_month_start(first or date.today())))
+        if ok:
+            self.ensure_partitions()
+        return ok
+
+    def prepare(self):
+        """
+        시작 시 실행하는 스키마 점검. 없는 테이블 생성, 누락 컬럼 추가, 미래 파티션 추가만 수행하고
+        테이블 전체를 다시 쓰는 작업은 CLI(python -m database.schema migrate)에 맡깁니다. DB 오류는 로그만 남깁니다.
+        """
+        try:
+            return self.migrate(rebuild=False)
+        except pymysql.Error as e:
+            self.logger.error(f"시작 시 스키마 점검 실패: {e}")
+            return False
+
+    # --- 파티션 관리 ---
+
+    def partitions(self, table=MINUTE_TABLE):
+        """[(파티션 이름, 상한 문자열, 행 수 추정치)]를 순서대로 반환합니다. (파티션이 없으면 빈 목록)"""
+        rows = self._execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION", (self.database, table))
+        return [(row['PARTITION_NAME'], row['PARTITION_DESCRIPTION'], row['TABLE_ROWS']) for row in rows]
+
+    def ensure_partitions(self, table=MINUTE_TABLE):
+        """이번 달 + months_ahead까지의 월 파티션이 없으면 MAXVALUE 파티션을 나누어 추가합니다."""
+        names = [name for name, _, _ in self.partitions(table)]
+        if 'pmax' not in names:
+            return []
+        month, last = _month_start(date.today()), _add_months(_month_start(date.today()), self.months_ahead)
+        added = []
+        while month <= last:
+            if partition_name(month) not in names:
+                added.append(month)
+            month = _add_months(month, 1)
+        # 이미 있는 마지막 월 파티션보다 이전 달은 중간에 끼워 넣을 수 없으므로 이후 달만 추가합니다.
+        monthly = [name for name in names if name != 'pmax']
+        if monthly:
+            added = [m for m in added if partition_name(m) > monthly[-1]]
+        if not added:
+            return []
+        clauses = ', '.join([partition_clause(m) for m in added] + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"])
+        self._execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({clauses})")
+        self.logger.info(f"{table} 파티션 추가: {', '.join(partition_name(m) for m in added)}")
+        return added
+
+    def prune_partitions(self, table=MINUTE_TABLE, retention_months=None, archive_dir=None):
+        """
+        retention_months보다 오래된 월 파티션을 삭제합니다. archive_dir이 지정되면 삭제 전에 파티션 전체를
+        {archive_dir}/{table}_{파티션}.csv.gz로 내보냅니다. 반환값: 삭제한 파티션 이름 목록
+        """
+        retention_months = self.retention_months if retention_months is None else retention_months
+        archive_dir = self.archive_dir if archive_dir is None else archive_dir
+        if retention_months <= 0:
+            return []
+        cutoff = partition_name(_add_months(_month_start(date.today()), -retention_months))
+        dropped = []
+        for name, _, _ in self.partitions(table):
+            if name == 'pmax' or name >= cutoff:
+                continue
+            if archive_dir and not self.archive_partition(table, name, archive_dir):
+                break
+            self._execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+            self.logger.info(f"{table} 파티션 {name} 삭제")
+            dropped.append(name)
+        return dropped
+
+    def archive_partition(self, table, name, archive_dir, chunksize=200000):
+        """파티션의 모든 행을 gzip CSV 파일로 내보냅니다. 실패하면 False를 반환합니다."""
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{table}_{name}.csv.gz")
+        try:
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8', newline='') as f:
+                header = True
+                for chunk in pd.read_sql(f"SELECT * FROM {table} PARTITION ({name}) ORDER BY ticker, timestamp",
+                                         self.db_handler.engine, chunksize=chunksize):
+                    chunk.to_csv(f, index=False, header=header)
+                    header = False
+            os.replace(path + '.tmp', path)
+            self.logger.info(f"{table} 파티션 {name} 보관 완료: {path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"{table} 파티션 {name} 보관 실패: {e}")
+            return False
+
+    def maintain(self):
+        """미래 파티션 추가와 보관 기간이 지난 파티션 정리를 수행합니다. (매일 실행)"""
+        try:
+            self.ensure_partitions()
+            self.prune_partitions()
+        except pymysql.Error as e:
+            self.logger.error(f"파티션 관리 실패: {e}")
+
+    # --- 조회 계획 점검 ---
+
+    def check_queries(self, ticker=None):
+        """
+        HOT_QUERIES의 EXPLAIN 결과를 점검합니다. ticker가 없으면 테이블의 임의 종목을 사용합니다.
+        반환값: [(테이블, 조회 이름, 통과 여부, 요약)]
+        """
+        results = []
+        for table in (MINUTE_TABLE, DAY_TABLE):
+            sample = ticker
+            if sample is None:
+                rows = self._execute(f"SELECT ticker FROM {table} LIMIT 1")
+                sample = rows[0]['ticker'] if rows else '000000'
+            for name, query in HOT_QUERIES.items():
+                params = (sample, _add_months(_month_start(date.today()), -1)) if '%s AND' in query else \
+                    ((sample,) if '%s' in query else None)
+                rows = self._execute("EXPLAIN " + query.format(table=table), params)
+                ok, summary = check_explain(rows)
+                results.append((table, name, ok, summary))
+                log = self.logger.info if ok else self.logger.warning
+                log(f"[{'OK' if ok else 'FAIL'}] {table}.{name}: {summary}")
+        return results
+
+
+def main(argv=None):
+    from common.logger import setup_logger
+    from database.db_handler import DBHandler
+
+    parser = argparse.ArgumentParser(description="시세 테이블 스키마 관리")
+    parser.add_argument('command', choices=['migrate', 'check', 'partitions', 'prune'],
+                        help="migrate: 테이블 생성/변경, check: 주요 조회 EXPLAIN 점검, "
+                             "partitions: 분봉 파티션 목록, prune: 보관 기간이 지난 파티션 정리")
+    parser.add_argument('--config', default='config.ini', help="설정 파일 경로")
+    parser.add_argument('--ticker', help="check에 사용할 종목 코드")
+    args = parser.parse_args(argv)
+
+    setup_logger()
+    config = configparser.ConfigParser()
+    config.read(args.config, encoding='utf-8')
+    manager = SchemaManager(DBHandler(config['DATABASE']), config['DATABASE'])
+    if args.command == 'migrate':
+        return 0 if manager.migrate() else 1
+    if args.command == 'check':
+        return 0 if all(ok for _, _, ok, _ in manager.check_queries(args.ticker)) else 1
+    if args.command == 'partitions':
+        for name, upper, rows in manager.partitions():
+            print(f"{name:10s} < {upper:24s} {rows}")
+        return 0
+    manager.prune_partitions()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+
+
+class WatermarkIndex:
+    """
+    (테이블, 종목)별 마지막 저장 시간을 메모리에 유지하는 인덱스.
+    시작 시 한 번의 그룹 쿼리로 전체를 불러온 뒤, 저장이 성공할 때마다 로컬에서 갱신합니다.
+    reconcile_minutes가 설정되면 해당 주기마다 DB와 다시 맞춥니다.
+    """
+
+    def __init__(self, db_handler, table_names, reconcile_minutes=0):
+        self.db_handler = db_handler
+        self.table_names = list(table_names)
+        self.reconcile_interval = float(reconcile_minutes) * 60
+        self.logger = logging.getLogger(__name__)
+        self._marks = {}
+        self._lock = threading.Lock()
+        self._loaded_at = None
+
+    def load(self):
+        """DB에서 전체 워터마크를 불러옵니다. 로컬 값이 더 최신이면 로컬 값을 유지합니다."""
+        marks = self.db_handler.get_last_timestamps(self.table_names)
+        if marks is None:
+            return False
+        with self._lock:
+            for key, ts in marks.items():
+                current = self._marks.get(key)
+                if current is None or ts > current:
+                    self._marks[key] = ts
+            self._loaded_at = time.monotonic()
+        self.logger.info(f"워터마크 {len(marks)}건 로드 완료")
+        return True
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def maybe_reconcile(self):
+        """주기가 지났으면 DB와 워터마크를 다시 맞춥니다."""
+        if self._loaded_at is None:
+            return self.load()
+        if self.reconcile_interval and time.monotonic() - self._loaded_at >= self.reconcile_interval:
+            return self.load()
+        return False
+
+    def get(self, table_name, ticker):
+        with self._lock:
+            return self._marks.get((table_name, ticker))
+
+    def advance(self, table_name, ticker, ts):
+        """저장된 데이터의 마지막 시간으로 워터마크를 앞당깁니다. (뒤로 돌아가지 않음)"""
+        if ts is None:
+            return
+        with self._lock:
+            current = self._marks.get((table_name, ticker))
+            if current is None or ts > current:
+                self._marks[(table_name, ticker)] = ts
+
+    def on_saved(self, table_name, df):
+        """저장 완료된 데이터프레임으로 종목별 워터마크를 갱신합니다. (WriteBehindWriter 콜백 형식)"""
+        if df.empty:
+            return
+        for ticker, ts in df.groupby('ticker')['timestamp'].max().items():
+            self.advance(table_name, ticker, ts.to_pydatetime() if hasattr(ts, 'to_pydatetime') else ts)
@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+
+import pandas as pd
+import pymysql
+
+from common.metrics import metrics
+
+# 재연결 후 재시도할 가치가 있는 연결 관련 오류
+RETRYABLE_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """
+    수집 스레드 대신 백그라운드에서 DB 저장을 수행하는 write-behind 저장기.
+    submit()으로 넣은 배치는 제한된 크기의 큐에 쌓이고(가득 차면 대기하여 역압 적용),
+    저장 스레드가 큐에 쌓인 배치를 테이블별로 합쳐 전용 연결에서 한 트랜잭션으로 저장합니다.
+    연결 오류 시에는 재연결 후 재시도하며, close() 시 남은 배치를 모두 저장한 뒤 종료합니다.
+    재시도를 모두 실패하는 등 저장하지 못하고 버린 배치는 on_drop(table_name, df)으로 알려,
+    호출한 쪽이 해당 봉을 다음 수집 때 다시 만들어 저장할 수 있도록 합니다.
+    """
+
+    def __init__(self, db_handler, config, on_drop=None):
+        self.db_handler = db_handler
+        self.on_drop = on_drop
+        self.logger = logging.getLogger(__name__)
+        self.num_threads = int(config.get('writer_threads', 2))
+        self.batch_rows = int(config.get('write_batch_rows', 5000))
+        self.max_retries = int(config.get('write_max_retries', 5))
+        self.retry_delay = float(config.get('write_retry_delay', 1.0))
+        self.queue = queue.Queue(maxsize=int(config.get('write_queue_size', 1000)))
+        self._threads = []
+        self._closed = False
+
+    def start(self):
+        """저장 스레드를 시작합니다. 스레드마다 전용 DB 연결을 하나씩 사용합니다."""
+        for i in range(self.num_threads):
+            thread = threading.Thread(target=self._run, name=f"db-writer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"백그라운드 DB 저장 스레드 {self.num_threads}개 시작")
+        return self
+
+    def submit(self, df, table_name, callback=None, timeout=None):
+        """
+        저장할 배치를 큐에 넣습니다. 큐가 가득 차면 timeout 동안 대기합니다.
+        callback(table_name, df)은 저장 성공 후 저장 스레드에서 호출됩니다.
+        큐에 넣지 못하면 False를 반환합니다.
+        """
+        if df is None or df.empty:
+            return True
+        if self._closed:
+            self.logger.error(f"저장기가 종료되어 {table_name} 데이터 {len(df)}건을 저장하지 못했습니다.")
+            self._drop(table_name, df)
+            return False
+        try:
+            self.queue.put((table_name, df, callback), timeout=timeout)
+            return True
+        except queue.Full:
+            self.logger.error(f"저장 대기열이 가득 차 {table_name} 데이터 {len(df)}건을 버립니다.")
+            self._drop(table_name, df)
+            return False
+
+    def _drop(self, table_name, df):
+        """저장하지 못한 배치를 집계하고 on_drop으로 알립니다."""
+        metrics.inc('db_dropped_rows_total', len(df), table=table_name)
+        if self.on_drop:
+            try:
+                self.on_drop(table_name, df)
+            except Exception as e:
+                self.logger.error(f"저장 실패 처리 중 오류: {e}")
+
+    def flush(self):
+        """현재까지 들어온 배치가 모두 저장될 때까지 대기합니다."""
+        self.queue.join()
+
+    def close(self, timeout=None):
+        """남은 배치를 모두 저장하고 저장 스레드를 종료합니다."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self.logger.info("백그라운드 DB 저장 종료 (대기 중이던 데이터 저장 완료)")
+
+    def _run(self):
+        conn = None
+        stop = False
+        while not stop:
+            items = [self.queue.get()]
+            # 큐에 이미 쌓인 배치를 batch_rows 한도까지 모아 한 번에 저장합니다.
+            rows = 0 if items[0] is _STOP else len(items[0][1])
+            while rows < self.batch_rows:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                if item is not _STOP:
+                    rows += len(item[1])
+
+            batches = [item for item in items if item is not _STOP]
+            stop = len(batches) < len(items)
+            try:
+                if batches:
+                    conn = self._write(conn, batches)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+            # 중지 신호를 여러 개 가져온 경우 다른 스레드 몫을 되돌려 놓습니다.
+            for _ in range(len(items) - len(batches) - 1):
+                self.queue.put(_STOP)
+
+        self._close_quietly(conn)
+
+    def _write(self, conn, batches):
+        """배치들을 테이블별로 합쳐 저장하고, (재연결되었을 수 있는) 연결을 반환합니다."""
+        by_table = {}
+        for table_name, df, callback in batches:
+            by_table.setdefault(table_name, []).append((df, callback))
+
+        for table_name, entries in by_table.items():
+            df = pd.concat([df for df, _ in entries], ignore_index=True)
+            conn, saved = self._write_table(conn, table_name, df)
+            if not saved:
+                continue
+            for part, callback in entries:
+                if callback:
+                    try:
+                        callback(table_name, part)
+                    except Exception as e:
+                        self.logger.error(f"저장 완료 콜백 처리 중 오류: {e}")
+        return conn
+
+    def _write_table(self, conn, table_name, df):
+        """한 테이블의 데이터를 저장합니다. 연결 오류 시 재연결하여 재시도합니다. 반환값: (연결, 성공 여부)"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                if conn is None:
+                    conn = self.db_handler.create_connection()
+                inserted, updated = self.db_handler.upsert_data(df, table_name, conn=conn)
+                self.logger.debug(f"{table_name} 백그라운드 저장 완료 (신규 {inserted}개, 갱신 {updated}개)")
+                return conn, True
+            except RETRYABLE_ERRORS as e:
+                self._close_quietly(conn)
+                conn = None
+                if attempt == self.max_retries:
+                    self.logger.error(f"{table_name} 데이터 {len(df)}건 저장 실패 (재시도 {attempt}회 초과): {e}")
+                    break
+                delay = self.retry_delay * (2 ** attempt)
+                self.logger.warning(f"DB 연결 오류로 {delay:.1f}초 후 재연결하여 재시도합니다: {e}")
+                time.sleep(delay)
+            except Exception as e:
+                self.logger.error(f"{table_name} 데이터 {len(df)}건 저장 실패: {e}")
+                break
+        self._drop(table_name, df)
+        return conn, False
+
+    @staticmethod
+    def _close_quietly(conn):
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except pymysql.Error:
+            pass
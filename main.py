@@ -1,16 +1,48 @@
+import argparse
 import configparser
-import schedule
+import importlib
 import time
 from datetime import datetime, timedelta, date
-import pandas as pd
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from database.db_handler import DBHandler
+from database.write_behind import WriteBehindWriter
+from database.watermark import WatermarkIndex
+from database.schema import SchemaManager
 from api.kis_api import KISApi
-from core.model_trainer import ModelTrainer
-from core.trader import Trader
+from api.realtime_feed import KisRealtimeFeed
 from common.logger import setup_logger
-from common.utils import calculate_indicators
+from common.indicator_engine import IndicatorEngine
+from common.metrics import metrics
+from common.market_calendar import MarketCalendar
+from common.scheduler import MinuteScheduler
+from common.bar_array import BarArray
+from core.stream_ingestor import StreamingIngestor
+
+
+# 종목/테이블별 보조지표 상태 (수집 주기마다 DB를 다시 읽지 않기 위해 프로세스 내에 유지)
+indicator_engine = IndicatorEngine()
+
+# 분 경계에 맞춰 수집/매매 작업을 각각의 스레드에서 실행하는 스케줄러
+scheduler = MinuteScheduler()
+
+
+# 실행 모드별로 추가로 불러오는 모듈. TensorFlow/scikit-learn을 쓰는 모듈은 해당 모드에서만 불러옵니다.
+# 모드 시작 함수와 시작 비용 벤치마크(benchmarks/startup_benchmark.py)가 모두 _mode_module()로 이 모듈을 불러옵니다.
+MODE_MODULES = {
+    'collect': None,
+    'train': 'core.model_trainer',
+    'trade': 'core.trader',
+    'backtest': 'core.backtester',
+    'backfill': 'core.backfiller',
+}
+
+
+def _mode_module(mode):
+    """실행 모드의 모듈(MODE_MODULES)을 불러옵니다. 추가 모듈이 없는 모드는 None을 반환합니다."""
+    name = MODE_MODULES[mode]
+    return importlib.import_module(name) if name else None
 
 
 def _is_domestic(ticker):
@@ -18,87 +50,241 @@ def _is_domestic(ticker):
     return ticker.isdigit()
 
 
-def collect_data_job(db, api, tickers):
-    """일봉과 분봉 데이터를 모두 수집하여 각 테이블에 저장하는 함수"""
+def collect_data_job(db, api, tickers, max_workers=1, writer=None, watermarks=None, minute_bars=True):
+    """
+    일봉과 분봉 데이터를 모두 수집하여 각 테이블에 저장하는 함수.
+    minute_bars가 False이면 분봉은 건너뜁니다. (실시간 수집기가 분봉을 담당하는 경우)
+    """
     logger.info("=" * 50)
     logger.info(f"데이터 수집 작업 시작: {datetime.now()}")
     logger.info("=" * 50)
-    for ticker in tickers:
-        try:
-            logger.info(f"--- '{ticker}' 종목 처리 시작 ---")
+    started = time.monotonic()
+    with metrics.timer('collect_cycle_seconds'):
+        if watermarks:
+            watermarks.maybe_reconcile()
+
+        # API 호출 간격은 KISApi의 호출 제한기가 관리하므로 종목들을 병렬로 처리합니다.
+        if max_workers > 1 and len(tickers) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers)),
+                                    thread_name_prefix='collector') as executor:
+                list(executor.map(lambda t: _collect_ticker(db, api, t, writer, watermarks, minute_bars), tickers))
+        else:
+            for ticker in tickers:
+                _collect_ticker(db, api, ticker, writer, watermarks, minute_bars)
+
+    logger.info(f"데이터 수집 작업 완료: {len(tickers)}개 종목, {time.monotonic() - started:.2f}초 소요")
+
+
+def _open_market_job(calendar, tickers, job):
+    """장이 열린 시장의 종목만 골라 job(tickers)을 실행하는 예약 작업을 만듭니다."""
+    def run():
+        open_tickers = calendar.open_tickers(tickers) if calendar else tickers
+        if not open_tickers:
+            logger.debug("장이 열린 종목이 없어 작업을 건너뜁니다.")
+            return
+        job(open_tickers)
+    return run
+
 
-            # 1. 분봉 데이터 수집 (오늘 하루 데이터만 수집/업데이트)
-            table_min = 'stock_data_min'
-            last_ts_min = db.get_last_timestamp(ticker, table_min)
+def _last_timestamp(db, watermarks, ticker, table_name):
+    """종목의 마지막 저장 시간을 조회합니다. 워터마크 인덱스가 있으면 DB를 조회하지 않습니다."""
+    with metrics.timer('collect_stage_seconds', stage='last_timestamp'):
+        if watermarks and watermarks.loaded:
+            return watermarks.get(table_name, ticker)
+        return db.get_last_timestamp(ticker, table_name)
+
+
+def _store_bars(db, writer, watermarks, df, table_name, ticker, label):
+    """
+    수집한 봉 데이터를 저장합니다. write-behind 저장기가 있으면 큐에 넣고 바로 반환합니다.
+    저장이 성공하면 워터마크를 갱신합니다.
+    """
+    on_saved = watermarks.on_saved if watermarks else None
+    if writer:
+        with metrics.timer('collect_stage_seconds', stage='store'):
+            submitted = writer.submit(df, table_name, callback=on_saved)
+        if submitted:
+            metrics.inc('bars_ingested_total', len(df), table=table_name)
+            logger.info(f"'{ticker}': {label} {len(df)}개 저장 대기열 등록")
+    else:
+        with metrics.timer('collect_stage_seconds', stage='store'):
+            inserted, updated = db.insert_data(df, table_name)
+        metrics.inc('bars_ingested_total', inserted + updated, table=table_name)
+        logger.info(f"'{ticker}': {label} 저장 완료 (신규 {inserted}개, 갱신 {updated}개)")
+        if on_saved and inserted + updated > 0:
+            on_saved(table_name, df)
+
+
+def _forget_unsaved(table_name, df):
+    """
+    write-behind 저장기가 저장하지 못하고 버린 봉의 종목은 보조지표 상태를 초기화합니다.
+    다음 수집 때 DB에 실제로 저장된 마지막 봉 기준으로 상태를 복원하므로, 버려진 봉을 다시 받아 계산/저장합니다.
+    """
+    for ticker in df['ticker'].unique():
+        indicator_engine.reset((table_name, ticker))
+    logger.warning(f"{table_name} 저장 실패 종목 {df['ticker'].nunique()}개의 지표 상태를 초기화했습니다. (다음 수집 때 다시 저장)")
+
+
+def _collect_ticker(db, api, ticker, writer=None, watermarks=None, minute_bars=True):
+    """한 종목의 분봉/일봉 데이터를 수집하여 저장합니다."""
+    try:
+        logger.info(f"--- '{ticker}' 종목 처리 시작 ---")
+
+        # 1. 분봉 데이터 수집 (오늘 하루 데이터만 수집/업데이트)
+        table_min = 'stock_data_min'
+        chart_min = None
+        if minute_bars:
+            last_ts_min = _last_timestamp(db, watermarks, ticker, table_min)
             logger.info(f"'{ticker}' 분봉 DB 마지막 시간: {last_ts_min}")
 
             start_to_fetch = None
             if last_ts_min and last_ts_min.date() == date.today():
                 start_to_fetch = last_ts_min
 
-            chart_min = api.get_day_chart(ticker, start=start_to_fetch)
-            time.sleep(0.5)
-
-            if chart_min and chart_min.bars:
-                df_api = pd.DataFrame([{'ticker': ticker, 'timestamp': b.time, 'open': b.open, 'high': b.high,
-                                        'low': b.low, 'close': b.close, 'volume': b.volume, 'trading_value': b.amount}
-                                       for b in chart_min.bars])
-                if not df_api.empty:
-                    if pd.api.types.is_datetime64_any_dtype(df_api['timestamp']) and df_api[
-                        'timestamp'].dt.tz is not None:
-                        df_api['timestamp'] = df_api['timestamp'].dt.tz_localize(None)
-
-                    df_db = db.get_last_n_rows(ticker, table_min, n=40)
-                    df_combined = pd.concat([df_db, df_api]).drop_duplicates(subset=['timestamp'],
-                                                                             keep='last').sort_values(
-                        by='timestamp').reset_index(drop=True)
-                    df_with_indicators = calculate_indicators(df_combined)
-
-                    if last_ts_min:
-                        df_to_insert = df_with_indicators[df_with_indicators['timestamp'] > last_ts_min].copy()
-                    else:
-                        df_to_insert = df_with_indicators.copy()
-
-                    logger.info(f"'{ticker}' 저장할 신규 분봉 데이터 개수: {len(df_to_insert)}")
-
-                    if not df_to_insert.empty:
-                        db.insert_data(df_to_insert.dropna(), table_min)
-                        logger.info(f"'{ticker}': 분봉 {len(df_to_insert)}개 신규 데이터 저장 완료")
-
-            # 2. 일봉 데이터 수집
-            table_day = 'stock_data_day'
-            last_ts_day = db.get_last_timestamp(ticker, table_day)
-            logger.info(f"'{ticker}' 일봉 DB 마지막 시간: {last_ts_day}")
-            start_date_day = (last_ts_day + timedelta(days=1)).date() if last_ts_day else date(1980, 1, 1)
-
-            if start_date_day <= date.today():
+            with metrics.timer('collect_stage_seconds', stage='fetch_minute'):
+                chart_min = api.get_day_chart(ticker, start=start_to_fetch)
+
+        if chart_min and chart_min.bars:
+            bars_min = BarArray.from_bars(ticker, chart_min.bars)
+            if len(bars_min):
+                # 증분 지표 엔진이 마지막 반영 시점 이후의 봉만 계산합니다. (최초 1회만 DB에서 상태 복원)
+                key_min = (table_min, ticker)
+                with metrics.timer('collect_stage_seconds', stage='indicators'):
+                    if not indicator_engine.is_seeded(key_min):
+                        indicator_engine.seed(key_min, db.get_history(ticker, table_min))
+                    df_to_insert = indicator_engine.update_bars(key_min, bars_min)
+
+                logger.info(f"'{ticker}' 저장할 신규 분봉 데이터 개수: {len(df_to_insert)}")
+
+                if not df_to_insert.empty:
+                    _store_bars(db, writer, watermarks, df_to_insert.dropna(), table_min, ticker, '분봉')
+
+        # 2. 일봉 데이터 수집
+        table_day = 'stock_data_day'
+        last_ts_day = _last_timestamp(db, watermarks, ticker, table_day)
+        logger.info(f"'{ticker}' 일봉 DB 마지막 시간: {last_ts_day}")
+        start_date_day = (last_ts_day + timedelta(days=1)).date() if last_ts_day else date(1980, 1, 1)
+
+        if start_date_day <= date.today():
+            with metrics.timer('collect_stage_seconds', stage='fetch_daily'):
                 chart_day = api.get_daily_chart(ticker, start_date=start_date_day)
-                time.sleep(0.5)
-                if chart_day and chart_day.bars:
-                    df_api_day = pd.DataFrame([{'ticker': ticker, 'timestamp': b.time, 'open': b.open, 'high': b.high,
-                                                'low': b.low, 'close': b.close, 'volume': b.volume,
-                                                'trading_value': b.amount} for b in chart_day.bars])
-                    if not df_api_day.empty:
-                        df_with_day_indicators = calculate_indicators(df_api_day)
-                        db.insert_data(df_with_day_indicators.dropna(), table_day)
-                        logger.info(f"'{ticker}': 일봉 {len(df_with_day_indicators)}개 신규 데이터 저장 완료")
+            if chart_day and chart_day.bars:
+                bars_day = BarArray.from_bars(ticker, chart_day.bars)
+                if len(bars_day):
+                    key_day = (table_day, ticker)
+                    with metrics.timer('collect_stage_seconds', stage='indicators'):
+                        if not indicator_engine.is_seeded(key_day):
+                            indicator_engine.seed(key_day, db.get_history(ticker, table_day))
+                        df_with_day_indicators = indicator_engine.update_bars(key_day, bars_day)
+                    if not df_with_day_indicators.empty:
+                        _store_bars(db, writer, watermarks, df_with_day_indicators.dropna(), table_day, ticker, '일봉')
 
-            logger.info(f"--- '{ticker}' 종목 처리 완료 ---\n")
+        logger.info(f"--- '{ticker}' 종목 처리 완료 ---\n")
 
-        except Exception as e:
-            logger.error(f"'{ticker}' 데이터 수집 중 오류 발생: {e}", exc_info=True)
+    except Exception as e:
+        metrics.inc('collect_errors_total')
+        logger.error(f"'{ticker}' 데이터 수집 중 오류 발생: {e}", exc_info=True)
 
 
-def main():
+def _start_collect(config, db_handler, kis_api):
+    """collect 모드: 데이터 수집만 수행합니다."""
+    logger.info("데이터 수집 모드로 실행합니다.")
+
+
+def _start_train(config, db_handler, kis_api):
+    """train 모드: 모델을 학습합니다. 학습이 끝나면 데이터 수집만 계속됩니다."""
+    ModelTrainer = _mode_module('train').ModelTrainer
+
+    logger.info("모델 훈련 모드로 실행합니다. 훈련 완료 후 데이터 수집만 계속됩니다.")
+    trainer = ModelTrainer(db_handler, config['TRADING'])
+    trainer.train()
+
+
+def _start_trade(config, db_handler, kis_api):
+    """trade 모드: 주기적으로 매매 분석/알림을 실행합니다. 종료 시 닫을 Trader를 반환합니다."""
+    Trader = _mode_module('trade').Trader
+
+    logger.info("자동 매매/알림 모드로 실행합니다.")
+    trader = Trader(kis_api, db_handler, config['TRADING'])
+    scheduler.add_job('trade', _open_market_job(_market_calendar(config), trader.tickers, trader.run),
+                      config['TRADING'].getint('trade_interval_minutes', 5),
+                      config['TRADING'].getfloat('trade_offset_seconds', 10))
+    return trader
+
+
+def _start_backtest(config, db_handler, kis_api):
+    """backtest 모드: 저장된 시세 이력으로 학습된 모델을 평가합니다. 평가가 끝나면 데이터 수집만 계속됩니다."""
+    Backtester = _mode_module('backtest').Backtester
+
+    logger.info("백테스트 모드로 실행합니다. 백테스트 완료 후 데이터 수집만 계속됩니다.")
+    backtester = Backtester(db_handler, config['TRADING'])
+    backtester.run()
+
+
+def _start_backfill(config, db_handler, kis_api):
+    """backfill 모드: 과거 분봉을 채워 넣습니다. 백필이 끝나면 데이터 수집만 계속됩니다."""
+    MinuteBackfiller = _mode_module('backfill').MinuteBackfiller
+
+    logger.info("과거 분봉 백필 모드로 실행합니다. 백필 완료 후 데이터 수집만 계속됩니다.")
+    backfiller = MinuteBackfiller(kis_api, db_handler, config['TRADING'])
+    if backfiller.run():
+        # 과거 봉이 추가되어 누적 지표(VWAP 등)가 바뀌었으므로 다음 수집 시 DB에서 지표 상태를 다시 불러옵니다.
+        indicator_engine.reset()
+
+
+def _market_calendar(config):
+    """장 시간에만 수집/매매하도록 설정된 경우 시장 달력을 반환합니다."""
+    if config['TRADING'].getboolean('market_hours_only', True):
+        return MarketCalendar(config['TRADING'])
+    return None
+
+
+RUN_MODES = {
+    'collect': _start_collect,
+    'train': _start_train,
+    'trade': _start_trade,
+    'backtest': _start_backtest,
+    'backfill': _start_backfill,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="주식 데이터 수집/학습/자동매매 프로그램")
+    parser.add_argument('mode', nargs='?', choices=sorted(RUN_MODES),
+                        help="실행 모드 (지정하지 않으면 config.ini의 run_mode 사용)")
+    parser.add_argument('--config', default='config.ini', help="설정 파일 경로")
+    parser.add_argument('--start', help="backfill 시작일 (YYYYMMDD, 지정 시 설정 파일의 backfill_start 대신 사용)")
+    parser.add_argument('--end', help="backfill 종료일 (YYYYMMDD, 지정 시 설정 파일의 backfill_end 대신 사용)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     global logger
     logger = setup_logger()
+    args = parse_args(argv)
+    writer = None
+    ingestor = None
+    service = None
     try:
         config = configparser.ConfigParser()
-        config.read('config.ini', encoding='utf-8')
+        config.read(args.config, encoding='utf-8')
+        if args.start:
+            config['TRADING']['backfill_start'] = args.start
+        if args.end:
+            config['TRADING']['backfill_end'] = args.end
+        if config.has_section('METRICS'):
+            metrics.configure(config['METRICS'])
 
         db_handler = DBHandler(config['DATABASE'])
         kis_api = KISApi(config['API'])
 
+        # 시세 테이블/컬럼/미래 파티션 준비와 분봉 월 파티션 유지 (매일 장 마감 후 03:00 KST = 18:00 UTC에 파티션 정리)
+        # 기본키 추가나 파티션 적용처럼 테이블 전체를 다시 쓰는 변경은 python -m database.schema migrate 로 따로 실행합니다.
+        if config['DATABASE'].getboolean('manage_schema', True):
+            schema = SchemaManager(db_handler, config['DATABASE'])
+            schema.prepare()
+            scheduler.add_job('partitions', schema.maintain, 24 * 60, 18 * 60 * 60)
+
         domestic_tickers = config['TRADING'].get('domestic_tickers', '').split(',')
         overseas_tickers = config['TRADING'].get('overseas_tickers', '').split(',')
         tickers = [t.strip() for t in domestic_tickers + overseas_tickers if t.strip()]
@@ -107,34 +293,60 @@ def main():
             logger.warning("설정 파일에 분석할 종목(tickers)이 지정되지 않았습니다.")
             return
 
-        run_mode = config['TRADING'].get('run_mode', 'collect')
+        run_mode = args.mode or config['TRADING'].get('run_mode', 'collect')
+        if run_mode not in RUN_MODES:
+            logger.warning(f"알 수 없는 실행 모드 '{run_mode}'. 데이터 수집 모드로 실행합니다.")
+            run_mode = 'collect'
+        collect_workers = config['TRADING'].getint('collect_workers', 8)
 
-        # [수정] db -> db_handler 로 변수명 수정
-        schedule.every(1).minutes.do(collect_data_job, db_handler, kis_api, tickers)
+        # DB 저장은 백그라운드 저장 스레드가 담당하여 수집 루프가 DB 응답을 기다리지 않도록 합니다.
+        if config['DATABASE'].getboolean('write_behind', True):
+            writer = WriteBehindWriter(db_handler, config['DATABASE'], on_drop=_forget_unsaved).start()
+
+        # 종목별 마지막 저장 시간은 한 번에 불러와 메모리에서 관리합니다. (매 주기 MAX(timestamp) 조회 제거)
+        watermarks = WatermarkIndex(db_handler, ['stock_data_min', 'stock_data_day'],
+                                    config['DATABASE'].getfloat('watermark_reconcile_minutes', 60))
+        watermarks.load()
+
+        # stream: 분봉은 실시간 체결을 집계해 저장하고, 주기 수집은 일봉만 담당합니다.
+        streaming = config['TRADING'].get('ingestion', 'poll') == 'stream'
 
+        # 매 분 봉 마감 직후(schedule_offset_seconds초 뒤)에 장이 열린 시장의 종목만 수집합니다.
+        collect = lambda open_tickers: collect_data_job(db_handler, kis_api, open_tickers, collect_workers, writer,
+                                                        watermarks, minute_bars=not streaming)
+        scheduler.add_job('collect', _open_market_job(_market_calendar(config), tickers, collect), 1,
+                          config['TRADING'].getfloat('schedule_offset_seconds', 2))
+
+        # 시작 시에는 장 시간과 관계없이 전체 종목의 누락분을 한 번 수집합니다.
         logger.info("초기 데이터 수집을 시작합니다.")
         # [수정] db -> db_handler 로 변수명 수정
-        collect_data_job(db_handler, kis_api, tickers)
-
-        if run_mode == 'train':
-            logger.info("모델 훈련 모드로 실행합니다. 훈련 완료 후 데이터 수집만 계속됩니다.")
-            trainer = ModelTrainer(db_handler, config['TRADING'])
-            trainer.train()
-        elif run_mode == 'trade':
-            logger.info("자동 매매/알림 모드로 실행합니다.")
-            trader = Trader(kis_api, db_handler, config['TRADING'])
-            schedule.every(5).minutes.do(trader.run)
-        else:
-            logger.info("데이터 수집 모드로 실행합니다.")
+        collect_data_job(db_handler, kis_api, tickers, collect_workers, writer, watermarks)
+
+        if streaming:
+            store = lambda df, table_name, ticker: _store_bars(db_handler, writer, watermarks, df, table_name, ticker,
+                                                                '실시간 분봉')
+            ingestor = StreamingIngestor(db_handler, KisRealtimeFeed(kis_api, tickers), indicator_engine, store,
+                                         config['TRADING']).start()
 
-        logger.info(f"'{run_mode}' 모드 설정 완료. 데이터 수집은 1분마다 주기적으로 실행됩니다.")
+        # 모드 시작 함수가 종료 시 정리할 객체(close() 제공)를 반환하면 프로그램 종료 때 닫습니다.
+        service = RUN_MODES[run_mode](config, db_handler, kis_api)
 
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        logger.info(f"'{run_mode}' 모드 설정 완료. 데이터 수집은 장 시간 동안 1분마다 주기적으로 실행됩니다.")
+        scheduler.start().wait()
 
+    except KeyboardInterrupt:
+        logger.info("사용자 요청으로 프로그램을 종료합니다.")
     except Exception as e:
         logger.critical("프로그램 실행 중 심각한 오류가 발생하여 종료합니다.", exc_info=True)
+    finally:
+        scheduler.stop(timeout=30)
+        if service:
+            service.close()
+        if ingestor:
+            ingestor.stop()
+        if writer:
+            writer.close()
+        metrics.close()
 
 
 if __name__ == "__main__":